@@ -1,23 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta
+from typing import List, Optional
+from database import get_async_db
 from auth.models import User as UserModel, UserRole
 from auth.schemas import UserResponse, UserList
-from auth.utils import get_current_active_user
-from auth.crud import get_users, get_user, get_users_by_role
-from app.crud import (
+from auth.utils import get_current_active_user, get_read_db
+from app.utils import run_until_disconnected
+from app.utils.pagination import decode_cursor, set_next_cursor
+from app.utils.export import export_response
+from auth.crud.async_crud import get_users, get_user, get_users_by_role
+from products.crud.async_crud import recompute_order_counters, get_archived_orders, get_executor_productivity
+from products.models import OrderStatus
+from products.schemas import ArchivedOrder as ArchivedOrderSchema
+from products.services.archival import run_archive_pass
+from products.services.order_analytics import GRANULARITIES, bucket_count, get_order_analytics
+from products.services.executor_productivity import refresh_executor_productivity
+from config import settings
+from app.crud.async_crud import (
     change_user_password,
     change_user_role,
     deactivate_user,
     get_user_statistics
 )
+from app.crud import (
+    users_export_statement,
+    orders_export_statement,
+    search_history_export_statement
+)
 from app.schemas import (
     ChangePasswordRequest,
     ChangeRoleRequest,
     UserManagementResponse,
     UserStatistics,
-    BulkUserOperation
+    BulkUserOperation,
+    OrderCountersRepair,
+    ArchiveRunResult,
+    OrderAnalytics,
+    ExecutorProductivityItem,
+    ExecutorProductivityReport
 )
 
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -33,27 +54,32 @@ def require_admin(current_user: UserModel = Depends(get_current_active_user)):
 
 @router.get("/users", response_model=List[UserList])
 async def admin_get_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: UserModel = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получение списка всех пользователей (только для администраторов)
+    
+    - **cursor**: Курсор из заголовка X-Next-Cursor предыдущей страницы
     """
-    users = get_users(db, skip=skip, limit=limit)
+    users = await get_users(db, skip=skip, limit=limit, cursor=decode_cursor(cursor))
+    set_next_cursor(response, users, limit, lambda user: (user.id,))
     return users
 
 @router.get("/users/{user_id}", response_model=UserResponse)
 async def admin_get_user(
     user_id: int,
     current_user: UserModel = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получение конкретного пользователя (только для администраторов)
     """
-    user = get_user(db, user_id)
+    user = await get_user(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
     return user
@@ -63,12 +89,12 @@ async def admin_change_user_password(
     user_id: int,
     password_data: ChangePasswordRequest,
     current_user: UserModel = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Изменение пароля пользователя (только для администраторов)
     """
-    updated_user = change_user_password(db, user_id, password_data.new_password)
+    updated_user = await change_user_password(db, user_id, password_data.new_password)
     if not updated_user:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
     
@@ -82,12 +108,12 @@ async def admin_change_user_role(
     user_id: int,
     role_data: ChangeRoleRequest,
     current_user: UserModel = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Изменение роли пользователя (только для администраторов)
     """
-    updated_user = change_user_role(db, user_id, role_data.new_role)
+    updated_user = await change_user_role(db, user_id, role_data.new_role)
     if not updated_user:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
     
@@ -100,7 +126,7 @@ async def admin_change_user_role(
 async def admin_deactivate_user(
     user_id: int,
     current_user: UserModel = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Деактивация пользователя (только для администраторов)
@@ -111,7 +137,7 @@ async def admin_deactivate_user(
             detail="Нельзя деактивировать самого себя"
         )
     
-    result = deactivate_user(db, user_id)
+    result = await deactivate_user(db, user_id)
     if not result:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
     
@@ -125,29 +151,29 @@ async def admin_get_users_by_role(
     skip: int = 0,
     limit: int = 100,
     current_user: UserModel = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получение пользователей по роли (только для администраторов)
     """
-    users = get_users_by_role(db, role)
+    users = await get_users_by_role(db, role)
     return users[skip:skip + limit]
 
 @router.get("/statistics", response_model=UserStatistics)
 async def admin_get_statistics(
     current_user: UserModel = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Получение статистики по пользователям (только для администраторов)
     """
-    return get_user_statistics(db)
+    return await get_user_statistics(db)
 
 @router.post("/users/bulk/change-role", response_model=UserManagementResponse)
 async def admin_bulk_change_role(
     bulk_data: BulkUserOperation,
     current_user: UserModel = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Массовое изменение ролей пользователей (только для администраторов)
@@ -156,7 +182,7 @@ async def admin_bulk_change_role(
         changed_count = 0
         for user_id in bulk_data.user_ids:
             if user_id != current_user.id:  # Нельзя изменить свою роль
-                result = change_user_role(db, user_id, bulk_data.new_role)
+                result = await change_user_role(db, user_id, bulk_data.new_role)
                 if result:
                     changed_count += 1
         
@@ -168,3 +194,202 @@ async def admin_bulk_change_role(
         status_code=400, 
         detail="Неподдерживаемая операция"
     )
+
+@router.post("/orders/recompute-counters", response_model=OrderCountersRepair)
+async def admin_recompute_order_counters(
+    order_id: Optional[int] = None,
+    current_user: UserModel = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Пересчет счетчиков продуктов заказов (только для администраторов)
+    
+    - **order_id**: Пересчитать только этот заказ (по умолчанию все заказы)
+    """
+    repaired = await recompute_order_counters(db, [order_id] if order_id is not None else None)
+    return OrderCountersRepair(repaired_orders=repaired)
+
+@router.get("/orders/archive", response_model=List[ArchivedOrderSchema])
+async def admin_get_archived_orders(
+    response: Response,
+    customer_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    current_user: UserModel = Depends(require_admin),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Архивные заказы (только для администраторов)
+    
+    - **customer_id**: Только заказы этого заказчика
+    - **cursor**: Курсор из заголовка X-Next-Cursor предыдущей страницы
+    """
+    orders = await get_archived_orders(db, customer_id, skip=skip, limit=limit, cursor=decode_cursor(cursor))
+    set_next_cursor(response, orders, limit, lambda order: (order.created_at, order.id))
+    return orders
+
+@router.post("/archive/run", response_model=ArchiveRunResult)
+async def admin_run_archive(
+    current_user: UserModel = Depends(require_admin)
+):
+    """
+    Запустить проход архивации сейчас, не дожидаясь фоновой задачи (только для администраторов)
+    """
+    return await run_archive_pass()
+
+@router.get("/analytics/orders", response_model=OrderAnalytics)
+async def admin_order_analytics(
+    request: Request,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    granularity: str = Query("hour", description="hour или day"),
+    percentiles: str = Query("50,90,99", description="Перцентили через запятую"),
+    current_user: UserModel = Depends(require_admin),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Аналитика заказов по интервалам (только для администраторов)
+    
+    Количество созданных, взятых в работу, завершенных и отмененных заказов
+    и перцентили времени до начала и до завершения исполнения (в секундах,
+    точность около 12%). Считается по почасовым счетчикам, а не по заказам.
+    
+    - **start**, **end**: Период [start, end) в UTC (по умолчанию последние сутки)
+    - **granularity**: Интервал: hour или day
+    - **percentiles**: Например 50,90,99
+    """
+    if granularity not in GRANULARITIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Поддерживаемые интервалы: {', '.join(GRANULARITIES)}"
+        )
+    try:
+        requested = [float(value) for value in percentiles.split(",") if value.strip()]
+    except ValueError:
+        requested = []
+    if not requested or any(not 0 < value <= 100 for value in requested):
+        raise HTTPException(status_code=400, detail="Перцентили должны быть числами от 0 до 100")
+    
+    end = (end or datetime.utcnow()).replace(tzinfo=None)
+    start = (start or end - timedelta(days=1)).replace(tzinfo=None)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start должен быть раньше end")
+    if bucket_count(start, end, granularity) > settings.ORDER_ANALYTICS_MAX_BUCKETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Слишком много интервалов (максимум {settings.ORDER_ANALYTICS_MAX_BUCKETS}), увеличьте granularity"
+        )
+    return await run_until_disconnected(
+        request, get_order_analytics(db, start, end, granularity, requested), route="admin_order_analytics"
+    )
+
+@router.get("/analytics/executors", response_model=ExecutorProductivityReport)
+async def admin_executor_productivity(
+    request: Request,
+    window_days: int = Query(7, description="Окно в днях из EXECUTOR_STATS_WINDOWS"),
+    executor_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 100,
+    current_user: UserModel = Depends(require_admin),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Продуктивность исполнителей за последние дни (только для администраторов)
+    
+    Купленные продукты, завершенные заказы и медиана времени между покупками.
+    Данные из сводки, которая пересчитывается раз в EXECUTOR_STATS_REFRESH_INTERVAL
+    секунд (время пересчета - refreshed_at).
+    
+    - **window_days**: Окно: 1, 7 или 30 дней (по умолчанию 7)
+    - **executor_id**: Только этот исполнитель
+    """
+    if window_days not in settings.EXECUTOR_STATS_WINDOWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Поддерживаемые окна: {', '.join(map(str, settings.EXECUTOR_STATS_WINDOWS))}"
+        )
+    rows = await run_until_disconnected(
+        request,
+        get_executor_productivity(db, window_days, executor_id, skip=skip, limit=limit),
+        route="admin_executor_productivity"
+    )
+    return ExecutorProductivityReport(
+        window_days=window_days,
+        refreshed_at=rows[0][0].refreshed_at if rows else None,
+        executors=[
+            ExecutorProductivityItem(
+                executor_id=summary.executor_id,
+                username=username,
+                items_purchased=summary.items_purchased,
+                orders_completed=summary.orders_completed,
+                median_purchase_interval=summary.median_purchase_interval
+            )
+            for summary, username in rows
+        ]
+    )
+
+@router.post("/analytics/executors/refresh", response_model=UserManagementResponse)
+async def admin_refresh_executor_productivity(
+    current_user: UserModel = Depends(require_admin)
+):
+    """
+    Пересчитать сводку продуктивности исполнителей сейчас (только для администраторов)
+    """
+    count = await refresh_executor_productivity()
+    return UserManagementResponse(message=f"Сводка пересчитана, строк: {count}")
+
+@router.get("/export/users")
+async def admin_export_users(
+    format: str = Query("csv", description="csv или ndjson"),
+    role: Optional[UserRole] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    current_user: UserModel = Depends(require_admin)
+):
+    """
+    Потоковая выгрузка пользователей в CSV или NDJSON (только для администраторов)
+    
+    - **role**: Только пользователи с этой ролью
+    - **created_from**, **created_to**: Дата регистрации в диапазоне [from, to)
+    """
+    statement = users_export_statement(role, created_from, created_to)
+    return export_response(statement, format, "users", current_user.id)
+
+@router.get("/export/orders")
+async def admin_export_orders(
+    format: str = Query("csv", description="csv или ndjson"),
+    status: Optional[OrderStatus] = None,
+    customer_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    current_user: UserModel = Depends(require_admin)
+):
+    """
+    Потоковая выгрузка заказов в CSV или NDJSON (только для администраторов)
+    
+    По строке на заказ со счетчиками продуктов.
+    
+    - **status**: Только заказы в этом статусе
+    - **customer_id**: Только заказы этого заказчика
+    - **created_from**, **created_to**: Дата создания в диапазоне [from, to)
+    """
+    statement = orders_export_statement(status, customer_id, created_from, created_to)
+    return export_response(statement, format, "orders", current_user.id)
+
+@router.get("/export/search-history")
+async def admin_export_search_history(
+    format: str = Query("csv", description="csv или ndjson"),
+    user_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    current_user: UserModel = Depends(require_admin)
+):
+    """
+    Потоковая выгрузка истории поиска в CSV или NDJSON (только для администраторов)
+    
+    - **user_id**: Только поиски этого пользователя
+    - **created_from**, **created_to**: Время поиска в диапазоне [from, to)
+    """
+    statement = search_history_export_statement(user_id, created_from, created_to)
+    return export_response(statement, format, "search-history", current_user.id)
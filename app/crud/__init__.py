@@ -1,7 +1,11 @@
 from .admin_crud import (
     change_user_password, change_user_role, deactivate_user, get_user_statistics
 )
+from .export_crud import (
+    users_export_statement, orders_export_statement, search_history_export_statement
+)
 
 __all__ = [
-    "change_user_password", "change_user_role", "deactivate_user", "get_user_statistics"
+    "change_user_password", "change_user_role", "deactivate_user", "get_user_statistics",
+    "users_export_statement", "orders_export_statement", "search_history_export_statement"
 ]
@@ -0,0 +1,22 @@
+# Асинхронные версии CRUD функций для AsyncSession (см. database.run_async)
+import asyncio
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import run_async
+from auth.models import User
+from auth.utils import get_password_hash
+from app.crud import admin_crud
+
+change_user_role = run_async(admin_crud.change_user_role)
+deactivate_user = run_async(admin_crud.deactivate_user)
+get_user_statistics = run_async(admin_crud.get_user_statistics)
+
+async def change_user_password(db: AsyncSession, user_id: int, new_password: str):
+    """Изменение пароля пользователя (хеширование bcrypt выполняется в потоке)"""
+    db_user = await db.get(User, user_id)
+    if not db_user:
+        return None
+
+    db_user.hashed_password = await asyncio.to_thread(get_password_hash, new_password)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
@@ -0,0 +1,56 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.sql import Select
+from auth.models import User, UserRole
+from products.models import Order, OrderStatus, SearchHistory
+
+# Запросы выгрузок выбирают колонки, а не объекты ORM: строки идут в ответ без материализации
+
+def _date_range(statement: Select, column, created_from: Optional[datetime],
+                created_to: Optional[datetime]) -> Select:
+    if created_from is not None:
+        statement = statement.where(column >= created_from)
+    if created_to is not None:
+        statement = statement.where(column < created_to)
+    return statement
+
+def users_export_statement(role: Optional[UserRole] = None, created_from: Optional[datetime] = None,
+                           created_to: Optional[datetime] = None) -> Select:
+    """Пользователи для выгрузки (без хэша пароля)"""
+    statement = select(
+        User.id, User.username, User.email, User.role, User.is_active, User.created_at, User.updated_at
+    )
+    if role is not None:
+        statement = statement.where(User.role == role)
+    return _date_range(statement, User.created_at, created_from, created_to).order_by(User.id)
+
+def orders_export_statement(status: Optional[OrderStatus] = None, customer_id: Optional[int] = None,
+                            created_from: Optional[datetime] = None,
+                            created_to: Optional[datetime] = None) -> Select:
+    """Заказы для выгрузки: по строке на заказ со счетчиками продуктов"""
+    statement = select(
+        Order.id, Order.customer_id, Order.status, Order.external_ref, Order.assignee_id,
+        Order.total_products, Order.purchased_products,
+        Order.created_at, Order.updated_at, Order.completed_at
+    )
+    if status is not None:
+        statement = statement.where(Order.status == status)
+    if customer_id is not None:
+        statement = statement.where(Order.customer_id == customer_id)
+    return _date_range(statement, Order.created_at, created_from, created_to).order_by(
+        Order.created_at, Order.id
+    )
+
+def search_history_export_statement(user_id: Optional[int] = None, created_from: Optional[datetime] = None,
+                                    created_to: Optional[datetime] = None) -> Select:
+    """История поиска для выгрузки"""
+    statement = select(
+        SearchHistory.id, SearchHistory.user_id, SearchHistory.query,
+        SearchHistory.results_count, SearchHistory.search_timestamp
+    )
+    if user_id is not None:
+        statement = statement.where(SearchHistory.user_id == user_id)
+    return _date_range(statement, SearchHistory.search_timestamp, created_from, created_to).order_by(
+        SearchHistory.id
+    )
@@ -1,3 +1,4 @@
 from .users import router as users_router
+from .metrics import router as metrics_router
 
-__all__ = ["users_router"]
+__all__ = ["users_router", "metrics_router"]
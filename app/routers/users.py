@@ -1,37 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from database import get_async_db
 from auth.models import User as UserModel, UserRole
 from auth.schemas import UserResponse, UserList
-from auth.utils import get_current_active_user
-from auth.crud import get_users, get_user, get_users_by_role
+from auth.utils import get_current_active_user, get_read_db
+from app.utils.pagination import decode_cursor, set_next_cursor
+from auth.crud.async_crud import get_users, get_user, get_users_by_role
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 @router.get("/", response_model=List[UserList])
 async def get_all_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: UserModel = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Получение списка всех пользователей (требует авторизации)
+    
+    - **cursor**: Курсор из заголовка X-Next-Cursor предыдущей страницы
     """
-    users = get_users(db, skip=skip, limit=limit)
+    users = await get_users(db, skip=skip, limit=limit, cursor=decode_cursor(cursor))
+    set_next_cursor(response, users, limit, lambda user: (user.id,))
     return users
 
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user_by_id(
     user_id: int,
     current_user: UserModel = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получение пользователя по ID (требует авторизации)
     """
-    user = get_user(db, user_id)
+    user = await get_user(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
     return user
@@ -42,10 +48,10 @@ async def get_users_by_role_endpoint(
     skip: int = 0,
     limit: int = 100,
     current_user: UserModel = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получение пользователей по роли (требует авторизации)
     """
-    users = get_users_by_role(db, role)
+    users = await get_users_by_role(db, role)
     return users[skip:skip + limit]
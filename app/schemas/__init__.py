@@ -1,9 +1,13 @@
 from .admin_schemas import (
     ChangePasswordRequest, ChangeRoleRequest, UserManagementResponse,
-    UserStatistics, BulkUserOperation
+    UserStatistics, BulkUserOperation, OrderCountersRepair, ArchiveRunResult,
+    OrderAnalyticsBucket, OrderAnalytics,
+    ExecutorProductivityItem, ExecutorProductivityReport
 )
 
 __all__ = [
     "ChangePasswordRequest", "ChangeRoleRequest", "UserManagementResponse",
-    "UserStatistics", "BulkUserOperation"
+    "UserStatistics", "BulkUserOperation", "OrderCountersRepair", "ArchiveRunResult",
+    "OrderAnalyticsBucket", "OrderAnalytics",
+    "ExecutorProductivityItem", "ExecutorProductivityReport"
 ]
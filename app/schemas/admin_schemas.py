@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from datetime import datetime
 from typing import Optional
 from auth.models import UserRole
 from auth.schemas import UserResponse
@@ -17,6 +18,45 @@ class UserStatistics(BaseModel):
     total_users: int
     users_by_role: dict[str, int]
 
+class OrderCountersRepair(BaseModel):
+    repaired_orders: int
+
+class ArchiveRunResult(BaseModel):
+    orders: int
+    search_history: int
+    partitions: dict[str, list[str]] = {}
+
+class OrderAnalyticsBucket(BaseModel):
+    start: datetime
+    created: int
+    started: int
+    completed: int
+    cancelled: int
+    # Перцентили длительностей в секундах ("p50": ...), None - нет заказов
+    time_to_start: dict[str, Optional[float]] = {}
+    time_to_complete: dict[str, Optional[float]] = {}
+
+class OrderAnalytics(BaseModel):
+    start: datetime
+    end: datetime
+    granularity: str
+    percentiles: list[float]
+    totals: OrderAnalyticsBucket
+    buckets: list[OrderAnalyticsBucket]
+
+class ExecutorProductivityItem(BaseModel):
+    executor_id: int
+    username: Optional[str] = None
+    items_purchased: int
+    orders_completed: int
+    # Медиана времени между покупками в секундах, None - меньше двух покупок
+    median_purchase_interval: Optional[float] = None
+
+class ExecutorProductivityReport(BaseModel):
+    window_days: int
+    refreshed_at: Optional[datetime] = None
+    executors: list[ExecutorProductivityItem]
+
 class BulkUserOperation(BaseModel):
     user_ids: list[int]
     operation: str  # "change_role", "deactivate", etc.
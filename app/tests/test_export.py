@@ -0,0 +1,27 @@
+import json
+from datetime import datetime
+from products.models import OrderStatus
+from app.utils.export import format_csv, format_ndjson
+
+KEYS = ["id", "status", "created_at", "notes"]
+ROWS = [(1, OrderStatus.COMPLETED, datetime(2024, 5, 1, 12, 30), None), (2, OrderStatus.PENDING, None, 'a,"b"')]
+
+class TestExportFormats:
+    """Тесты форматов потоковой выгрузки"""
+
+    def test_csv(self):
+        """Заголовок только в первой пачке, значения приводятся к тексту"""
+        assert format_csv(KEYS, ROWS, header=True) == (
+            "id,status,created_at,notes\n"
+            "1,completed,2024-05-01T12:30:00,\n"
+            '2,pending,,"a,""b"""\n'
+        )
+        assert format_csv(KEYS, ROWS[:1]) == "1,completed,2024-05-01T12:30:00,\n"
+
+    def test_ndjson(self):
+        """Объект на строку, заголовок не нужен"""
+        lines = format_ndjson(KEYS, ROWS, header=True).splitlines()
+        assert [json.loads(line) for line in lines] == [
+            {"id": 1, "status": "completed", "created_at": "2024-05-01T12:30:00", "notes": None},
+            {"id": 2, "status": "pending", "created_at": None, "notes": 'a,"b"'},
+        ]
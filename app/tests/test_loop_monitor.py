@@ -0,0 +1,56 @@
+import asyncio
+import time
+import pytest
+from types import SimpleNamespace
+from app.utils.loop_monitor import LoopMonitor, LoopStallError, loop_stall_guard
+
+async def blocking_endpoint():
+    time.sleep(0.15)
+
+async def async_endpoint():
+    await asyncio.sleep(0.15)
+
+class TestLoopMonitor:
+    """Тесты детектора блокировок event loop"""
+    
+    APP = SimpleNamespace(routes=[
+        SimpleNamespace(endpoint=blocking_endpoint, methods={"GET"}, path="/blocking"),
+        SimpleNamespace(endpoint=async_endpoint, methods={"GET"}, path="/async")
+    ])
+    
+    def _run(self, monitor: LoopMonitor, handler):
+        async def scenario():
+            monitor.start(self.APP)
+            await asyncio.sleep(0.03)
+            await handler()
+            await asyncio.sleep(0.05)
+            await monitor.stop()
+        
+        asyncio.run(scenario())
+    
+    def test_stall_attributed_to_route(self):
+        """Блокировка привязывается к маршруту и кадру, где она произошла"""
+        monitor = LoopMonitor(interval=0.01, threshold=0.05)
+        self._run(monitor, blocking_endpoint)
+        
+        assert len(monitor.stalls) == 1
+        stall = monitor.stalls[0]
+        assert stall.route == "GET /blocking"
+        assert "blocking_endpoint" in stall.frame
+        assert stall.duration >= 0.1
+    
+    def test_async_work_is_not_a_stall(self):
+        """Ожидание в await не блокирует event loop"""
+        monitor = LoopMonitor(interval=0.01, threshold=0.05)
+        self._run(monitor, async_endpoint)
+        assert len(monitor.stalls) == 0
+    
+    def test_strict_mode_fails_on_blocking_handler(self):
+        """Строгий режим падает, если обработчик блокирует дольше допустимого"""
+        monitor = LoopMonitor(interval=0.01, threshold=1.0)
+        with pytest.raises(LoopStallError) as error:
+            with loop_stall_guard(50, monitor):
+                self._run(monitor, blocking_endpoint)
+        
+        assert error.value.stalls[0].route == "GET /blocking"
+        assert monitor.threshold == 1.0
@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import create_engine, text
+from app.utils.query_counter import (
+    QueryBudgetError, assert_query_budget, count_queries, install_query_counter, normalize_statement
+)
+
+@pytest.fixture
+def engine():
+    install_query_counter()
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+    yield engine
+    engine.dispose()
+
+class TestQueryCounter:
+    """Тесты счетчика запросов к БД"""
+
+    def test_normalize_statement(self):
+        """Запросы, отличающиеся только параметрами и длиной IN, совпадают"""
+        assert normalize_statement("SELECT * FROM items WHERE id IN (?, ?, ?)") == \
+            normalize_statement("SELECT *\n  FROM items WHERE id IN (?)")
+        assert normalize_statement("SELECT * FROM items WHERE id IN (%s, %s)") == \
+            "SELECT * FROM items WHERE id IN (?)"
+
+    def test_count_and_repeated(self, engine):
+        """Повторяющийся запрос (N+1) попадает в repeated"""
+        with count_queries() as stats, engine.connect() as connection:
+            for item_id in range(5):
+                connection.execute(text("SELECT name FROM items WHERE id = :id"), {"id": item_id})
+            connection.execute(text("SELECT count(*) FROM items"))
+
+        assert stats.count == 6
+        assert stats.duration > 0
+        assert list(stats.repeated(5).values()) == [5]
+
+    def test_nested_blocks(self, engine):
+        """Запросы вложенного блока учитываются и во внешнем"""
+        with count_queries() as outer, engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            with count_queries() as inner:
+                connection.execute(text("SELECT 2"))
+        assert (outer.count, inner.count) == (2, 1)
+
+    def test_query_budget(self, engine):
+        """Превышение бюджета и повторяющиеся запросы - ошибка"""
+        with assert_query_budget(2), engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+        with pytest.raises(QueryBudgetError) as error:
+            with assert_query_budget(3, repeat_threshold=3), engine.connect() as connection:
+                for item_id in range(3):
+                    connection.execute(text("SELECT name FROM items WHERE id = :id"), {"id": item_id})
+        assert len(error.value.violations) == 1
@@ -0,0 +1,23 @@
+from .cancellation import (
+    ClientDisconnected, CLIENT_CLOSED_REQUEST, run_until_disconnected
+)
+from .loop_monitor import (
+    LoopMonitor, LoopStall, LoopStallError, loop_monitor, loop_stall_guard
+)
+from .query_counter import (
+    QueryStats, QueryBudgetError, QueryCounterMiddleware, count_queries, install_query_counter,
+    assert_query_budget
+)
+from .export import EXPORT_FORMATS, export_response, stream_export
+from .pagination import (
+    NEXT_CURSOR_HEADER, encode_cursor, decode_cursor, paginate, set_next_cursor
+)
+
+__all__ = [
+    "ClientDisconnected", "CLIENT_CLOSED_REQUEST", "run_until_disconnected",
+    "LoopMonitor", "LoopStall", "LoopStallError", "loop_monitor", "loop_stall_guard",
+    "QueryStats", "QueryBudgetError", "QueryCounterMiddleware", "count_queries", "install_query_counter",
+    "assert_query_budget",
+    "EXPORT_FORMATS", "export_response", "stream_export",
+    "NEXT_CURSOR_HEADER", "encode_cursor", "decode_cursor", "paginate", "set_next_cursor"
+]
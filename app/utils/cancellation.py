@@ -0,0 +1,60 @@
+import asyncio
+from typing import Awaitable, Optional, TypeVar
+from fastapi import Request
+from config import settings
+from metrics import registry
+
+T = TypeVar("T")
+
+# Нестандартный код nginx: клиент закрыл соединение до ответа
+CLIENT_CLOSED_REQUEST = 499
+
+cancelled_requests = registry.counter(
+    "cancelled_requests_total",
+    "Запросы, работа которых отменена из-за отключения клиента"
+)
+
+class ClientDisconnected(Exception):
+    """Клиент закрыл соединение, работа по запросу отменена"""
+
+    def __init__(self, route: str):
+        super().__init__(f"Клиент отключился: {route}")
+        self.route = route
+
+async def run_until_disconnected(
+    request: Request,
+    awaitable: Awaitable[T],
+    route: str,
+    poll_interval: Optional[float] = None
+) -> T:
+    """
+    Выполняет работу запроса, пока клиент остается подключенным
+
+    Работа запускается отдельной задачей. Если клиент отключается раньше,
+    чем она завершится, задача (вместе со всеми дочерними задачами,
+    которые она ожидает) отменяется и выбрасывается ClientDisconnected.
+
+    Args:
+        request: Текущий HTTP запрос
+        awaitable: Корутина с работой запроса
+        route: Имя маршрута для метрик
+        poll_interval: Период проверки соединения в секундах
+
+    Returns:
+        Результат работы
+    """
+    interval = poll_interval or settings.DISCONNECT_POLL_INTERVAL
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                cancelled_requests.inc(route=route)
+                raise ClientDisconnected(route)
+    finally:
+        if not task.done():
+            task.cancel()
@@ -0,0 +1,201 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from types import CodeType, FrameType
+from typing import Deque, Dict, Iterator, List, Optional
+from config import settings
+from metrics import registry
+
+loop_lag = registry.histogram(
+    "event_loop_lag_seconds",
+    "Задержка срабатывания heartbeat задачи event loop",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+loop_stalls = registry.counter(
+    "event_loop_stalls_total",
+    "Блокировки event loop дольше порога по маршрутам"
+)
+loop_stall_duration = registry.histogram(
+    "event_loop_stall_seconds",
+    "Длительность блокировок event loop по маршрутам"
+)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+UNKNOWN_ROUTE = "unknown"
+
+@dataclass
+class LoopStall:
+    """Блокировка event loop"""
+    route: str
+    frame: str
+    duration: float = 0.0
+    stack: List[str] = field(default_factory=list)
+
+class LoopStallError(AssertionError):
+    """Обработчик заблокировал event loop дольше допустимого (строгий режим)"""
+
+    def __init__(self, stalls: List[LoopStall], max_block: float):
+        details = "\n".join(
+            f"  {stall.route}: {stall.duration * 1000:.0f} мс в {stall.frame}" for stall in stalls
+        )
+        super().__init__(f"Event loop заблокирован дольше {max_block * 1000:.0f} мс:\n{details}")
+        self.stalls = stalls
+
+def _is_project_frame(frame: FrameType) -> bool:
+    filename = frame.f_code.co_filename
+    return filename.startswith(PROJECT_ROOT) and "site-packages" not in filename
+
+def _describe(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{os.path.relpath(code.co_filename, PROJECT_ROOT)}:{frame.f_lineno} in {code.co_qualname}"
+
+class LoopMonitor:
+    """
+    Детектор блокировок event loop
+
+    Heartbeat задача просыпается каждые interval секунд и отмечает время.
+    Сторожевой поток следит за отметками: если heartbeat опаздывает больше
+    чем на threshold, значит event loop занят синхронной работой, и поток
+    снимает стек потока event loop. По стеку определяется маршрут (обработчик
+    запроса) и кадр кода приложения, в котором идет блокировка.
+    """
+
+    def __init__(self, interval: float, threshold: float):
+        self.interval = interval
+        self.threshold = threshold
+        self.stalls: Deque[LoopStall] = deque(maxlen=100)
+        self._collectors: List[List[LoopStall]] = []
+        self._routes: Dict[CodeType, str] = {}
+        self._loop_thread_id: Optional[int] = None
+        self._expected_beat = 0.0
+        self._pending: Optional[LoopStall] = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+
+    def register_routes(self, app) -> None:
+        """Запоминает обработчики маршрутов приложения для атрибуции блокировок"""
+        for route in app.routes:
+            endpoint = getattr(route, "endpoint", None)
+            code = getattr(endpoint, "__code__", None)
+            if code is None:
+                continue
+            methods = ",".join(sorted(getattr(route, "methods", None) or []))
+            self._routes[code] = f"{methods} {route.path}".strip()
+
+    def start(self, app=None) -> None:
+        """Запускает heartbeat в текущем event loop и сторожевой поток"""
+        if app is not None:
+            self.register_routes(app)
+        self._loop_thread_id = threading.get_ident()
+        self._expected_beat = time.monotonic() + self.interval
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            with self._lock:
+                lag = max(0.0, now - self._expected_beat)
+                self._expected_beat = now + self.interval
+                pending, self._pending = self._pending, None
+            loop_lag.observe(lag)
+            if lag >= self.threshold:
+                self._record(pending or LoopStall(route=UNKNOWN_ROUTE, frame=UNKNOWN_ROUTE), lag)
+
+    def _watch(self) -> None:
+        """Сторожевой поток: снимает стек event loop во время блокировки"""
+        while not self._stopped.wait(min(self.interval, self.threshold) / 2):
+            with self._lock:
+                overdue = time.monotonic() - self._expected_beat
+                if overdue < self.threshold or self._pending is not None:
+                    continue
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is None:
+                    continue
+                self._pending = self._attribute(frame)
+
+    def _attribute(self, frame: FrameType) -> LoopStall:
+        """Определяет маршрут и кадр кода приложения по стеку event loop"""
+        frames = []
+        while frame is not None:
+            frames.append(frame)
+            frame = frame.f_back
+
+        route = None
+        offending = None
+        outermost_project = None
+        for current in frames:
+            if route is None and current.f_code in self._routes:
+                route = self._routes[current.f_code]
+            if _is_project_frame(current):
+                if offending is None:
+                    offending = current
+                outermost_project = current
+
+        if route is None:
+            # Блокировка вне обработчика: фоновая задача или зависимость
+            route = f"task:{outermost_project.f_code.co_qualname}" if outermost_project else UNKNOWN_ROUTE
+
+        return LoopStall(
+            route=route,
+            frame=_describe(offending or frames[0]),
+            stack=traceback.format_list(traceback.extract_stack(frames[0]))
+        )
+
+    def _record(self, stall: LoopStall, duration: float) -> None:
+        stall.duration = duration
+        self.stalls.append(stall)
+        for collected in self._collectors:
+            collected.append(stall)
+        loop_stalls.inc(route=stall.route)
+        loop_stall_duration.observe(duration, route=stall.route)
+        print(
+            f"⚠️  Event loop заблокирован на {duration * 1000:.0f} мс: {stall.route}, {stall.frame}\n"
+            + "".join(stall.stack[-settings.LOOP_MONITOR_STACK_DEPTH:])
+        )
+
+@contextmanager
+def loop_stall_guard(max_block_ms: float, monitor: Optional[LoopMonitor] = None) -> Iterator[LoopMonitor]:
+    """
+    Строгий режим для тестов: падает, если event loop блокировался дольше max_block_ms
+
+    Монитор должен работать в event loop приложения (например, TestClient,
+    запущенный как контекстный менеджер, выполняет lifespan).
+    """
+    monitor = monitor or loop_monitor
+    threshold = monitor.threshold
+    stalls: List[LoopStall] = []
+    monitor.threshold = max_block_ms / 1000
+    monitor._collectors.append(stalls)
+    try:
+        yield monitor
+        # Даем heartbeat обработать последнюю блокировку
+        time.sleep(monitor.interval * 2)
+        if stalls:
+            raise LoopStallError(stalls, monitor.threshold)
+    finally:
+        monitor._collectors.remove(stalls)
+        monitor.threshold = threshold
+
+loop_monitor = LoopMonitor(
+    interval=settings.LOOP_MONITOR_INTERVAL,
+    threshold=settings.LOOP_STALL_THRESHOLD_MS / 1000
+)
@@ -0,0 +1,86 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Callable, Optional, Sequence, Tuple
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, or_
+
+# Курсор следующей страницы отдается в заголовке, чтобы не менять формат ответов
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+def encode_cursor(*values: Any) -> str:
+    """Кодирует ключ последней записи страницы в непрозрачный курсор"""
+    raw = json.dumps([_encode_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple]:
+    """
+    Декодирует курсор, полученный от клиента
+
+    Returns:
+        Ключ последней записи предыдущей страницы или None, если курсора нет
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list):
+            raise ValueError
+        return tuple(_decode_value(value) for value in values)
+    except (ValueError, TypeError, UnicodeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Некорректный курсор пагинации")
+
+def keyset_condition(columns: Sequence, values: Sequence, descending: bool = False):
+    """
+    Условие "строго после ключа" для набора колонок сортировки
+
+    Условие раскрыто в форму (a > x) OR (a = x AND b > y), которую MySQL
+    выполняет как просмотр диапазона составного индекса.
+    """
+    clauses = []
+    for position, column in enumerate(columns):
+        equal = [columns[i] == values[i] for i in range(position)]
+        after = column < values[position] if descending else column > values[position]
+        clauses.append(and_(*equal, after))
+    return or_(*clauses)
+
+def paginate(query, columns: Sequence, skip: int = 0, limit: int = 100,
+             cursor: Optional[Tuple] = None, descending: bool = False):
+    """
+    Страница запроса: по курсору (keyset) или по skip/limit для совместимости
+
+    Args:
+        query: Запрос (Query или Select)
+        columns: Колонки сортировки, последняя - уникальная (обычно id)
+        skip: Смещение, используется только без курсора
+        limit: Размер страницы
+        cursor: Декодированный курсор (ключ последней записи предыдущей страницы)
+        descending: Сортировка по убыванию
+    """
+    if cursor is not None:
+        if len(cursor) != len(columns):
+            raise HTTPException(status_code=400, detail="Некорректный курсор пагинации")
+        query = query.filter(keyset_condition(columns, cursor, descending))
+    order = [column.desc() if descending else column.asc() for column in columns]
+    query = query.order_by(*order)
+    if cursor is None and skip:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+def set_next_cursor(response: Response, items: Sequence, limit: int,
+                    key: Callable[[Any], Tuple]) -> None:
+    """Отдает курсор следующей страницы, если страница заполнена полностью"""
+    if items and len(items) >= limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*key(items[-1]))
@@ -0,0 +1,192 @@
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from config import settings
+from metrics import registry
+
+queries_per_request = registry.histogram(
+    "db_queries_per_request",
+    "Количество SQL запросов на HTTP запрос по маршрутам",
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100, 250)
+)
+query_time_per_request = registry.histogram(
+    "db_query_time_per_request_seconds",
+    "Суммарное время SQL запросов на HTTP запрос по маршрутам"
+)
+repeated_queries = registry.counter(
+    "db_repeated_queries_total",
+    "HTTP запросы с повторяющимися SQL запросами (вероятный N+1) по маршрутам"
+)
+
+# Заголовки ответа с числом запросов к БД (только при QUERY_DEBUG_HEADERS)
+QUERY_COUNT_HEADER = "X-DB-Queries"
+QUERY_TIME_HEADER = "X-DB-Time-Ms"
+REPEATED_QUERIES_HEADER = "X-DB-Repeated-Queries"
+
+UNMATCHED_ROUTE = "unmatched"
+
+# Списки параметров IN (...) разной длины сводятся к одному виду
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:%s|\?|%\(\w+\)s|:\w+)(?:\s*,\s*(?:%s|\?|%\(\w+\)s|:\w+))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_statement(statement: str) -> str:
+    """Текст запроса без различий в параметрах: одинаковые запросы дают одну строку"""
+    return _WHITESPACE.sub(" ", _PLACEHOLDER_LIST.sub("(?)", statement)).strip()
+
+@dataclass
+class QueryStats:
+    """Запросы к БД, выполненные в рамках одного HTTP запроса или блока кода"""
+    count: int = 0
+    duration: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+    parent: Optional["QueryStats"] = None
+
+    def record(self, statement: str, duration: float) -> None:
+        stats = self
+        while stats is not None:
+            stats.count += 1
+            stats.duration += duration
+            stats.statements[statement] += 1
+            stats = stats.parent
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        """Запросы, выполненные не меньше threshold раз (отличаются только параметрами)"""
+        return {statement: count for statement, count in self.statements.items() if count >= threshold}
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+@contextmanager
+def count_queries(nested: bool = True) -> Iterator[QueryStats]:
+    """
+    Подсчет запросов к БД в текущем контексте (задаче asyncio)
+
+    Синхронные CRUD функции выполняются через run_sync в том же контексте,
+    поэтому их запросы тоже учитываются. Запросы вложенного блока учитываются
+    и во внешнем, если nested не выключен.
+    """
+    stats = QueryStats(parent=_current_stats.get() if nested else None)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(normalize_statement(statement), time.perf_counter() - started)
+
+def _handle_error(exception_context):
+    started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+def install_query_counter() -> None:
+    """Подключает подсчет запросов ко всем движкам SQLAlchemy (в том числе асинхронным)"""
+    if event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+
+# Подписчики на статистику завершенных HTTP запросов (проверка бюджета в тестах)
+_collectors: List[List[Tuple[str, QueryStats]]] = []
+
+def _route_path(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+class QueryCounterMiddleware:
+    """
+    Считает запросы к БД и их время для каждого HTTP запроса
+
+    Запросы, которые повторяются не меньше QUERY_REPEAT_THRESHOLD раз и
+    отличаются только параметрами, - признак N+1: такие маршруты попадают
+    в лог и метрику. При QUERY_DEBUG_HEADERS статистика добавляется в
+    заголовки ответа. Для потоковых ответов учитываются запросы до начала ответа.
+    """
+
+    def __init__(self, app, debug_headers: bool = False, repeat_threshold: int = 5):
+        self.app = app
+        self.debug_headers = debug_headers
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # HTTP запрос считается отдельно от блока, в котором его выполнил тест
+        with count_queries(nested=False) as stats:
+            async def send_with_stats(message):
+                if message["type"] == "http.response.start":
+                    repeated = self._report(scope, stats)
+                    if self.debug_headers:
+                        message["headers"] = list(message.get("headers", [])) + [
+                            (QUERY_COUNT_HEADER.lower().encode(), str(stats.count).encode()),
+                            (QUERY_TIME_HEADER.lower().encode(), f"{stats.duration * 1000:.1f}".encode()),
+                            (REPEATED_QUERIES_HEADER.lower().encode(), str(len(repeated)).encode()),
+                        ]
+                await send(message)
+
+            await self.app(scope, receive, send_with_stats)
+
+    def _report(self, scope, stats: QueryStats) -> Dict[str, int]:
+        route = _route_path(scope)
+        queries_per_request.observe(stats.count, route=route)
+        query_time_per_request.observe(stats.duration, route=route)
+        for collected in _collectors:
+            collected.append((f"{scope['method']} {route}", stats))
+        repeated = stats.repeated(self.repeat_threshold)
+        if repeated:
+            repeated_queries.inc(route=route)
+            details = "\n".join(f"  {count} x {statement[:200]}" for statement, count in repeated.items())
+            print(f"⚠️  Повторяющиеся SQL запросы (вероятный N+1): {scope['method']} {route}\n{details}")
+        return repeated
+
+class QueryBudgetError(AssertionError):
+    """Обработчик выполнил больше запросов к БД, чем допускает бюджет"""
+
+    def __init__(self, violations: List[str]):
+        super().__init__("Превышен бюджет запросов к БД:\n" + "\n".join(violations))
+        self.violations = violations
+
+@contextmanager
+def assert_query_budget(max_queries: int, allow_repeated: bool = False,
+                        repeat_threshold: Optional[int] = None) -> Iterator[List[Tuple[str, QueryStats]]]:
+    """
+    Проверка бюджета запросов для тестов
+
+    Учитываются HTTP запросы, завершенные внутри блока (приложение должно
+    быть обернуто QueryCounterMiddleware), и запросы, выполненные прямо в
+    блоке. Каждый HTTP запрос и сам блок должны уложиться в max_queries и
+    без allow_repeated не повторять один запрос repeat_threshold раз.
+    """
+    threshold = repeat_threshold or settings.QUERY_REPEAT_THRESHOLD
+    collected: List[Tuple[str, QueryStats]] = []
+    _collectors.append(collected)
+    try:
+        with count_queries() as stats:
+            yield collected
+    finally:
+        _collectors.remove(collected)
+
+    violations = []
+    for name, request_stats in collected + ([("блок", stats)] if stats.count else []):
+        if request_stats.count > max_queries:
+            violations.append(f"  {name}: {request_stats.count} запросов при бюджете {max_queries}")
+        if not allow_repeated:
+            for statement, count in request_stats.repeated(threshold).items():
+                violations.append(f"  {name}: {count} x {statement[:200]}")
+    if violations:
+        raise QueryBudgetError(violations)
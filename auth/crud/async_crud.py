@@ -0,0 +1,43 @@
+# Асинхронные версии CRUD функций для AsyncSession (см. database.run_async)
+import asyncio
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import run_async, AsyncCRUD
+from auth.models import User
+from auth.schemas import UserCreate
+from auth.utils import get_password_hash, verify_password
+from auth.crud import user_crud
+from auth.crud.role_crud import role_crud as sync_role_crud, role_assignment_crud as sync_role_assignment_crud
+
+get_user = run_async(user_crud.get_user)
+get_user_by_username = run_async(user_crud.get_user_by_username)
+get_user_by_email = run_async(user_crud.get_user_by_email)
+get_users = run_async(user_crud.get_users)
+update_user = run_async(user_crud.update_user)
+delete_user = run_async(user_crud.delete_user)
+get_users_by_role = run_async(user_crud.get_users_by_role)
+
+role_crud = AsyncCRUD(sync_role_crud)
+role_assignment_crud = AsyncCRUD(sync_role_assignment_crud)
+
+# Хеширование bcrypt занимает сотни миллисекунд, поэтому выполняется в потоке
+
+async def create_user(db: AsyncSession, user: UserCreate):
+    hashed_password = await asyncio.to_thread(get_password_hash, user.password)
+    db_user = User(
+        username=user.username,
+        email=user.email,
+        hashed_password=hashed_password,
+        role=user.role
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    user = await get_user_by_username(db, username)
+    if not user:
+        return False
+    if not await asyncio.to_thread(verify_password, password, user.hashed_password):
+        return False
+    return user
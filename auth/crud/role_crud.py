@@ -1,10 +1,26 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from sqlalchemy import and_, func, select
+from sqlalchemy.sql import Select
 from typing import List, Optional
 from auth.models.role_models import Role, RoleAssignment
 from auth.models.user_models import User
 from auth.schemas.role_schemas import RoleCreate, RoleUpdate, RoleAssignmentCreate, RoleAssignmentUpdate
 
+def active_role_assignment_statement(user_id: int, role_id: int) -> Select:
+    """Действующее назначение роли пользователю"""
+    return select(RoleAssignment).where(
+        RoleAssignment.user_id == user_id,
+        RoleAssignment.role_id == role_id,
+        RoleAssignment.is_active == True
+    )
+
+def role_users_count_statement(role_id) -> Select:
+    """Количество пользователей с действующим назначением роли (role_id - значение или колонка)"""
+    return select(func.count(RoleAssignment.id)).where(
+        RoleAssignment.role_id == role_id,
+        RoleAssignment.is_active == True
+    )
+
 class RoleCRUD:
     """CRUD операции для ролей"""
     
@@ -32,17 +48,12 @@ class RoleCRUD:
         return query.offset(skip).limit(limit).all()
     
     def get_roles_with_users_count(self, db: Session, skip: int = 0, limit: int = 100) -> List[dict]:
-        """Получение ролей с количеством пользователей"""
-        # Получаем все роли
-        roles = db.query(Role).offset(skip).limit(limit).all()
+        """Получение ролей с количеством пользователей (один запрос)"""
+        users_count = role_users_count_statement(Role.id).correlate(Role).scalar_subquery()
+        rows = db.query(Role, users_count.label("users_count")).order_by(Role.id).offset(skip).limit(limit).all()
         
-        # Для каждой роли получаем количество пользователей отдельным запросом
         roles_with_count = []
-        for role in roles:
-            users_count = db.query(RoleAssignment).filter(
-                and_(RoleAssignment.role_id == role.id, RoleAssignment.is_active == True)
-            ).count()
-            
+        for role, users_count in rows:
             # Создаем объект с полями роли и users_count
             role_dict = {
                 "id": role.id,
@@ -110,13 +121,9 @@ class RoleAssignmentCRUD:
     def assign_role_to_user(self, db: Session, role_assignment: RoleAssignmentCreate, assigned_by: int) -> RoleAssignment:
         """Назначение роли пользователю"""
         # Проверяем, не назначена ли уже эта роль
-        existing_role = db.query(RoleAssignment).filter(
-            and_(
-                RoleAssignment.user_id == role_assignment.user_id,
-                RoleAssignment.role_id == role_assignment.role_id,
-                RoleAssignment.is_active == True
-            )
-        ).first()
+        existing_role = db.scalars(active_role_assignment_statement(
+            role_assignment.user_id, role_assignment.role_id
+        )).first()
         
         if existing_role:
             raise ValueError("Роль уже назначена пользователю")
@@ -153,27 +160,26 @@ class RoleAssignmentCRUD:
         }
         result.append(base_role)
         
-        # Получаем дополнительные роли из таблицы user_roles
-        additional_roles = db.query(RoleAssignment).filter(RoleAssignment.user_id == user_id)
+        # Получаем дополнительные роли из таблицы user_roles вместе с названиями ролей
+        additional_roles = db.query(RoleAssignment, Role.name).join(
+            Role, Role.id == RoleAssignment.role_id
+        ).filter(RoleAssignment.user_id == user_id)
         if active_only:
             additional_roles = additional_roles.filter(RoleAssignment.is_active == True)
         
-        for role_assignment in additional_roles.all():
-            # Получаем информацию о роли
-            role = db.query(Role).filter(Role.id == role_assignment.role_id).first()
-            if role:
-                additional_role = {
-                    "id": role_assignment.id,
-                    "user_id": role_assignment.user_id,
-                    "role_id": role_assignment.role_id,
-                    "role_name": role.name,
-                    "role_type": "additional",  # Указываем, что это дополнительная роль
-                    "assigned_by": role_assignment.assigned_by,
-                    "assigned_at": role_assignment.assigned_at,
-                    "expires_at": role_assignment.expires_at,
-                    "is_active": role_assignment.is_active
-                }
-                result.append(additional_role)
+        for role_assignment, role_name in additional_roles.all():
+            additional_role = {
+                "id": role_assignment.id,
+                "user_id": role_assignment.user_id,
+                "role_id": role_assignment.role_id,
+                "role_name": role_name,
+                "role_type": "additional",  # Указываем, что это дополнительная роль
+                "assigned_by": role_assignment.assigned_by,
+                "assigned_at": role_assignment.assigned_at,
+                "expires_at": role_assignment.expires_at,
+                "is_active": role_assignment.is_active
+            }
+            result.append(additional_role)
         
         return result
     
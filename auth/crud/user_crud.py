@@ -1,7 +1,11 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
 from auth.models import User, UserRole
 from auth.schemas import UserCreate, UserUpdate
 from auth.utils import get_password_hash, verify_password
+from app.utils.pagination import paginate
+from typing import Optional, Tuple
 
 def get_user(db: Session, user_id: int):
     return db.query(User).filter(User.id == user_id).first()
@@ -12,8 +16,8 @@ def get_user_by_username(db: Session, username: str):
 def get_user_by_email(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(User).offset(skip).limit(limit).all()
+def get_users(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[Tuple] = None):
+    return paginate(db.query(User), (User.id,), skip, limit, cursor).all()
 
 def create_user(db: Session, user: UserCreate):
     hashed_password = get_password_hash(user.password)
@@ -58,5 +62,8 @@ def authenticate_user(db: Session, username: str, password: str):
         return False
     return user
 
+def users_by_role_statement(role: UserRole) -> Select:
+    return select(User).where(User.role == role)
+
 def get_users_by_role(db: Session, role: UserRole):
-    return db.query(User).filter(User.role == role).all()
+    return db.scalars(users_by_role_statement(role)).all()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Index
 from sqlalchemy.sql import func
 from database import Base
 
@@ -29,5 +29,10 @@ class RoleAssignment(Base):
     expires_at = Column(DateTime(timezone=True), nullable=True)  # Когда истекает роль
     is_active = Column(Boolean, default=True)
     
+    __table_args__ = (
+        Index("ix_user_roles_user_id_role_id_is_active", "user_id", "role_id", "is_active"),
+        Index("ix_user_roles_role_id_is_active", "role_id", "is_active"),
+    )
+    
     def __repr__(self):
         return f"<RoleAssignment(user_id={self.user_id}, role_id={self.role_id})>"
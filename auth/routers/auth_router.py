@@ -1,18 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
-from database import get_db
+from database import get_async_db
 from auth.models import User as UserModel, UserRole
 from auth.schemas import UserCreate, UserResponse, Token
-from auth.crud import create_user, authenticate_user
+from auth.crud.async_crud import (
+    create_user, authenticate_user, get_user_by_username, get_user_by_email
+)
 from auth.utils import create_access_token, get_current_active_user
 from config import settings
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
 @router.post("/register", response_model=UserResponse)
-async def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Регистрация нового пользователя
     """
@@ -24,7 +26,7 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Проверяем, существует ли пользователь с таким username
-    db_user = db.query(UserModel).filter(UserModel.username == user.username).first()
+    db_user = await get_user_by_username(db, user.username)
     if db_user:
         raise HTTPException(
             status_code=400, 
@@ -32,24 +34,24 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Проверяем, существует ли пользователь с таким email
-    db_user = db.query(UserModel).filter(UserModel.email == user.email).first()
+    db_user = await get_user_by_email(db, user.email)
     if db_user:
         raise HTTPException(
             status_code=400, 
             detail="Пользователь с таким email уже существует"
         )
     
-    return create_user(db=db, user=user)
+    return await create_user(db=db, user=user)
 
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получение JWT токена для аутентификации
     """
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
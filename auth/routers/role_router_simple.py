@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from database import get_db
+from database import get_async_db
 from auth.utils.admin_auth import get_current_admin_user, check_user_permissions
 from auth.models.user_models import User
 
@@ -23,7 +23,7 @@ async def test_roles_endpoint(
 @router.get("/")
 async def get_roles_basic(
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Базовое получение списка ролей (только для администраторов)
@@ -1,9 +1,9 @@
 from .auth_utils import (
     get_password_hash, verify_password, create_access_token,
-    get_current_user, get_current_active_user
+    get_current_user, get_current_active_user, get_read_db
 )
 
 __all__ = [
     "get_password_hash", "verify_password", "create_access_token",
-    "get_current_user", "get_current_active_user"
+    "get_current_user", "get_current_active_user", "get_read_db"
 ]
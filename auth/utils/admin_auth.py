@@ -1,16 +1,16 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from auth.utils.auth_utils import get_current_user
 from auth.models.user_models import User, UserRole
-from database import get_db
+from database import get_async_db
 from typing import Optional
 
 security = HTTPBearer()
 
 def get_current_admin_user(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """
     Проверяет, что текущий пользователь является администратором
@@ -31,7 +31,7 @@ def get_current_admin_user(
 
 def get_current_super_admin_user(
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """
     Проверяет, что текущий пользователь является супер-администратором
@@ -43,10 +43,10 @@ def get_current_super_admin_user(
     # Пока что просто проверяем, что это администратор
     return current_user
 
-def check_user_permissions(
+async def check_user_permissions(
     target_user_id: int,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> bool:
     """
     Проверяет, может ли текущий администратор управлять целевым пользователем
@@ -59,7 +59,7 @@ def check_user_permissions(
         )
     
     # Получаем целевого пользователя
-    target_user = db.query(User).filter(User.id == target_user_id).first()
+    target_user = await db.get(User, target_user_id)
     if not target_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -75,9 +75,9 @@ def check_user_permissions(
     
     return True
 
-def get_admin_user_with_optional_auth(
+async def get_admin_user_with_optional_auth(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Optional[User]:
     """
     Получает пользователя-администратора, если передан токен, иначе None
@@ -87,7 +87,7 @@ def get_admin_user_with_optional_auth(
         return None
     
     try:
-        current_user = get_current_user(credentials, db)
+        current_user = await get_current_user(credentials.credentials, db)
         if current_user.role == UserRole.ADMIN and current_user.is_active:
             return current_user
     except:
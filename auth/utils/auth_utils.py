@@ -4,8 +4,9 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db, get_read_session
 from auth.models import User
 from auth.schemas import TokenData
 from config import settings
@@ -29,7 +30,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -43,12 +44,25 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    user = db.query(User).filter(User.username == token_data.username).first()
+    result = await db.execute(select(User).where(User.username == token_data.username))
+    user = result.scalar_one_or_none()
     if user is None:
         raise credentials_exception
+    # Записи в этой сессии включают для пользователя чтение с основной БД
+    db.info["user_id"] = user.id
     return user
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
     if not current_user:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
+
+async def get_read_db(current_user: User = Depends(get_current_user)):
+    """
+    Сессия для обработчиков, которые только читают
+
+    Запросы идут на реплику, если она настроена и не отстает, а пользователь
+    недавно ничего не записывал; иначе - в основную БД.
+    """
+    async for db in get_read_session(current_user.id):
+        yield db
@@ -1,16 +1,285 @@
-from sqlalchemy import create_engine
+import asyncio
+import functools
+import time
+from typing import Dict, Optional
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from config import settings
+from metrics import registry
 
-engine = create_engine(settings.DATABASE_URL)
+pool_checkout_wait = registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Ожидание соединения из пула БД",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+pool_checkout_timeouts = registry.counter(
+    "db_pool_checkout_timeouts_total",
+    "Запросы соединения, не дождавшиеся свободного соединения в пуле БД"
+)
+pool_overflow_events = registry.counter(
+    "db_pool_overflow_total",
+    "Соединения, открытые сверх pool_size"
+)
+
+class _InstrumentedPool:
+    """Пул соединений, который публикует время ожидания соединения и переполнения"""
+
+    metrics_name = "default"
+
+    def _do_get(self):
+        overflow = self._overflow
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_checkout_timeouts.inc(pool=self.metrics_name)
+            raise
+        finally:
+            pool_checkout_wait.observe(time.perf_counter() - started, pool=self.metrics_name)
+        if self._overflow > max(overflow, 0):
+            pool_overflow_events.inc(pool=self.metrics_name)
+        return connection
+
+class InstrumentedQueuePool(_InstrumentedPool, QueuePool):
+    metrics_name = "sync"
+
+class InstrumentedAsyncQueuePool(_InstrumentedPool, AsyncAdaptedQueuePool):
+    metrics_name = "async"
+
+class InstrumentedReplicaQueuePool(_InstrumentedPool, AsyncAdaptedQueuePool):
+    metrics_name = "replica"
+
+def _pool_options() -> dict:
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        # MySQL закрывает простаивающие соединения (wait_timeout),
+        # поэтому соединения пересоздаются заранее и проверяются перед выдачей
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+engine = create_engine(settings.DATABASE_URL, poolclass=InstrumentedQueuePool, **_pool_options())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Асинхронный движок для обработчиков запросов: запросы к БД не блокируют event loop.
+# expire_on_commit=False, чтобы объекты можно было сериализовать после commit
+# без повторной загрузки атрибутов
+class PrimarySession(Session):
+    """Сессия основной БД: после записи пользователь временно читает только с нее"""
+
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL, poolclass=InstrumentedAsyncQueuePool, **_pool_options()
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, sync_session_class=PrimarySession,
+    autoflush=False, expire_on_commit=False
+)
+
+# Реплика для обработчиков, которые только читают (если настроена)
+replica_engine: Optional[AsyncEngine] = None
+ReplicaSessionLocal: Optional[async_sessionmaker] = None
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = create_async_engine(
+        settings.DATABASE_REPLICA_URL, poolclass=InstrumentedReplicaQueuePool, **_pool_options()
+    )
+    ReplicaSessionLocal = async_sessionmaker(
+        bind=replica_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
 Base = declarative_base()
 
+_pools = {
+    InstrumentedQueuePool.metrics_name: lambda: engine.pool,
+    InstrumentedAsyncQueuePool.metrics_name: lambda: async_engine.sync_engine.pool,
+}
+if replica_engine is not None:
+    _pools[InstrumentedReplicaQueuePool.metrics_name] = lambda: replica_engine.sync_engine.pool
+
+def _pool_gauge(read):
+    return lambda: {(("pool", name),): float(read(get_pool())) for name, get_pool in _pools.items()}
+
+registry.gauge(
+    "db_pool_in_use", "Соединения пула БД, выданные запросам",
+    callback=_pool_gauge(lambda pool: pool.checkedout())
+)
+registry.gauge(
+    "db_pool_idle", "Свободные соединения в пуле БД",
+    callback=_pool_gauge(lambda pool: pool.checkedin())
+)
+registry.gauge(
+    "db_pool_overflow", "Открытые соединения сверх pool_size",
+    callback=_pool_gauge(lambda pool: max(pool.overflow(), 0))
+)
+registry.gauge(
+    "db_pool_size", "Размер пула БД (без переполнения)",
+    callback=_pool_gauge(lambda pool: pool.size())
+)
+
+replica_lag = registry.gauge(
+    "db_replica_lag_seconds",
+    "Отставание реплики БД (последняя проверка)"
+)
+read_routing = registry.counter(
+    "db_read_routing_total",
+    "Сессии для чтения по выбранной БД (replica или primary) и причине"
+)
+
+class ReplicaRouter:
+    """
+    Выбор БД для обработчиков, которые только читают
+
+    Чтение идет с реплики, пока ее отставание не больше max_lag. Пользователь,
+    который только что записал данные, в течение read_your_writes_window
+    секунд читает с основной БД, чтобы увидеть свои изменения.
+    Отметки о записи хранятся в памяти воркера.
+    """
+
+    def __init__(self, max_lag: float, read_your_writes_window: float):
+        self.max_lag = max_lag
+        self.read_your_writes_window = read_your_writes_window
+        # До первой проверки отставания реплика не используется
+        self.healthy = False
+        self._recent_writers: Dict[int, float] = {}
+
+    def note_write(self, user_id: int) -> None:
+        self._recent_writers[user_id] = time.monotonic() + self.read_your_writes_window
+
+    def choose(self, user_id: Optional[int]) -> str:
+        """Возвращает причину выбора: replica, no_replica, lagging или recent_write"""
+        if ReplicaSessionLocal is None:
+            return "no_replica"
+        if not self.healthy:
+            return "lagging"
+        until = self._recent_writers.get(user_id)
+        if until is not None:
+            if until > time.monotonic():
+                return "recent_write"
+            del self._recent_writers[user_id]
+        return "replica"
+
+    def prune(self) -> None:
+        """Удаляет истекшие отметки о записи"""
+        now = time.monotonic()
+        for user_id, until in list(self._recent_writers.items()):
+            if until <= now:
+                del self._recent_writers[user_id]
+
+    async def check_lag(self) -> Optional[float]:
+        """Проверяет отставание реплики; при ошибке чтение переключается на основную БД"""
+        try:
+            async with replica_engine.connect() as connection:
+                try:
+                    row = (await connection.execute(text("SHOW REPLICA STATUS"))).mappings().first()
+                except Exception:
+                    # MySQL до 8.0.22
+                    row = (await connection.execute(text("SHOW SLAVE STATUS"))).mappings().first()
+        except Exception as e:
+            print(f"Ошибка проверки отставания реплики БД: {e}")
+            self.healthy = False
+            return None
+
+        lag = None
+        if row is not None:
+            lag = row.get("Seconds_Behind_Source", row.get("Seconds_Behind_Master"))
+        # NULL означает, что репликация остановлена
+        self.healthy = lag is not None and lag <= self.max_lag
+        if lag is not None:
+            replica_lag.set(float(lag))
+        return lag
+
+replica_router = ReplicaRouter(
+    max_lag=settings.REPLICA_MAX_LAG,
+    read_your_writes_window=settings.READ_YOUR_WRITES_WINDOW
+)
+
+@event.listens_for(PrimarySession, "after_flush")
+def _mark_write(session, flush_context):
+    session.info["wrote"] = True
+
+@event.listens_for(PrimarySession, "after_commit")
+def _note_write(session):
+    if session.info.pop("wrote", False) and session.info.get("user_id") is not None:
+        replica_router.note_write(session.info["user_id"])
+
+@event.listens_for(PrimarySession, "after_rollback")
+def _reset_write(session):
+    session.info.pop("wrote", None)
+
+async def run_replica_lag_monitor(interval: float) -> None:
+    """Периодически проверяет отставание реплики"""
+    while True:
+        await replica_router.check_lag()
+        replica_router.prune()
+        await asyncio.sleep(interval)
+
+async def warm_up_pool(engine: AsyncEngine, connections: int) -> int:
+    """
+    Открывает соединения пула заранее, чтобы первые запросы после запуска
+    не ждали установки соединений с БД
+
+    Returns:
+        Количество открытых соединений
+    """
+    results = await asyncio.gather(
+        *(engine.connect().start() for _ in range(connections)),
+        return_exceptions=True
+    )
+    opened = [result for result in results if not isinstance(result, BaseException)]
+    for connection in opened:
+        await connection.close()
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        print(f"Ошибка прогрева пула соединений БД: {errors[0]}")
+    return len(opened)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_read_session(user_id: Optional[int] = None):
+    """
+    Сессия для обработчиков, которые только читают: реплика или основная БД
+
+    Используется через зависимость auth.utils.get_read_db, которая передает
+    текущего пользователя для read-your-writes.
+    """
+    reason = replica_router.choose(user_id)
+    read_routing.inc(target="replica" if reason == "replica" else "primary", reason=reason)
+    factory = ReplicaSessionLocal if reason == "replica" else AsyncSessionLocal
+    async with factory() as db:
+        yield db
+
+def run_async(func):
+    """
+    Асинхронная версия синхронной CRUD функции
+
+    Функция выполняется через AsyncSession.run_sync: код CRUD остается
+    прежним, а ввод-вывод идет через асинхронный драйвер и не блокирует
+    event loop. Первый аргумент обертки - AsyncSession.
+    """
+    @functools.wraps(func)
+    async def wrapper(db: AsyncSession, *args, **kwargs):
+        return await db.run_sync(func, *args, **kwargs)
+    return wrapper
+
+class AsyncCRUD:
+    """Асинхронная обертка над объектом с CRUD методами (RoleCRUD и т.п.)"""
+
+    def __init__(self, crud):
+        self._crud = crud
+
+    def __getattr__(self, name):
+        return run_async(getattr(self._crud, name))
@@ -1,16 +1,35 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
-from database import engine, Base
+from database import (
+    engine, async_engine, replica_engine, Base, warm_up_pool, run_replica_lag_monitor
+)
+from migrations import run_migrations
 from auth.routers import auth_router
 from auth.routers.role_router import router as role_router # Добавляю обратно
-from app.routers import users_router
+from app.routers import users_router, metrics_router
 from app.admin import admin_router
 from products.routers import orders_router, executor_router, search_router
 from auth.utils.admin_init import ensure_admin_exists, ensure_basic_roles
+from app.utils import (
+    ClientDisconnected, CLIENT_CLOSED_REQUEST, QueryCounterMiddleware, install_query_counter, loop_monitor
+)
+from products.services.parser_pool import parser_pool
+from products.services.search_cache import (
+    search_cache, load_snapshot, save_snapshot, run_snapshot_loop
+)
+from products.services.saved_search_refresher import run_saved_search_refresh_loop
+from products.services.order_events import order_event_bus, run_order_event_relay
+from products.services.order_leases import run_lease_release_loop
+from products.services.archival import run_archive_loop
+from products.services.executor_productivity import run_productivity_refresh_loop
+from config import settings
 
-# Создаем таблицы в базе данных
+# Создаем таблицы в базе данных и применяем миграции к существующим
 Base.metadata.create_all(bind=engine)
+run_migrations(engine)
 
 # Инициализируем администратора и базовые роли при запуске
 print("🔍 Проверяем наличие администратора в системе...")
@@ -19,14 +38,79 @@ ensure_admin_exists()
 print("🔍 Проверяем наличие базовых ролей в системе...")
 ensure_basic_roles()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Детектор блокировок event loop синхронной работой в обработчиках
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start(app)
+    # Открываем соединения пула заранее, до первых запросов
+    if settings.DB_POOL_WARMUP:
+        opened = await warm_up_pool(async_engine, settings.DB_POOL_SIZE)
+        print(f"Пул соединений БД: открыто соединений: {opened}")
+    # Кэш поиска восстанавливается в фоне и не задерживает готовность
+    cache_path = settings.SEARCH_CACHE_SNAPSHOT_PATH
+    cache_load_task = asyncio.create_task(load_snapshot(search_cache, cache_path))
+    background_tasks = [
+        asyncio.create_task(
+            run_snapshot_loop(
+                search_cache, cache_path, settings.SEARCH_CACHE_SNAPSHOT_INTERVAL,
+                loaded=cache_load_task
+            )
+        ),
+        asyncio.create_task(
+            run_saved_search_refresh_loop(settings.SAVED_SEARCH_REFRESH_CHECK_INTERVAL)
+        ),
+        # События заказов из всех воркеров раздаются подписчикам SSE этого воркера
+        asyncio.create_task(
+            run_order_event_relay(order_event_bus, settings.ORDER_EVENTS_POLL_INTERVAL)
+        ),
+        # Заказы с истекшей арендой исполнителя возвращаются в очередь
+        asyncio.create_task(run_lease_release_loop(settings.ORDER_LEASE_RELEASE_INTERVAL)),
+        # Сводка продуктивности исполнителей для администраторов
+        asyncio.create_task(run_productivity_refresh_loop(settings.EXECUTOR_STATS_REFRESH_INTERVAL)),
+    ]
+    if settings.ARCHIVE_ENABLED:
+        background_tasks.append(asyncio.create_task(run_archive_loop(settings.ARCHIVE_INTERVAL)))
+    # Проверка отставания реплики: пока она не пройдена, чтение идет с основной БД
+    if replica_engine is not None:
+        background_tasks.append(
+            asyncio.create_task(run_replica_lag_monitor(settings.REPLICA_LAG_CHECK_INTERVAL))
+        )
+    yield
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    # Сохраняем кэш поиска перед остановкой, если он успел восстановиться:
+    # иначе неполный кэш перезаписал бы предыдущий снимок
+    if cache_load_task.done():
+        await save_snapshot(search_cache, cache_path)
+    else:
+        cache_load_task.cancel()
+    # Останавливаем пул парсинга результатов поиска
+    parser_pool.shutdown()
+    await loop_monitor.stop()
+    await async_engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+
 app = FastAPI(
     title="FastAPI Auth System", 
     version="1.0.0",
     description="Система аутентификации с JWT токенами, управлением пользователями и заказами",
     docs_url=None,  # Отключаем стандартную документацию
-    redoc_url=None  # Отключаем стандартную документацию
+    redoc_url=None,  # Отключаем стандартную документацию
+    lifespan=lifespan
 )
 
+# Подсчет запросов к БД на каждый HTTP запрос (поиск N+1)
+if settings.QUERY_COUNTER_ENABLED:
+    install_query_counter()
+    app.add_middleware(
+        QueryCounterMiddleware,
+        debug_headers=settings.QUERY_DEBUG_HEADERS,
+        repeat_threshold=settings.QUERY_REPEAT_THRESHOLD
+    )
+
 # Подключаем роутеры
 app.include_router(auth_router)
 app.include_router(users_router)
@@ -35,6 +119,12 @@ app.include_router(orders_router)
 app.include_router(executor_router)
 app.include_router(search_router)
 app.include_router(role_router)
+app.include_router(metrics_router)
+
+@app.exception_handler(ClientDisconnected)
+async def client_disconnected_handler(request: Request, exc: ClientDisconnected):
+    # Клиент уже не получит ответ, работа по запросу отменена
+    return Response(status_code=CLIENT_CLOSED_REQUEST)
 
 @app.get("/")
 async def root():
@@ -0,0 +1,17 @@
+"""
+Версионные миграции схемы БД
+
+Новые таблицы создает Base.metadata.create_all, а миграции изменяют уже
+существующие: добавляют индексы, колонки и т.п. Каждая миграция - модуль
+migrations/versions/NNNN_описание.py с функцией upgrade(connection).
+Примененные версии хранятся в таблице schema_migrations. Так как на новой
+БД create_all уже создает все по моделям, миграции должны быть идемпотентными.
+
+Запуск вручную: python -m migrations
+"""
+
+from .runner import (
+    run_migrations, create_index_if_missing, add_column_if_missing
+)
+
+__all__ = ["run_migrations", "create_index_if_missing", "add_column_if_missing"]
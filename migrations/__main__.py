@@ -0,0 +1,8 @@
+from database import engine, Base
+from migrations import run_migrations
+import auth.models  # noqa: F401 - регистрация моделей в Base.metadata
+import products.models  # noqa: F401
+
+Base.metadata.create_all(bind=engine)
+applied = run_migrations(engine)
+print(f"Применено миграций: {len(applied)}")
@@ -0,0 +1,134 @@
+"""
+Проверка планов частых запросов через EXPLAIN
+
+Для каждого запроса из products/crud и auth/crud проверяется, что MySQL
+выбирает рассчитанный на него индекс (колонка key плана). Планы зависят от
+объема данных, поэтому проверку стоит запускать на БД с реальными данными:
+на таблице меньше SMALL_TABLE_ROWS строк полный просмотр дешевле индекса,
+и такой план не считается ошибкой (печатается как SMALL).
+
+Запуск: python -m migrations.explain (код возврата 1, если индекс не используется)
+"""
+
+import sys
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+from sqlalchemy import select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import Select
+from auth.crud.role_crud import active_role_assignment_statement, role_users_count_statement
+from auth.crud.user_crud import users_by_role_statement
+from auth.models import UserRole
+from products.crud.executor_stats_crud import purchases_since_statement
+from products.crud.product_crud import (
+    expired_leases_statement, order_events_after_statement, order_search_statement,
+    order_summaries_by_status_statement, user_order_summaries_statement
+)
+from products.crud.search_crud import user_search_history_statement
+from products.models import Order, OrderStatus
+
+# Таблицы меньше этого размера оптимизатор вправе читать полным просмотром
+SMALL_TABLE_ROWS = 1000
+
+# Название запроса, построитель запроса, индекс, который он должен использовать.
+# Запросы строятся теми же построителями *_statement, что и в CRUD-функциях
+HOT_QUERIES: List[Tuple[str, Callable[[], Select], str]] = [
+    (
+        "product_crud.get_user_order_summaries",
+        lambda: user_order_summaries_statement(1),
+        "ix_orders_customer_id_created_at",
+    ),
+    (
+        "product_crud.get_order_summaries_by_status",
+        lambda: order_summaries_by_status_statement(OrderStatus.PENDING),
+        "ix_orders_status_created_at",
+    ),
+    (
+        "product_crud.get_changed_order_summaries",
+        lambda: order_events_after_statement(1),
+        "PRIMARY",
+    ),
+    (
+        "product_crud.release_expired_leases",
+        lambda: expired_leases_statement(datetime(2024, 1, 1)),
+        "ix_orders_status_lease_expires_at",
+    ),
+    (
+        "Order.products (selectin)",
+        lambda: selectin_statement(Order.products, [1, 2, 3]),
+        "ix_products_order_id_is_purchased",
+    ),
+    (
+        "executor_stats_crud.get_purchases_since",
+        lambda: purchases_since_statement(datetime(2024, 1, 1)),
+        "ix_products_purchased_at_purchased_by",
+    ),
+    (
+        "product_crud.search_orders",
+        # Проверка запускается на MySQL: слово ищется по FULLTEXT индексу продуктов
+        lambda: order_search_statement("mysql", ["корм"]),
+        "ft_products_name_notes",
+    ),
+    (
+        "search_crud.get_user_search_history",
+        lambda: user_search_history_statement(1),
+        "ix_search_history_user_id_search_timestamp",
+    ),
+    (
+        "role_crud.assign_role_to_user",
+        lambda: active_role_assignment_statement(1, 1),
+        "ix_user_roles_user_id_role_id_is_active",
+    ),
+    (
+        "role_crud.get_roles_with_users_count",
+        lambda: role_users_count_statement(1),
+        "ix_user_roles_role_id_is_active",
+    ),
+    (
+        "user_crud.get_users_by_role",
+        lambda: users_by_role_statement(UserRole.EXECUTOR),
+        "ix_users_role",
+    ),
+]
+
+def selectin_statement(relationship, ids: List[int]) -> Select:
+    """Запрос, которым ORM загружает relationship с lazy="selectin" для объектов ids"""
+    (_, foreign_key), = relationship.property.local_remote_pairs
+    return select(relationship.property.mapper.class_).where(foreign_key.in_(ids))
+
+def explain(connection: Connection, statement: Select) -> List[Dict]:
+    """Возвращает строки EXPLAIN для запроса"""
+    sql = statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True})
+    return [dict(row) for row in connection.execute(text(f"EXPLAIN {sql}")).mappings()]
+
+def check_hot_queries(connection: Connection) -> bool:
+    """
+    Проверяет планы всех частых запросов
+
+    Returns:
+        True, если каждый запрос выполняется по своему индексу (или по
+        полному просмотру маленькой таблицы)
+    """
+    all_ok = True
+    for name, build, index in HOT_QUERIES:
+        # В плане запроса с подзапросом несколько строк: индекс должна выбрать одна из них
+        plan = explain(connection, build())
+        scans = [row for row in plan if row.get("type") == "ALL"]
+        if any(row.get("key") == index for row in plan):
+            verdict = "OK   "
+        elif scans and all((row.get("rows") or 0) < SMALL_TABLE_ROWS for row in scans):
+            verdict = "SMALL"
+        else:
+            verdict = "FAIL "
+            all_ok = False
+        steps = "; ".join(
+            f"{row.get('table')}: key={row.get('key')}, type={row.get('type')}, rows={row.get('rows')}"
+            for row in plan
+        )
+        print(f"{verdict} {name}: ожидается {index}, {steps}")
+    return all_ok
+
+if __name__ == "__main__":
+    from database import engine
+    with engine.connect() as connection:
+        sys.exit(0 if check_hot_queries(connection) else 1)
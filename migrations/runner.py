@@ -0,0 +1,80 @@
+import importlib
+import pkgutil
+from contextlib import contextmanager
+from typing import Iterator, List
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.sql import func
+
+_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", String(100), primary_key=True),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+# Время ожидания блокировки миграций, пока их применяет другой воркер
+LOCK_TIMEOUT = 300
+
+def _discover_versions() -> List[str]:
+    from migrations import versions
+    return sorted(module.name for module in pkgutil.iter_modules(versions.__path__))
+
+@contextmanager
+def _migration_lock(engine: Engine) -> Iterator[None]:
+    """Не дает нескольким воркерам применять миграции одновременно (MySQL GET_LOCK)"""
+    if engine.dialect.name != "mysql":
+        yield
+        return
+    with engine.connect() as connection:
+        acquired = connection.execute(
+            text("SELECT GET_LOCK('schema_migrations', :timeout)"), {"timeout": LOCK_TIMEOUT}
+        ).scalar()
+        if acquired != 1:
+            raise RuntimeError("Не удалось получить блокировку для применения миграций")
+        try:
+            yield
+        finally:
+            connection.execute(text("SELECT RELEASE_LOCK('schema_migrations')"))
+
+def run_migrations(engine: Engine) -> List[str]:
+    """
+    Применяет миграции, которые еще не применены
+
+    Returns:
+        Список примененных версий
+    """
+    applied = []
+    with _migration_lock(engine):
+        _metadata.create_all(bind=engine)
+        with engine.connect() as connection:
+            done = set(connection.execute(select(schema_migrations.c.version)).scalars())
+
+        for version in _discover_versions():
+            if version in done:
+                continue
+            module = importlib.import_module(f"migrations.versions.{version}")
+            with engine.begin() as connection:
+                module.upgrade(connection)
+                connection.execute(schema_migrations.insert().values(version=version))
+            print(f"✅ Применена миграция {version}")
+            applied.append(version)
+    return applied
+
+def create_index_if_missing(connection: Connection, table: str, name: str, *columns: str,
+                            unique: bool = False) -> bool:
+    """Создает индекс, если индекса с таким именем еще нет"""
+    if name in {index["name"] for index in inspect(connection).get_indexes(table)}:
+        return False
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    connection.execute(text(f"CREATE {kind} {name} ON {table} ({', '.join(columns)})"))
+    return True
+
+def add_column_if_missing(connection: Connection, table: str, name: str, definition: str) -> bool:
+    """Добавляет колонку, если ее еще нет (definition - SQL тип и ограничения)"""
+    if name in {column["name"] for column in inspect(connection).get_columns(table)}:
+        return False
+    connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {definition}"))
+    return True
@@ -0,0 +1,24 @@
+"""
+Составные индексы под частые запросы
+
+Ленты заказов фильтруются по статусу или заказчику и сортируются по дате,
+продукты выбираются по заказу (и признаку покупки), история поиска - по
+пользователю с сортировкой по времени, роли - по пользователю и роли.
+"""
+
+from migrations.runner import create_index_if_missing
+
+INDEXES = [
+    ("orders", "ix_orders_status_created_at", ("status", "created_at")),
+    ("orders", "ix_orders_customer_id_created_at", ("customer_id", "created_at")),
+    ("products", "ix_products_order_id_is_purchased", ("order_id", "is_purchased")),
+    ("products", "ix_products_purchased_by", ("purchased_by",)),
+    ("search_history", "ix_search_history_user_id_search_timestamp", ("user_id", "search_timestamp")),
+    ("user_roles", "ix_user_roles_user_id_role_id_is_active", ("user_id", "role_id", "is_active")),
+    ("user_roles", "ix_user_roles_role_id_is_active", ("role_id", "is_active")),
+    ("users", "ix_users_role", ("role",)),
+]
+
+def upgrade(connection):
+    for table, name, columns in INDEXES:
+        create_index_if_missing(connection, table, name, *columns)
@@ -0,0 +1,23 @@
+"""
+Счетчики продуктов в заказе
+
+Сводка и проверка завершения заказа читают total_products и
+purchased_products из строки заказа вместо загрузки всех продуктов.
+Существующие заказы заполняются по таблице продуктов.
+"""
+
+from sqlalchemy import text
+from migrations.runner import add_column_if_missing
+
+BACKFILL = """
+UPDATE orders SET
+    total_products = (SELECT COUNT(*) FROM products WHERE products.order_id = orders.id),
+    purchased_products = (
+        SELECT COUNT(*) FROM products WHERE products.order_id = orders.id AND products.is_purchased = 1
+    )
+"""
+
+def upgrade(connection):
+    add_column_if_missing(connection, "orders", "total_products", "INTEGER NOT NULL DEFAULT 0")
+    add_column_if_missing(connection, "orders", "purchased_products", "INTEGER NOT NULL DEFAULT 0")
+    connection.execute(text(BACKFILL))
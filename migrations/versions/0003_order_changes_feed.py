@@ -0,0 +1,14 @@
+"""
+Лента изменений заказов
+
+Исполнители читают заказы, измененные после позиции (updated_at, id).
+У старых заказов updated_at не заполнен до первого изменения - заполняем
+датой создания.
+"""
+
+from sqlalchemy import text
+from migrations.runner import create_index_if_missing
+
+def upgrade(connection):
+    connection.execute(text("UPDATE orders SET updated_at = created_at WHERE updated_at IS NULL"))
+    create_index_if_missing(connection, "orders", "ix_orders_updated_at_id", "updated_at", "id")
@@ -0,0 +1,14 @@
+"""
+Внешний идентификатор заказа
+
+При массовой загрузке заказов клиент передает свой идентификатор заказа:
+по нему находятся id созданных заказов и отсекаются повторные отправки.
+"""
+
+from migrations.runner import add_column_if_missing, create_index_if_missing
+
+def upgrade(connection):
+    add_column_if_missing(connection, "orders", "external_ref", "VARCHAR(100) NULL")
+    create_index_if_missing(
+        connection, "orders", "uq_orders_customer_id_external_ref", "customer_id", "external_ref", unique=True
+    )
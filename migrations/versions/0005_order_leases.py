@@ -0,0 +1,14 @@
+"""
+Аренда заказов исполнителями
+
+Исполнитель захватывает заказ на время аренды; фоновая задача возвращает
+в очередь заказы с истекшей арендой.
+"""
+
+from migrations.runner import add_column_if_missing, create_index_if_missing
+
+def upgrade(connection):
+    add_column_if_missing(connection, "orders", "assignee_id", "INTEGER NULL")
+    add_column_if_missing(connection, "orders", "lease_expires_at", "DATETIME NULL")
+    create_index_if_missing(connection, "orders", "ix_orders_status_lease_expires_at", "status", "lease_expires_at")
+    create_index_if_missing(connection, "orders", "ix_orders_assignee_id", "assignee_id")
@@ -0,0 +1,15 @@
+"""
+Полнотекстовый поиск заказов по продуктам
+
+FULLTEXT индекс по названию и заметкам продуктов есть только в MySQL;
+на остальных БД поиск идет через LIKE и индекс не нужен.
+"""
+
+from sqlalchemy import inspect, text
+
+def upgrade(connection):
+    if connection.dialect.name != "mysql":
+        return
+    if "ft_products_name_notes" in {index["name"] for index in inspect(connection).get_indexes("products")}:
+        return
+    connection.execute(text("CREATE FULLTEXT INDEX ft_products_name_notes ON products (name, notes)"))
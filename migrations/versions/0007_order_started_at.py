@@ -0,0 +1,13 @@
+"""
+Время начала исполнения заказа
+
+Нужно для длительности от создания до начала исполнения в аналитике.
+У заказов, начатых до миграции, время начала неизвестно и остается пустым.
+Колонка добавляется и в архив: архивация копирует колонки заказа по именам.
+"""
+
+from migrations.runner import add_column_if_missing
+
+def upgrade(connection):
+    add_column_if_missing(connection, "orders", "started_at", "DATETIME NULL")
+    add_column_if_missing(connection, "orders_archive", "started_at", "DATETIME NULL")
@@ -0,0 +1,13 @@
+"""
+Индекс покупок по времени
+
+Фоновый пересчет сводки продуктивности исполнителей выбирает покупки
+за последние дни по purchased_at, не просматривая всю таблицу products.
+"""
+
+from migrations.runner import create_index_if_missing
+
+def upgrade(connection):
+    create_index_if_missing(
+        connection, "products", "ix_products_purchased_at_purchased_by", "purchased_at", "purchased_by"
+    )
@@ -0,0 +1,17 @@
+"""
+Значение по умолчанию для orders.updated_at
+
+Миграция 0003 заполнила updated_at у существующих заказов, но не добавила
+колонке DEFAULT CURRENT_TIMESTAMP (create_all не меняет существующие таблицы).
+Заказы, созданные после нее без updated_at, не попадали в ленту изменений
+и архивацию: заполняем их датой создания и добавляем значение по умолчанию (MySQL).
+"""
+
+from sqlalchemy import text
+
+def upgrade(connection):
+    connection.execute(text("UPDATE orders SET updated_at = created_at WHERE updated_at IS NULL"))
+    if connection.dialect.name == "mysql":
+        connection.execute(text(
+            "ALTER TABLE orders MODIFY updated_at DATETIME NULL DEFAULT CURRENT_TIMESTAMP"
+        ))
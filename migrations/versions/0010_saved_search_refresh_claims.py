@@ -0,0 +1,12 @@
+"""
+Время захвата сохраненного поиска на обновление
+
+Захват больше не сдвигает last_refreshed_at (его сдвигает только успешное
+обновление), поэтому для захвата, брошенного остановившимся воркером,
+нужно отдельное время.
+"""
+
+from migrations.runner import add_column_if_missing
+
+def upgrade(connection):
+    add_column_if_missing(connection, "saved_searches", "refresh_claimed_at", "DATETIME NULL")
@@ -0,0 +1 @@
+# Миграции применяются в порядке имен модулей: NNNN_описание.py
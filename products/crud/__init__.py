@@ -1,17 +1,51 @@
 from .product_crud import (
-    create_order, get_order, get_user_orders, get_all_orders,
+    create_order, create_orders_bulk, get_order, get_user_orders, get_all_orders,
     get_orders_by_status, update_order_status, update_product_purchase_status,
-    get_product, check_order_completion, get_order_summary
+    get_product, check_order_completion, get_order_summary, recompute_order_counters,
+    get_user_order_summaries, get_order_summaries_by_status, get_active_order_summaries,
+    get_order_changes_position, get_changed_order_summaries,
+    get_orders_by_ids, update_products_purchase_bulk,
+    claim_orders, claim_order, renew_order_lease, release_order, release_expired_leases,
+    search_orders, ORDER_TRANSITIONS, transition_sources, transition_order_status,
+    transition_orders_status, complete_order_if_purchased, cancel_customer_order
 )
 from .search_crud import (
     create_search_record, get_user_search_history, get_search_statistics,
     delete_search_record, clear_user_search_history
 )
+from .saved_search_crud import (
+    create_saved_search, get_saved_search_by_query, count_user_saved_searches,
+    get_user_saved_searches, delete_saved_search, get_saved_search_changes,
+    claim_due_saved_searches, save_refresh_results, release_saved_searches
+)
+from .archive_crud import (
+    archive_orders_batch, archive_search_history_batch, get_archived_orders, get_archived_order,
+    maintain_archive_partitions
+)
+from .order_stats_crud import record_order_transition, get_order_stats, get_order_latency_histograms
+from .executor_stats_crud import get_purchases_since, replace_executor_productivity, get_executor_productivity
+from .order_event_crud import (
+    record_order_event, record_order_events, get_last_order_event_id, get_order_events_after, delete_order_events_before
+)
 
 __all__ = [
-    "create_order", "get_order", "get_user_orders", "get_all_orders",
+    "create_order", "create_orders_bulk", "get_order", "get_user_orders", "get_all_orders",
     "get_orders_by_status", "update_order_status", "update_product_purchase_status",
-    "get_product", "check_order_completion", "get_order_summary",
+    "get_product", "check_order_completion", "get_order_summary", "recompute_order_counters",
+    "get_user_order_summaries", "get_order_summaries_by_status", "get_active_order_summaries",
+    "get_order_changes_position", "get_changed_order_summaries",
+    "get_orders_by_ids", "update_products_purchase_bulk",
+    "claim_orders", "claim_order", "renew_order_lease", "release_order", "release_expired_leases",
+    "search_orders", "ORDER_TRANSITIONS", "transition_sources", "transition_order_status",
+    "transition_orders_status", "complete_order_if_purchased", "cancel_customer_order",
     "create_search_record", "get_user_search_history", "get_search_statistics",
-    "delete_search_record", "clear_user_search_history"
+    "delete_search_record", "clear_user_search_history",
+    "create_saved_search", "get_saved_search_by_query", "count_user_saved_searches",
+    "get_user_saved_searches", "delete_saved_search", "get_saved_search_changes",
+    "claim_due_saved_searches", "save_refresh_results", "release_saved_searches",
+    "archive_orders_batch", "archive_search_history_batch", "get_archived_orders", "get_archived_order",
+    "maintain_archive_partitions",
+    "record_order_transition", "get_order_stats", "get_order_latency_histograms",
+    "get_purchases_since", "replace_executor_productivity", "get_executor_productivity",
+    "record_order_event", "record_order_events", "get_last_order_event_id", "get_order_events_after", "delete_order_events_before"
 ]
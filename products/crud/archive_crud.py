@@ -0,0 +1,172 @@
+from sqlalchemy import DateTime, insert, literal, select, text
+from sqlalchemy.orm import Session
+from products.models import (
+    Order, OrderStatus, Product, SearchHistory, ArchivedOrder, ArchivedProduct, ArchivedSearchHistory
+)
+from app.utils.pagination import paginate
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+# Заказы в этих статусах больше не меняются и переносятся в архив
+ARCHIVABLE_STATUSES = (OrderStatus.COMPLETED, OrderStatus.CANCELLED)
+
+# Архивные таблицы, которые можно разбить на помесячные секции
+ARCHIVE_TABLES = (
+    ArchivedOrder.__tablename__, ArchivedProduct.__tablename__, ArchivedSearchHistory.__tablename__
+)
+
+def _copy_columns(archive_model, model) -> Tuple[List, List]:
+    """Колонки архивной таблицы и соответствующие им колонки рабочей таблицы"""
+    names = [column.name for column in model.__table__.columns]
+    return [archive_model.__table__.c[name] for name in names], [model.__table__.c[name] for name in names]
+
+def _archive_rows(db: Session, archive_model, model, condition, archived_at: datetime) -> None:
+    """INSERT ... SELECT строк рабочей таблицы в архивную"""
+    target, source = _copy_columns(archive_model, model)
+    db.execute(insert(archive_model).from_select(
+        target + [archive_model.__table__.c.archived_at],
+        select(*source, literal(archived_at, DateTime)).where(condition)
+    ))
+
+def archive_orders_batch(db: Session, before: datetime, limit: int) -> int:
+    """
+    Перенос в архив одной пачки завершенных и отмененных заказов с продуктами
+    
+    Заказы, последний раз менявшиеся раньше before, копируются в архивные
+    таблицы и удаляются из рабочих одной транзакцией.
+    
+    Returns:
+        Количество перенесенных заказов
+    """
+    order_ids = [
+        row.id for row in db.query(Order.id).filter(
+            Order.updated_at < before,
+            Order.status.in_(ARCHIVABLE_STATUSES)
+        ).order_by(Order.updated_at, Order.id).limit(limit).with_for_update().all()
+    ]
+    if not order_ids:
+        db.rollback()
+        return 0
+    
+    archived_at = datetime.utcnow().replace(microsecond=0)
+    _archive_rows(db, ArchivedOrder, Order, Order.id.in_(order_ids), archived_at)
+    _archive_rows(db, ArchivedProduct, Product, Product.order_id.in_(order_ids), archived_at)
+    db.query(Product).filter(Product.order_id.in_(order_ids)).delete(synchronize_session=False)
+    db.query(Order).filter(Order.id.in_(order_ids)).delete(synchronize_session=False)
+    db.commit()
+    return len(order_ids)
+
+def archive_search_history_batch(db: Session, before: datetime, limit: int) -> int:
+    """
+    Перенос в архив одной пачки записей истории поиска старше before
+    
+    Returns:
+        Количество перенесенных записей
+    """
+    record_ids = [
+        row.id for row in db.query(SearchHistory.id).filter(
+            SearchHistory.search_timestamp < before
+        ).order_by(SearchHistory.id).limit(limit).with_for_update().all()
+    ]
+    if not record_ids:
+        db.rollback()
+        return 0
+    
+    archived_at = datetime.utcnow().replace(microsecond=0)
+    _archive_rows(db, ArchivedSearchHistory, SearchHistory, SearchHistory.id.in_(record_ids), archived_at)
+    db.query(SearchHistory).filter(SearchHistory.id.in_(record_ids)).delete(synchronize_session=False)
+    db.commit()
+    return len(record_ids)
+
+def get_archived_orders(db: Session, customer_id: Optional[int] = None, skip: int = 0, limit: int = 100,
+                        cursor: Optional[Tuple] = None):
+    """Архивные заказы с продуктами (заказчика или все)"""
+    query = db.query(ArchivedOrder)
+    if customer_id is not None:
+        query = query.filter(ArchivedOrder.customer_id == customer_id)
+    return paginate(
+        query, (ArchivedOrder.created_at, ArchivedOrder.id), skip=skip, limit=limit, cursor=cursor
+    ).all()
+
+def get_archived_order(db: Session, order_id: int):
+    """Архивный заказ с продуктами"""
+    return db.query(ArchivedOrder).filter(ArchivedOrder.id == order_id).first()
+
+def month_partitions(start: date, months: int) -> List[Tuple[str, date]]:
+    """
+    Помесячные секции начиная с месяца start
+    
+    Returns:
+        Список (имя секции pYYYYMM, первый день следующего месяца - граница секции)
+    """
+    partitions = []
+    year, month = start.year, start.month
+    for _ in range(months):
+        name = f"p{year:04d}{month:02d}"
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        partitions.append((name, date(year, month, 1)))
+    return partitions
+
+def _partition_bound(name: str) -> date:
+    """Граница секции pYYYYMM: первый день следующего месяца"""
+    return month_partitions(date(int(name[1:5]), int(name[5:7]), 1), 1)[0][1]
+
+def _partition_clause(name: str, bound: date) -> str:
+    return f"PARTITION {name} VALUES LESS THAN (TO_DAYS('{bound.isoformat()}'))"
+
+def get_archive_partitions(db: Session, table: str) -> List[str]:
+    """Имена секций архивной таблицы (MySQL), пустой список - таблица не секционирована"""
+    rows = db.execute(text(
+        "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_NAME IS NOT NULL "
+        "ORDER BY PARTITION_ORDINAL_POSITION"
+    ), {"table": table}).scalars().all()
+    return list(rows)
+
+def maintain_archive_partitions(db: Session, today: date, months_ahead: int,
+                                drop_before: Optional[date] = None) -> Dict[str, List[str]]:
+    """
+    Помесячное секционирование архивных таблиц по archived_at (только MySQL)
+    
+    Несекционированная таблица разбивается на секции с текущего месяца,
+    у секционированной добавляются секции на months_ahead месяцев вперед
+    (секция pmax делится). Секции, целиком лежащие раньше drop_before,
+    удаляются - это удаление старого архива без построчного DELETE.
+    
+    Returns:
+        Для каждой таблицы - список выполненных изменений
+    """
+    if db.get_bind().dialect.name != "mysql":
+        return {}
+    
+    planned = month_partitions(date(today.year, today.month, 1), months_ahead + 1)
+    changes: Dict[str, List[str]] = {}
+    for table in ARCHIVE_TABLES:
+        existing = get_archive_partitions(db, table)
+        statements = []
+        if not existing:
+            clauses = [_partition_clause(name, bound) for name, bound in planned]
+            statements.append(
+                f"ALTER TABLE {table} PARTITION BY RANGE (TO_DAYS(archived_at)) "
+                f"({', '.join(clauses)}, PARTITION pmax VALUES LESS THAN MAXVALUE)"
+            )
+        else:
+            monthly = [partition for partition in existing if partition != "pmax"]
+            last = max(monthly, default="")
+            missing = [(name, bound) for name, bound in planned if name > last]
+            if missing:
+                clauses = [_partition_clause(name, bound) for name, bound in missing]
+                statements.append(
+                    f"ALTER TABLE {table} REORGANIZE PARTITION pmax INTO "
+                    f"({', '.join(clauses)}, PARTITION pmax VALUES LESS THAN MAXVALUE)"
+                )
+            if drop_before is not None:
+                expired = [partition for partition in monthly if _partition_bound(partition) <= drop_before]
+                if expired:
+                    statements.append(f"ALTER TABLE {table} DROP PARTITION {', '.join(expired)}")
+        for statement in statements:
+            db.execute(text(statement))
+        if statements:
+            changes[table] = statements
+    db.commit()
+    return changes
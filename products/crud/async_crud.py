@@ -0,0 +1,75 @@
+# Асинхронные версии CRUD функций для AsyncSession (см. database.run_async)
+from database import run_async
+from products.crud import (
+    product_crud, search_crud, saved_search_crud, order_event_crud, archive_crud, order_stats_crud,
+    executor_stats_crud
+)
+
+# Заказы и продукты
+create_order = run_async(product_crud.create_order)
+create_orders_bulk = run_async(product_crud.create_orders_bulk)
+get_order = run_async(product_crud.get_order)
+get_user_orders = run_async(product_crud.get_user_orders)
+get_all_orders = run_async(product_crud.get_all_orders)
+get_orders_by_status = run_async(product_crud.get_orders_by_status)
+update_order_status = run_async(product_crud.update_order_status)
+transition_order_status = run_async(product_crud.transition_order_status)
+complete_order_if_purchased = run_async(product_crud.complete_order_if_purchased)
+cancel_customer_order = run_async(product_crud.cancel_customer_order)
+get_product = run_async(product_crud.get_product)
+update_product_purchase_status = run_async(product_crud.update_product_purchase_status)
+update_products_purchase_bulk = run_async(product_crud.update_products_purchase_bulk)
+get_orders_by_ids = run_async(product_crud.get_orders_by_ids)
+claim_orders = run_async(product_crud.claim_orders)
+claim_order = run_async(product_crud.claim_order)
+renew_order_lease = run_async(product_crud.renew_order_lease)
+release_order = run_async(product_crud.release_order)
+release_expired_leases = run_async(product_crud.release_expired_leases)
+search_orders = run_async(product_crud.search_orders)
+check_order_completion = run_async(product_crud.check_order_completion)
+get_order_summary = run_async(product_crud.get_order_summary)
+recompute_order_counters = run_async(product_crud.recompute_order_counters)
+get_user_order_summaries = run_async(product_crud.get_user_order_summaries)
+get_order_summaries_by_status = run_async(product_crud.get_order_summaries_by_status)
+get_active_order_summaries = run_async(product_crud.get_active_order_summaries)
+get_order_changes_position = run_async(product_crud.get_order_changes_position)
+get_changed_order_summaries = run_async(product_crud.get_changed_order_summaries)
+
+# История поиска
+create_search_record = run_async(search_crud.create_search_record)
+get_user_search_history = run_async(search_crud.get_user_search_history)
+get_search_statistics = run_async(search_crud.get_search_statistics)
+delete_search_record = run_async(search_crud.delete_search_record)
+clear_user_search_history = run_async(search_crud.clear_user_search_history)
+
+# Сохраненные поиски
+create_saved_search = run_async(saved_search_crud.create_saved_search)
+get_saved_search_by_query = run_async(saved_search_crud.get_saved_search_by_query)
+count_user_saved_searches = run_async(saved_search_crud.count_user_saved_searches)
+get_user_saved_searches = run_async(saved_search_crud.get_user_saved_searches)
+delete_saved_search = run_async(saved_search_crud.delete_saved_search)
+get_saved_search_changes = run_async(saved_search_crud.get_saved_search_changes)
+claim_due_saved_searches = run_async(saved_search_crud.claim_due_saved_searches)
+save_refresh_results = run_async(saved_search_crud.save_refresh_results)
+release_saved_searches = run_async(saved_search_crud.release_saved_searches)
+
+# События заказов
+get_last_order_event_id = run_async(order_event_crud.get_last_order_event_id)
+get_order_events_after = run_async(order_event_crud.get_order_events_after)
+delete_order_events_before = run_async(order_event_crud.delete_order_events_before)
+
+# Архив заказов и истории поиска
+archive_orders_batch = run_async(archive_crud.archive_orders_batch)
+archive_search_history_batch = run_async(archive_crud.archive_search_history_batch)
+get_archived_orders = run_async(archive_crud.get_archived_orders)
+get_archived_order = run_async(archive_crud.get_archived_order)
+maintain_archive_partitions = run_async(archive_crud.maintain_archive_partitions)
+
+# Аналитика заказов
+get_order_stats = run_async(order_stats_crud.get_order_stats)
+get_order_latency_histograms = run_async(order_stats_crud.get_order_latency_histograms)
+
+# Продуктивность исполнителей
+get_purchases_since = run_async(executor_stats_crud.get_purchases_since)
+replace_executor_productivity = run_async(executor_stats_crud.replace_executor_productivity)
+get_executor_productivity = run_async(executor_stats_crud.get_executor_productivity)
@@ -0,0 +1,46 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import case, insert, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+from auth.models import User
+from products.models import Order, OrderStatus, Product, ExecutorProductivity
+
+def purchases_since_statement(since: datetime) -> Select:
+    """Покупки исполнителей начиная с since (по индексу ix_products_purchased_at_purchased_by)"""
+    return select(
+        Product.purchased_by, Product.purchased_at, Product.order_id,
+        case((Order.status == OrderStatus.COMPLETED, Order.completed_at)).label("completed_at")
+    ).join(Order, Order.id == Product.order_id).where(
+        Product.purchased_at >= since,
+        Product.purchased_by.isnot(None),
+        Product.is_purchased.is_(True)
+    )
+
+def get_purchases_since(db: Session, since: datetime):
+    """
+    Покупки исполнителей начиная с since: (purchased_by, purchased_at, order_id, completed_at)
+
+    completed_at пуст, если заказ не завершен.
+    """
+    return db.execute(purchases_since_statement(since)).all()
+
+def replace_executor_productivity(db: Session, rows: List[Dict], refreshed_at: datetime) -> int:
+    """Заменяет сводку продуктивности новой в одной транзакции"""
+    db.query(ExecutorProductivity).delete(synchronize_session=False)
+    if rows:
+        db.execute(insert(ExecutorProductivity), [{**row, "refreshed_at": refreshed_at} for row in rows])
+    db.commit()
+    return len(rows)
+
+def get_executor_productivity(db: Session, window_days: int, executor_id: Optional[int] = None,
+                              skip: int = 0, limit: int = 100):
+    """Сводка за окно window_days, самые продуктивные исполнители первыми"""
+    query = db.query(ExecutorProductivity, User.username).outerjoin(
+        User, User.id == ExecutorProductivity.executor_id
+    ).filter(ExecutorProductivity.window_days == window_days)
+    if executor_id is not None:
+        query = query.filter(ExecutorProductivity.executor_id == executor_id)
+    return query.order_by(
+        ExecutorProductivity.items_purchased.desc(), ExecutorProductivity.executor_id
+    ).offset(skip).limit(limit).all()
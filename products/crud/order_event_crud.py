@@ -0,0 +1,78 @@
+import json
+from sqlalchemy import insert, or_
+from sqlalchemy.orm import Session
+from products.models import OrderEvent
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Типы событий заказа
+ORDER_CREATED = "order_created"
+ORDER_STATUS_CHANGED = "status_changed"
+PRODUCT_PURCHASE_CHANGED = "product_purchase_changed"
+
+def _event_row(order_id: int, customer_id: int, event_type: str, payload: Dict) -> Dict:
+    return {
+        "order_id": order_id,
+        "customer_id": customer_id,
+        "event_type": event_type,
+        "payload": json.dumps(payload, ensure_ascii=False, default=str)
+    }
+
+def record_order_event(db: Session, order_id: int, customer_id: int, event_type: str, **payload):
+    """Добавляет событие в текущую транзакцию (commit выполняет вызывающий код)"""
+    db.add(OrderEvent(**_event_row(order_id, customer_id, event_type, payload)))
+
+def record_order_events(db: Session, events: List[Tuple[int, int, str, Dict]]):
+    """
+    Массовая запись событий одним INSERT в текущей транзакции
+    
+    Каждое событие: (order_id, customer_id, event_type, payload)
+    """
+    if events:
+        db.execute(insert(OrderEvent), [_event_row(*event) for event in events])
+
+def _event_dict(event: OrderEvent) -> Dict:
+    return {
+        "id": event.id,
+        "order_id": event.order_id,
+        "customer_id": event.customer_id,
+        "event_type": event.event_type,
+        "created_at": event.created_at,
+        **json.loads(event.payload)
+    }
+
+def get_last_order_event_id(db: Session) -> int:
+    """Id последнего события (0, если событий нет)"""
+    last = db.query(OrderEvent.id).order_by(OrderEvent.id.desc()).first()
+    return last.id if last else 0
+
+def get_order_events_after(db: Session, after_id: int, limit: int = 500,
+                           customer_id: Optional[int] = None,
+                           order_ids: Optional[List[int]] = None,
+                           extra_ids: Iterable[int] = ()) -> List[Dict]:
+    """
+    События с id больше after_id по возрастанию id
+    
+    Args:
+        customer_id: Только события заказов этого заказчика
+        order_ids: Только события этих заказов
+        extra_ids: Дополнительно перечитать события с этими id (пропуски в нумерации)
+    """
+    extra_ids = list(extra_ids)
+    condition = OrderEvent.id > after_id
+    if extra_ids:
+        condition = or_(condition, OrderEvent.id.in_(extra_ids))
+    query = db.query(OrderEvent).filter(condition)
+    if customer_id is not None:
+        query = query.filter(OrderEvent.customer_id == customer_id)
+    if order_ids:
+        query = query.filter(OrderEvent.order_id.in_(order_ids))
+    return [_event_dict(event) for event in query.order_by(OrderEvent.id).limit(limit).all()]
+
+def delete_order_events_before(db: Session, before: datetime) -> int:
+    """Удаление событий старше before"""
+    deleted_count = db.query(OrderEvent).filter(OrderEvent.created_at < before).delete(
+        synchronize_session=False
+    )
+    db.commit()
+    return deleted_count
@@ -1,15 +1,71 @@
+import uuid
+from sqlalchemy import and_, func, insert, or_, select, update
+from sqlalchemy.dialects.mysql import match
 from sqlalchemy.orm import Session
-from products.models import Product, Order, OrderStatus
-from products.schemas import ProductCreate, OrderCreate, ProductPurchase
-from datetime import datetime
+from sqlalchemy.sql import Select
+from products.models import Product, Order, OrderStatus, OrderEvent
+from products.schemas import ProductCreate, OrderCreate, ProductPurchase, BulkOrderItem
+from products.crud.order_event_crud import (
+    record_order_event, record_order_events, ORDER_CREATED, ORDER_STATUS_CHANGED, PRODUCT_PURCHASE_CHANGED
+)
+from products.crud.order_stats_crud import (
+    record_order_transition, ORDERS_CREATED, ORDERS_STARTED, ORDERS_COMPLETED, ORDERS_CANCELLED
+)
+from app.utils.pagination import paginate
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Колонки сводки по заказу: сводка читается без загрузки продуктов
+SUMMARY_COLUMNS = (
+    Order.id, Order.customer_id, Order.status, Order.created_at, Order.updated_at,
+    Order.total_products, Order.purchased_products
+)
+
+# Заказы, которые исполнители видят в ленте
+ACTIVE_STATUSES = (OrderStatus.PENDING, OrderStatus.IN_PROGRESS)
+
+# Допустимые переходы статусов заказа: текущий статус -> статусы, в которые можно перейти.
+# Завершенные и отмененные заказы больше не меняются
+ORDER_TRANSITIONS: Dict[OrderStatus, Tuple[OrderStatus, ...]] = {
+    OrderStatus.PENDING: (OrderStatus.IN_PROGRESS, OrderStatus.COMPLETED, OrderStatus.CANCELLED),
+    OrderStatus.IN_PROGRESS: (OrderStatus.PENDING, OrderStatus.COMPLETED, OrderStatus.CANCELLED),
+    OrderStatus.COMPLETED: (),
+    OrderStatus.CANCELLED: (),
+}
+
+# Счетчики аналитики для переходов в статус
+_STATUS_TRANSITION_STATS = {
+    OrderStatus.IN_PROGRESS: ORDERS_STARTED,
+    OrderStatus.COMPLETED: ORDERS_COMPLETED,
+    OrderStatus.CANCELLED: ORDERS_CANCELLED
+}
+
+# Минимальная длина слова в FULLTEXT индексе InnoDB (innodb_ft_min_token_size);
+# более короткие слова ищутся через LIKE
+FULLTEXT_MIN_TOKEN = 3
+
+def _summary(row) -> dict:
+    return {
+        "id": row.id,
+        "customer_id": row.customer_id,
+        "status": row.status,
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+        "total_products": row.total_products,
+        "purchased_products": row.purchased_products,
+        "is_completable": row.total_products > 0 and row.total_products == row.purchased_products
+    }
 
 # CRUD операции для заказов
 def create_order(db: Session, order: OrderCreate, customer_id: int):
-    """Создание нового заказа"""
-    db_order = Order(customer_id=customer_id)
+    """Создание нового заказа вместе с продуктами одной транзакцией"""
+    # updated_at задается явно: на БД, обновленных миграциями, у колонки может не быть DEFAULT
+    db_order = Order(
+        customer_id=customer_id, total_products=len(order.products), purchased_products=0,
+        updated_at=func.now()
+    )
     db.add(db_order)
-    db.commit()
-    db.refresh(db_order)
+    db.flush()
     
     # Создаем продукты для заказа
     for product_data in order.products:
@@ -21,91 +77,727 @@ def create_order(db: Session, order: OrderCreate, customer_id: int):
         )
         db.add(db_product)
     
+    record_order_event(db, db_order.id, customer_id, ORDER_CREATED, status=OrderStatus.PENDING.value)
+    record_order_transition(db, ORDERS_CREATED, count=1)
     db.commit()
     db.refresh(db_order)
     return db_order
 
+def create_orders_bulk(db: Session, customer_id: int,
+                       items: List[Tuple[int, BulkOrderItem]]) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Массовое создание заказов одной транзакцией
+    
+    Заказы, продукты и события вставляются многострочными INSERT. MySQL не
+    возвращает id вставленных строк, поэтому id заказов находятся по
+    external_ref (если клиент его не передал, он генерируется). Заказ с уже
+    существующим external_ref не создается повторно и возвращается как дубликат.
+    
+    Args:
+        items: Пары (номер строки, заказ)
+    
+    Returns:
+        Созданные заказы и ошибки по строкам
+    """
+    created, errors, pending = [], [], []
+    seen = set()
+    for row, item in items:
+        ref = item.external_ref or uuid.uuid4().hex
+        if not item.products:
+            errors.append({"row": row, "external_ref": item.external_ref,
+                           "detail": "Заказ должен содержать хотя бы один продукт"})
+        elif len(ref) > 100:
+            errors.append({"row": row, "external_ref": item.external_ref,
+                           "detail": "external_ref длиннее 100 символов"})
+        elif ref in seen:
+            errors.append({"row": row, "external_ref": ref, "detail": "Повтор external_ref в загрузке"})
+        else:
+            seen.add(ref)
+            pending.append((row, ref, item))
+    if not pending:
+        return created, errors
+    
+    def find_ids(refs: List[str]) -> Dict[str, int]:
+        return dict(db.query(Order.external_ref, Order.id).filter(
+            Order.customer_id == customer_id, Order.external_ref.in_(refs)
+        ).all())
+    
+    existing = find_ids([ref for _, ref, _ in pending])
+    new = [(row, ref, item) for row, ref, item in pending if ref not in existing]
+    created.extend(
+        {"row": row, "order_id": existing[ref], "external_ref": ref, "duplicate": True}
+        for row, ref, _ in pending if ref in existing
+    )
+    
+    if new:
+        db.execute(insert(Order).values(updated_at=func.now()), [
+            {
+                "customer_id": customer_id,
+                "external_ref": ref,
+                "status": OrderStatus.PENDING,
+                "total_products": len(item.products),
+                "purchased_products": 0
+            }
+            for _, ref, item in new
+        ])
+        ids = find_ids([ref for _, ref, _ in new])
+        db.execute(insert(Product), [
+            {
+                "order_id": ids[ref],
+                "name": product.name,
+                "quantity": product.quantity,
+                "notes": product.notes,
+                "is_purchased": False
+            }
+            for _, ref, item in new for product in item.products
+        ])
+        record_order_events(db, [
+            (ids[ref], customer_id, ORDER_CREATED, {"status": OrderStatus.PENDING.value})
+            for _, ref, _ in new
+        ])
+        record_order_transition(db, ORDERS_CREATED, count=len(new))
+        created.extend(
+            {"row": row, "order_id": ids[ref], "external_ref": ref, "duplicate": False}
+            for row, ref, _ in new
+        )
+    
+    db.commit()
+    created.sort(key=lambda result: result["row"])
+    return created, errors
+
 def get_order(db: Session, order_id: int):
     """Получение заказа по ID"""
     return db.query(Order).filter(Order.id == order_id).first()
 
-def get_user_orders(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    """Получение заказов пользователя"""
-    return db.query(Order).filter(Order.customer_id == user_id).offset(skip).limit(limit).all()
+def get_user_orders(db: Session, user_id: int, skip: int = 0, limit: int = 100,
+                    cursor: Optional[Tuple] = None):
+    """Получение заказов пользователя (по курсору (created_at, id) или skip/limit)"""
+    query = db.query(Order).filter(Order.customer_id == user_id)
+    return paginate(query, (Order.created_at, Order.id), skip, limit, cursor).all()
 
-def get_all_orders(db: Session, skip: int = 0, limit: int = 100):
+def get_all_orders(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[Tuple] = None):
     """Получение всех заказов (для исполнителей)"""
-    return db.query(Order).offset(skip).limit(limit).all()
+    return paginate(db.query(Order), (Order.created_at, Order.id), skip, limit, cursor).all()
 
-def get_orders_by_status(db: Session, status: OrderStatus, skip: int = 0, limit: int = 100):
-    """Получение заказов по статусу"""
-    return db.query(Order).filter(Order.status == status).offset(skip).limit(limit).all()
+def get_orders_by_status(db: Session, status: OrderStatus, skip: int = 0, limit: int = 100,
+                         cursor: Optional[Tuple] = None):
+    """Получение заказов по статусу (по курсору (created_at, id) или skip/limit)"""
+    query = db.query(Order).filter(Order.status == status)
+    return paginate(query, (Order.created_at, Order.id), skip, limit, cursor).all()
 
-def update_order_status(db: Session, order_id: int, status: OrderStatus):
-    """Обновление статуса заказа"""
-    db_order = get_order(db, order_id)
-    if not db_order:
-        return None
-    
-    db_order.status = status
+def transition_sources(status: OrderStatus) -> Tuple[OrderStatus, ...]:
+    """Статусы, из которых по ORDER_TRANSITIONS можно перейти в status"""
+    return tuple(source for source, targets in ORDER_TRANSITIONS.items() if status in targets)
+
+def _transition_time() -> datetime:
+    # Микросекунды отбрасываются: DATETIME без дробной части хранит секунды
+    return datetime.utcnow().replace(microsecond=0)
+
+def _transition_values(status: OrderStatus, now: datetime, values: Optional[Dict] = None) -> Dict:
+    """Колонки, которые меняются при переходе в status"""
+    changes = {Order.status: status, **(values or {})}
+    if status == OrderStatus.PENDING:
+        # Заказ вернулся в очередь: исполнителя и аренды больше нет
+        changes[Order.assignee_id] = None
+        changes[Order.lease_expires_at] = None
+    if status == OrderStatus.IN_PROGRESS:
+        changes[Order.started_at] = func.coalesce(Order.started_at, now)
     if status == OrderStatus.COMPLETED:
-        db_order.completed_at = datetime.utcnow()
+        changes[Order.completed_at] = now
+    if status in (OrderStatus.COMPLETED, OrderStatus.CANCELLED):
+        # Аренда завершенного заказа больше не нужна, исполнитель сохраняется
+        changes[Order.lease_expires_at] = None
+    return changes
+
+def _record_transitions(db: Session, orders, status: OrderStatus, now: datetime,
+                        event_data: Optional[Dict] = None, started_ids: Iterable[int] = ()) -> None:
+    """
+    События смены статуса и счетчики аналитики для заказов, перешедших в status
+    
+    Args:
+        started_ids: Заказы, у которых до перехода в IN_PROGRESS не было started_at;
+            повторный захват (после истечения аренды или возврата в очередь) не
+            считается началом исполнения
+    """
+    record_order_events(db, [
+        (order.id, order.customer_id, ORDER_STATUS_CHANGED, {"status": status.value, **(event_data or {})})
+        for order in orders
+    ])
+    transition = _STATUS_TRANSITION_STATS.get(status)
+    if transition is None:
+        return
+    if status == OrderStatus.IN_PROGRESS:
+        started_ids = set(started_ids)
+        orders = [order for order in orders if order.id in started_ids]
+    record_order_transition(db, transition, created_at=[order.created_at for order in orders], at=now)
+
+def transition_order_status(db: Session, order_id: int, status: OrderStatus, *conditions,
+                            values: Optional[Dict] = None, event_data: Optional[Dict] = None):
+    """
+    Смена статуса заказа одним условным UPDATE (compare-and-set)
+    
+    UPDATE orders SET status=... WHERE id=... AND status IN (допустимые по
+    ORDER_TRANSITIONS) AND <conditions>: проверка и запись выполняются
+    атомарно, и из одновременных переходов одного заказа выполняется только
+    один. Изменилась ли строка, определяется по rowcount.
+    
+    Args:
+        conditions: Дополнительные условия на строку заказа
+        values: Дополнительные колонки для записи
+        event_data: Дополнительные поля события смены статуса
     
+    Returns:
+        Заказ или None, если заказа нет, переход из его статуса недопустим
+        или условия не выполнены (причину определяет вызывающий код)
+    """
+    now = _transition_time()
+    target = db.query(Order).filter(Order.id == order_id, Order.status.in_(transition_sources(status)), *conditions)
+    changes = _transition_values(status, now, values)
+    started_ids = []
+    changed = 0
+    if status == OrderStatus.IN_PROGRESS:
+        # Первое начало исполнения отделяется условием на started_at в том же UPDATE
+        changed = target.filter(Order.started_at.is_(None)).update(changes, synchronize_session=False)
+        if changed:
+            started_ids = [order_id]
+    if not changed:
+        changed = target.update(changes, synchronize_session=False)
+    if not changed:
+        # Менять нечего; commit вместо rollback не сбрасывает загруженные
+        # в сессию объекты (пользователь, продукт), которые нужны вызывающему коду
+        db.commit()
+        return None
+    
+    db_order = db.query(Order).filter(Order.id == order_id).execution_options(populate_existing=True).first()
+    _record_transitions(db, [db_order], status, now, event_data, started_ids)
     db.commit()
-    db.refresh(db_order)
     return db_order
 
+def transition_orders_status(db: Session, order_ids: List[int], status: OrderStatus, *conditions,
+                             values: Optional[Dict] = None, event_data: Optional[Dict] = None) -> List:
+    """
+    Смена статуса нескольких заказов в текущей транзакции (commit выполняет вызывающий код)
+    
+    Заказы, для которых переход допустим по ORDER_TRANSITIONS и выполнены
+    conditions, блокируются SELECT ... FOR UPDATE и меняются одним UPDATE:
+    без RETURNING (MySQL) иначе не узнать, какие из строк изменились.
+    
+    Returns:
+        Перешедшие заказы (id, customer_id, created_at, started_at) по возрастанию id
+    """
+    if not order_ids:
+        return []
+    now = _transition_time()
+    locked = db.query(Order.id, Order.started_at).filter(
+        Order.id.in_(order_ids), Order.status.in_(transition_sources(status)), *conditions
+    ).with_for_update().all()
+    ids = [row.id for row in locked]
+    if not ids:
+        return []
+    
+    db.query(Order).filter(Order.id.in_(ids)).update(
+        _transition_values(status, now, values), synchronize_session=False
+    )
+    changed = db.query(Order.id, Order.customer_id, Order.created_at, Order.started_at).filter(
+        Order.id.in_(ids)
+    ).order_by(Order.id).all()
+    started_ids = [row.id for row in locked if row.started_at is None]
+    _record_transitions(db, changed, status, now, event_data, started_ids)
+    return changed
+
+def update_order_status(db: Session, order_id: int, status: OrderStatus):
+    """
+    Обновление статуса заказа по таблице переходов ORDER_TRANSITIONS
+    
+    Returns:
+        Заказ или None, если заказа нет или переход недопустим
+    """
+    return transition_order_status(db, order_id, status)
+
+def _not_leased_by_other(executor_id: int, now: datetime):
+    """Заказ не в работе у другого исполнителя с действующей арендой"""
+    return or_(
+        Order.status != OrderStatus.IN_PROGRESS,
+        Order.assignee_id.is_(None),
+        Order.assignee_id == executor_id,
+        Order.lease_expires_at.is_(None),
+        Order.lease_expires_at <= now
+    )
+
+def complete_order_if_purchased(db: Session, order_id: int, executor_id: Optional[int] = None):
+    """
+    Завершение активного заказа, в котором куплены все продукты
+    
+    Args:
+        executor_id: Исполнитель; заказ, взятый в работу другим исполнителем
+            с действующей арендой, не завершается (None - без проверки)
+    
+    Returns:
+        Заказ или None, если заказ не найден, не активен, не все продукты
+        куплены или заказ в работе у другого исполнителя
+    """
+    conditions = [Order.total_products > 0, Order.total_products == Order.purchased_products]
+    if executor_id is not None:
+        conditions.append(_not_leased_by_other(executor_id, datetime.utcnow()))
+    return transition_order_status(db, order_id, OrderStatus.COMPLETED, *conditions)
+
+def cancel_customer_order(db: Session, order_id: int, customer_id: int):
+    """
+    Отмена активного заказа заказчиком
+    
+    Returns:
+        Заказ или None, если заказ не найден, чужой или уже не активен
+    """
+    return transition_order_status(db, order_id, OrderStatus.CANCELLED, Order.customer_id == customer_id)
+
 # CRUD операции для продуктов
 def get_product(db: Session, product_id: int):
     """Получение продукта по ID"""
     return db.query(Product).filter(Product.id == product_id).first()
 
 def update_product_purchase_status(db: Session, product_id: int, purchase_data: ProductPurchase, executor_id: int):
-    """Обновление статуса покупки продукта"""
+    """
+    Обновление статуса покупки продукта
+    
+    Признак меняется условным UPDATE по прежнему значению, поэтому при
+    одновременных отметках одного продукта счетчик заказа меняется один раз.
+    Повторная отметка в том же состоянии ничего не меняет.
+    """
     db_product = get_product(db, product_id)
     if not db_product:
         return None
     
-    db_product.is_purchased = purchase_data.is_purchased
-    if purchase_data.is_purchased:
-        db_product.purchased_at = datetime.utcnow()
-        db_product.purchased_by = executor_id
-    else:
-        db_product.purchased_at = None
-        db_product.purchased_by = None
+    is_purchased = purchase_data.is_purchased
+    previous_state = Product.is_purchased.isnot(True) if is_purchased else Product.is_purchased == True
+    changed = db.query(Product).filter(Product.id == product_id, previous_state).update({
+        Product.is_purchased: is_purchased,
+        Product.purchased_at: datetime.utcnow() if is_purchased else None,
+        Product.purchased_by: executor_id if is_purchased else None
+    })
+    if changed:
+        db.query(Order).filter(Order.id == db_product.order_id).update({
+            Order.purchased_products: Order.purchased_products + (1 if is_purchased else -1)
+        })
+        record_order_event(
+            db, db_product.order_id, db_product.order.customer_id, PRODUCT_PURCHASE_CHANGED,
+            product_id=product_id, is_purchased=is_purchased
+        )
     
     db.commit()
     db.refresh(db_product)
     return db_product
 
 def check_order_completion(db: Session, order_id: int):
-    """Проверка, можно ли отметить заказ как исполненный"""
-    order = get_order(db, order_id)
-    if not order:
+    """Проверка, можно ли отметить заказ как исполненный (по счетчикам заказа)"""
+    counters = db.query(Order.total_products, Order.purchased_products).filter(Order.id == order_id).first()
+    if not counters:
         return False
     
     # Проверяем, все ли продукты куплены
-    total_products = len(order.products)
-    purchased_products = sum(1 for product in order.products if product.is_purchased)
-    
-    return total_products > 0 and total_products == purchased_products
+    return counters.total_products > 0 and counters.total_products == counters.purchased_products
 
 def get_order_summary(db: Session, order_id: int):
-    """Получение сводки по заказу"""
-    order = get_order(db, order_id)
+    """Получение сводки по заказу (одна строка таблицы заказов)"""
+    order = db.query(*SUMMARY_COLUMNS).filter(Order.id == order_id).first()
     if not order:
         return None
+    return _summary(order)
+
+# Построители запросов *_statement используются и CRUD-функциями, и проверкой
+# планов migrations/explain.py, поэтому проверяется именно выполняемый запрос
+
+def user_order_summaries_statement(user_id: int, skip: int = 0, limit: int = 100,
+                                   cursor: Optional[Tuple] = None) -> Select:
+    """Страница сводок по заказам пользователя"""
+    statement = select(*SUMMARY_COLUMNS).where(Order.customer_id == user_id)
+    return paginate(statement, (Order.created_at, Order.id), skip, limit, cursor)
+
+def order_summaries_by_status_statement(status: OrderStatus, skip: int = 0, limit: int = 100,
+                                        cursor: Optional[Tuple] = None) -> Select:
+    """Страница сводок по заказам с указанным статусом"""
+    statement = select(*SUMMARY_COLUMNS).where(Order.status == status)
+    return paginate(statement, (Order.created_at, Order.id), skip, limit, cursor)
+
+def get_user_order_summaries(db: Session, user_id: int, skip: int = 0, limit: int = 100,
+                             cursor: Optional[Tuple] = None):
+    """Сводки по заказам пользователя одним запросом"""
+    return [_summary(row) for row in db.execute(user_order_summaries_statement(user_id, skip, limit, cursor))]
+
+def get_order_summaries_by_status(db: Session, status: OrderStatus, skip: int = 0, limit: int = 100,
+                                  cursor: Optional[Tuple] = None):
+    """Сводки по заказам с указанным статусом одним запросом"""
+    return [_summary(row) for row in db.execute(order_summaries_by_status_statement(status, skip, limit, cursor))]
+
+def get_active_order_summaries(db: Session, skip: int = 0, limit: int = 100,
+                               cursor: Optional[Tuple] = None):
+    """Лента исполнителей: ожидающие и исполняемые заказы одним запросом"""
+    query = db.query(*SUMMARY_COLUMNS).filter(Order.status.in_(ACTIVE_STATUSES))
+    return [_summary(row) for row in paginate(query, (Order.created_at, Order.id), skip, limit, cursor).all()]
+
+def get_order_changes_position(db: Session, gap_timeout: float = 5) -> int:
+    """
+    Позиция ленты изменений заказов: id события order_events
     
-    total_products = len(order.products)
-    purchased_products = sum(1 for product in order.products if product.is_purchased)
-    is_completable = check_order_completion(db, order_id)
+    Берется id последнего события старше gap_timeout секунд: события с
+    меньшими id, транзакции которых еще не закоммичены, попадут в ленту
+    при следующем опросе (0 - читать с начала).
+    """
+    settled = datetime.utcnow() - timedelta(seconds=gap_timeout)
+    latest = db.query(OrderEvent.id).filter(OrderEvent.created_at <= settled).order_by(
+        OrderEvent.id.desc()
+    ).first()
+    return latest.id if latest else 0
+
+def order_events_after_statement(after: int, limit: int = 100) -> Select:
+    """События заказов после позиции after в порядке id"""
+    return select(OrderEvent.id, OrderEvent.order_id, OrderEvent.created_at).where(
+        OrderEvent.id > after
+    ).order_by(OrderEvent.id).limit(limit)
+
+def get_changed_order_summaries(db: Session, after: int, limit: int = 100,
+                                gap_timeout: float = 5) -> Tuple[List[Dict], int]:
+    """
+    Сводки заказов, измененных после позиции after, в порядке изменения
     
-    return {
-        "id": order.id,
-        "customer_id": order.customer_id,
-        "status": order.status,
-        "created_at": order.created_at,
-        "total_products": total_products,
-        "purchased_products": purchased_products,
-        "is_completable": is_completable
-    }
+    Лента строится по событиям заказов: каждое изменение заказа пишет событие
+    в той же транзакции, а id событий растут монотонно, поэтому изменения в
+    одну секунду и повторные изменения одного заказа не теряются. Пропуск в
+    id - событие еще не закоммиченной (или откаченной) транзакции: позиция не
+    сдвигается за пропуск, пока событие после него моложе gap_timeout секунд.
+    
+    Возвращаются заказы в любом статусе, чтобы клиент мог убрать из ленты
+    завершенные и отмененные. Заказ может прийти повторно - клиент заменяет
+    его сводку.
+    
+    Returns:
+        Сводки заказов и новая позиция
+    """
+    events = db.execute(order_events_after_statement(after, limit)).all()
+    
+    settled = datetime.utcnow() - timedelta(seconds=gap_timeout)
+    position = after
+    last_change: Dict[int, int] = {}
+    for event in events:
+        created_at = event.created_at.replace(tzinfo=None) if event.created_at else None
+        if event.id != position + 1 and (created_at is None or created_at > settled):
+            break
+        position = event.id
+        last_change[event.order_id] = event.id
+    if not last_change:
+        return [], position
+    
+    rows = db.query(*SUMMARY_COLUMNS).filter(Order.id.in_(list(last_change))).all()
+    summaries = sorted((_summary(row) for row in rows), key=lambda summary: last_change[summary["id"]])
+    return summaries, position
+
+def _recount_orders(db: Session, order_ids: Optional[List[int]] = None) -> int:
+    """Пересчитывает счетчики заказов одним UPDATE в текущей транзакции"""
+    total = select(func.count(Product.id)).where(
+        Product.order_id == Order.id
+    ).correlate(Order).scalar_subquery()
+    purchased = select(func.count(Product.id)).where(
+        Product.order_id == Order.id, Product.is_purchased == True
+    ).correlate(Order).scalar_subquery()
+    
+    statement = update(Order).where(
+        or_(Order.total_products != total, Order.purchased_products != purchased)
+    ).values(total_products=total, purchased_products=purchased).execution_options(
+        synchronize_session=False
+    )
+    if order_ids is not None:
+        statement = statement.where(Order.id.in_(order_ids))
+    return db.execute(statement).rowcount
+
+def recompute_order_counters(db: Session, order_ids: Optional[List[int]] = None) -> int:
+    """
+    Пересчет счетчиков продуктов заказов по таблице продуктов
+    
+    Обновляются только заказы, у которых счетчики разошлись с продуктами.
+    
+    Args:
+        order_ids: Заказы для пересчета (по умолчанию все)
+    
+    Returns:
+        Количество исправленных заказов
+    """
+    repaired = _recount_orders(db, order_ids)
+    db.commit()
+    return repaired
+
+def get_orders_by_ids(db: Session, order_ids: List[int]):
+    """Заказы с продуктами по списку id (объекты сессии перечитываются из БД)"""
+    return db.query(Order).filter(Order.id.in_(order_ids)).order_by(Order.id).execution_options(
+        populate_existing=True
+    ).all()
+
+def update_products_purchase_bulk(db: Session, items: Dict[int, bool], executor_id: int,
+                                  check_leases: bool = True) -> Dict:
+    """
+    Массовая отметка покупки продуктов одной транзакцией
+    
+    Продукты и их заказы блокируются одним SELECT ... FOR UPDATE, изменения
+    применяются одним UPDATE ... WHERE id IN на каждое состояние, затем
+    счетчики затронутых заказов пересчитываются одним UPDATE и полностью
+    купленные заказы завершаются.
+    
+    Args:
+        items: id продукта -> признак покупки
+        check_leases: Отклонять продукты заказов, взятых в работу другим
+            исполнителем с действующей арендой (выключается для администраторов)
+    
+    Returns:
+        Словарь order_ids (затронутые заказы), missing (не найденные продукты),
+        inactive (продукты неактивных заказов) и leased (продукты заказов
+        другого исполнителя). Если любой из списков не пуст, ничего не изменяется.
+    """
+    now = datetime.utcnow()
+    rows = db.query(
+        Product.id, Product.order_id, Product.is_purchased, Order.status, Order.customer_id,
+        _not_leased_by_other(executor_id, now).label("available")
+    ).join(Order, Product.order_id == Order.id).filter(
+        Product.id.in_(list(items))
+    ).with_for_update().all()
+    
+    found = {row.id: row for row in rows}
+    missing = sorted(set(items) - set(found))
+    inactive = sorted(row.id for row in rows if row.status not in ACTIVE_STATUSES)
+    leased = sorted(row.id for row in rows if check_leases and not row.available)
+    order_ids = sorted({row.order_id for row in rows})
+    if missing or inactive or leased:
+        db.rollback()
+        return {"order_ids": order_ids, "missing": missing, "inactive": inactive, "leased": leased}
+    
+    changed = [row for row in rows if bool(row.is_purchased) != items[row.id]]
+    for is_purchased in (True, False):
+        product_ids = [row.id for row in changed if items[row.id] == is_purchased]
+        if not product_ids:
+            continue
+        db.query(Product).filter(Product.id.in_(product_ids)).update({
+            Product.is_purchased: is_purchased,
+            Product.purchased_at: now if is_purchased else None,
+            Product.purchased_by: executor_id if is_purchased else None
+        })
+    
+    if changed:
+        changed_orders = sorted({row.order_id for row in changed})
+        _recount_orders(db, changed_orders)
+        record_order_events(db, [
+            (row.order_id, row.customer_id, PRODUCT_PURCHASE_CHANGED,
+             {"product_id": row.id, "is_purchased": items[row.id]})
+            for row in changed
+        ])
+        
+        # Заказы, в которых теперь куплены все продукты
+        transition_orders_status(
+            db, changed_orders, OrderStatus.COMPLETED,
+            Order.total_products > 0, Order.total_products == Order.purchased_products
+        )
+    
+    db.commit()
+    return {"order_ids": order_ids, "missing": [], "inactive": [], "leased": []}
+
+def _supports_skip_locked(db: Session) -> bool:
+    """SELECT ... FOR UPDATE SKIP LOCKED: MySQL 8+ и MariaDB 10.6+"""
+    dialect = db.get_bind().dialect
+    if dialect.name != "mysql":
+        return False
+    version = dialect.server_version_info or ()
+    return version >= ((10, 6) if dialect.is_mariadb else (8, 0))
+
+def _lease_expiry(lease_seconds: int) -> datetime:
+    # Микросекунды отбрасываются: DATETIME без дробной части хранит секунды
+    return (datetime.utcnow() + timedelta(seconds=lease_seconds)).replace(microsecond=0)
+
+def claim_orders(db: Session, executor_id: int, limit: int, lease_seconds: int):
+    """
+    Захват следующих ожидающих заказов исполнителем
+    
+    На MySQL 8 кандидаты выбираются SELECT ... FOR UPDATE SKIP LOCKED:
+    заказы, которые в этот момент захватывает другой исполнитель, пропускаются
+    без ожидания блокировки. На остальных БД кандидаты захватываются условным
+    UPDATE по статусу PENDING, и заказ, уже захваченный другим исполнителем,
+    просто не попадает в результат.
+    
+    Захваченные заказы переходят в IN_PROGRESS с исполнителем и сроком аренды.
+    
+    Returns:
+        Захваченные заказы в порядке очереди (может быть меньше limit)
+    """
+    now = _transition_time()
+    expires_at = _lease_expiry(lease_seconds)
+    sources = transition_sources(OrderStatus.IN_PROGRESS)
+    candidates = db.query(Order.id, Order.started_at).filter(Order.status.in_(sources)).order_by(
+        Order.created_at, Order.id
+    ).limit(limit)
+    skip_locked = _supports_skip_locked(db)
+    if skip_locked:
+        candidates = candidates.with_for_update(skip_locked=True)
+    candidates = candidates.all()
+    candidate_ids = [row.id for row in candidates]
+    if not candidate_ids:
+        db.rollback()
+        return []
+    
+    claim = db.query(Order).filter(Order.id.in_(candidate_ids))
+    if not skip_locked:
+        claim = claim.filter(Order.status.in_(sources))
+    claim.update(_transition_values(
+        OrderStatus.IN_PROGRESS, now, {Order.assignee_id: executor_id, Order.lease_expires_at: expires_at}
+    ), synchronize_session=False)
+    
+    # Заказы, захваченные этим вызовом: исполнитель и срок аренды совпадают
+    claimed = db.query(Order).filter(
+        Order.id.in_(candidate_ids),
+        Order.status == OrderStatus.IN_PROGRESS,
+        Order.assignee_id == executor_id,
+        Order.lease_expires_at == expires_at
+    ).order_by(Order.created_at, Order.id).execution_options(populate_existing=True).all()
+    # started_at кандидатов прочитан до UPDATE: захваченные заказы без него начинают исполнение впервые
+    started_ids = [row.id for row in candidates if row.started_at is None]
+    _record_transitions(db, claimed, OrderStatus.IN_PROGRESS, now, {"assignee_id": executor_id}, started_ids)
+    db.commit()
+    return claimed
+
+def claim_order(db: Session, order_id: int, executor_id: int, lease_seconds: int):
+    """
+    Захват конкретного ожидающего заказа условным UPDATE по статусу
+    
+    Из нескольких одновременных попыток заказ получает только одна.
+    
+    Returns:
+        Заказ или None, если заказ уже не в статусе PENDING
+    """
+    return transition_order_status(
+        db, order_id, OrderStatus.IN_PROGRESS,
+        values={Order.assignee_id: executor_id, Order.lease_expires_at: _lease_expiry(lease_seconds)},
+        event_data={"assignee_id": executor_id}
+    )
+
+def renew_order_lease(db: Session, order_id: int, executor_id: int, lease_seconds: int):
+    """
+    Продление аренды заказа его исполнителем
+    
+    Returns:
+        Заказ или None, если заказ не в работе у этого исполнителя
+    """
+    renewed = db.query(Order).filter(
+        Order.id == order_id,
+        Order.status == OrderStatus.IN_PROGRESS,
+        Order.assignee_id == executor_id
+    ).update({Order.lease_expires_at: _lease_expiry(lease_seconds)}, synchronize_session=False)
+    if not renewed:
+        db.rollback()
+        return None
+    db.commit()
+    return db.query(Order).filter(Order.id == order_id).execution_options(populate_existing=True).first()
+
+def release_order(db: Session, order_id: int, executor_id: int):
+    """
+    Возврат заказа в очередь его исполнителем
+    
+    Returns:
+        Заказ или None, если заказ не в работе у этого исполнителя
+    """
+    released = transition_orders_status(
+        db, [order_id], OrderStatus.PENDING,
+        Order.status == OrderStatus.IN_PROGRESS, Order.assignee_id == executor_id
+    )
+    if not released:
+        db.rollback()
+        return None
+    db.commit()
+    return db.query(Order).filter(Order.id == order_id).execution_options(populate_existing=True).first()
+
+def expired_leases_statement(now: datetime, limit: int = 500) -> Select:
+    """Заказы в работе с истекшей к now арендой, самые старые первыми"""
+    return select(Order.id).where(
+        Order.status == OrderStatus.IN_PROGRESS,
+        Order.lease_expires_at < now
+    ).order_by(Order.lease_expires_at).limit(limit)
+
+def release_expired_leases(db: Session, limit: int = 500) -> int:
+    """
+    Возврат в очередь заказов с истекшей арендой
+    
+    Заказы выбираются с блокировкой (на MySQL 8 - с SKIP LOCKED, чтобы
+    воркеры не ждали друг друга) и переходят в PENDING без исполнителя.
+    
+    Returns:
+        Количество возвращенных заказов
+    """
+    now = datetime.utcnow()
+    expired = db.execute(
+        expired_leases_statement(now, limit).with_for_update(skip_locked=_supports_skip_locked(db))
+    ).all()
+    if not expired:
+        db.rollback()
+        return 0
+    released = transition_orders_status(
+        db, [order.id for order in expired], OrderStatus.PENDING,
+        Order.status == OrderStatus.IN_PROGRESS, Order.lease_expires_at < now
+    )
+    db.commit()
+    return len(released)
+
+def _product_text_condition(dialect_name: str, terms: List[str]):
+    """
+    Условие "продукт содержит все слова" по названию и заметкам
+    
+    На MySQL слова ищутся по FULLTEXT индексу ft_products_name_notes
+    (BOOLEAN MODE, по началу слова), на остальных БД и для коротких слов -
+    через LIKE по подстроке.
+    """
+    fulltext_terms = []
+    if dialect_name == "mysql":
+        fulltext_terms = [term for term in terms if len(term) >= FULLTEXT_MIN_TOKEN]
+    conditions = []
+    if fulltext_terms:
+        against = " ".join(f"+{term}*" for term in fulltext_terms)
+        conditions.append(match(Product.name, Product.notes, against=against).in_boolean_mode())
+    for term in terms:
+        if term in fulltext_terms:
+            continue
+        pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        conditions.append(or_(
+            Product.name.ilike(pattern, escape="\\"),
+            Product.notes.ilike(pattern, escape="\\")
+        ))
+    return and_(*conditions)
+
+def order_search_statement(dialect_name: str, terms: List[str], customer_id: Optional[int] = None,
+                           active_only: bool = False, limit: int = 20, cursor: Optional[Tuple] = None) -> Select:
+    """Страница сводок заказов, в которых есть продукт со всеми словами (новые первыми)"""
+    condition = _product_text_condition(dialect_name, terms)
+    statement = select(*SUMMARY_COLUMNS).where(Order.id.in_(select(Product.order_id).where(condition)))
+    if customer_id is not None:
+        statement = statement.where(Order.customer_id == customer_id)
+    if active_only:
+        statement = statement.where(Order.status.in_(ACTIVE_STATUSES))
+    return paginate(statement, (Order.id,), limit=limit, cursor=cursor, descending=True)
+
+def search_orders(db: Session, terms: List[str], customer_id: Optional[int] = None,
+                  active_only: bool = False, limit: int = 20, cursor: Optional[Tuple] = None) -> List[Dict]:
+    """
+    Поиск заказов по названиям и заметкам продуктов
+    
+    Два запроса: страница сводок заказов (новые первыми, keyset по id) и
+    найденные продукты этих заказов.
+    
+    Args:
+        terms: Слова запроса, продукт должен содержать все
+        customer_id: Только заказы этого заказчика
+        active_only: Только ожидающие и исполняемые заказы
+    
+    Returns:
+        Сводки заказов с ключом products - найденными продуктами заказа
+    """
+    dialect_name = db.get_bind().dialect.name
+    rows = db.execute(order_search_statement(dialect_name, terms, customer_id, active_only, limit, cursor)).all()
+    if not rows:
+        return []
+    
+    condition = _product_text_condition(dialect_name, terms)
+    products: Dict[int, List[Product]] = {row.id: [] for row in rows}
+    for product in db.query(Product).filter(Product.order_id.in_(list(products)), condition).order_by(Product.id):
+        products[product.order_id].append(product)
+    return [{**_summary(row), "products": products[row.id]} for row in rows]
@@ -0,0 +1,155 @@
+import json
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+from products.models import SavedSearch, SavedSearchChange
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from app.utils.pagination import paginate
+
+def create_saved_search(db: Session, user_id: int, query: str):
+    """Сохранение поиска пользователя"""
+    saved_search = SavedSearch(user_id=user_id, query=query)
+    db.add(saved_search)
+    db.commit()
+    db.refresh(saved_search)
+    return saved_search
+
+def get_saved_search_by_query(db: Session, user_id: int, query: str):
+    """Получение сохраненного поиска пользователя по запросу"""
+    return db.query(SavedSearch).filter(
+        SavedSearch.user_id == user_id,
+        SavedSearch.query == query
+    ).first()
+
+def count_user_saved_searches(db: Session, user_id: int) -> int:
+    """Количество сохраненных поисков пользователя"""
+    return db.query(SavedSearch).filter(SavedSearch.user_id == user_id).count()
+
+def get_user_saved_searches(db: Session, user_id: int):
+    """Получение сохраненных поисков пользователя"""
+    return db.query(SavedSearch).filter(
+        SavedSearch.user_id == user_id
+    ).order_by(SavedSearch.id).all()
+
+def delete_saved_search(db: Session, saved_search_id: int, user_id: int):
+    """Удаление сохраненного поиска (только свои записи)"""
+    deleted_count = db.query(SavedSearch).filter(
+        SavedSearch.id == saved_search_id,
+        SavedSearch.user_id == user_id
+    ).delete()
+    db.commit()
+    return deleted_count > 0
+
+def get_saved_search_changes(db: Session, user_id: int, since: Optional[datetime] = None, limit: int = 100,
+                             cursor: Optional[Tuple] = None):
+    """
+    Изменения сохраненных поисков пользователя после момента since
+
+    Страницы идут по курсору (detected_at, id): у изменений одного обновления
+    одинаковый detected_at, и страница может закончиться посреди них.
+    """
+    query = db.query(SavedSearchChange).filter(SavedSearchChange.user_id == user_id)
+    if since is not None:
+        query = query.filter(SavedSearchChange.detected_at > since)
+    changes = paginate(query, (SavedSearchChange.detected_at, SavedSearchChange.id), 0, limit, cursor).all()
+
+    result = []
+    for change in changes:
+        payload = json.loads(change.changes)
+        result.append({
+            "id": change.id,
+            "saved_search_id": change.saved_search_id,
+            "query": change.query,
+            "detected_at": change.detected_at,
+            **payload
+        })
+    return result
+
+def claim_due_saved_searches(db: Session, refreshed_before: datetime, token: str, limit: int):
+    """
+    Захват сохраненных поисков, которые пора обновить
+
+    Условный UPDATE повторно проверяет срок обновления и отсутствие чужого
+    захвата, поэтому запись, которую уже захватил другой воркер, не будет
+    захвачена второй раз. last_refreshed_at при захвате не меняется:
+    его сдвигает только успешное обновление. Захват, не снятый за период
+    обновления (воркер остановился), считается брошенным.
+    """
+    due_condition = and_(
+        or_(
+            SavedSearch.last_refreshed_at.is_(None),
+            SavedSearch.last_refreshed_at < refreshed_before
+        ),
+        or_(
+            SavedSearch.refresh_token.is_(None),
+            SavedSearch.refresh_claimed_at < refreshed_before
+        )
+    )
+    candidate_ids = [
+        row.id for row in db.query(SavedSearch.id).filter(due_condition).order_by(
+            SavedSearch.last_refreshed_at
+        ).limit(limit).all()
+    ]
+    if not candidate_ids:
+        return []
+
+    db.query(SavedSearch).filter(
+        SavedSearch.id.in_(candidate_ids),
+        due_condition
+    ).update(
+        {SavedSearch.refresh_token: token, SavedSearch.refresh_claimed_at: datetime.utcnow()},
+        synchronize_session=False
+    )
+    db.commit()
+
+    claimed = db.query(SavedSearch).filter(SavedSearch.refresh_token == token).all()
+    return [
+        {
+            "id": saved_search.id,
+            "user_id": saved_search.user_id,
+            "query": saved_search.query,
+            "snapshot": json.loads(saved_search.snapshot) if saved_search.snapshot else None
+        }
+        for saved_search in claimed
+    ]
+
+def release_saved_searches(db: Session, saved_search_ids: List[int], token: str):
+    """Снятие захвата с поисков, которые не удалось обновить (обновятся при следующей проверке)"""
+    if not saved_search_ids:
+        return
+    db.query(SavedSearch).filter(
+        SavedSearch.id.in_(saved_search_ids),
+        SavedSearch.refresh_token == token
+    ).update(
+        {SavedSearch.refresh_token: None, SavedSearch.refresh_claimed_at: None},
+        synchronize_session=False
+    )
+    db.commit()
+
+def save_refresh_results(db: Session, results: List[Dict]):
+    """
+    Сохранение результатов обновления одной транзакцией
+
+    Каждый элемент: id, user_id, query, snapshot (dict) и changes (dict или None)
+    """
+    detected_at = datetime.utcnow()
+    for result in results:
+        updated = db.query(SavedSearch).filter(SavedSearch.id == result["id"]).update(
+            {
+                SavedSearch.snapshot: json.dumps(result["snapshot"], ensure_ascii=False),
+                SavedSearch.last_refreshed_at: detected_at,
+                SavedSearch.refresh_token: None,
+                SavedSearch.refresh_claimed_at: None
+            },
+            synchronize_session=False
+        )
+        if updated and result["changes"]:
+            # Поиск, удаленный во время обновления, не получает изменений
+            db.add(SavedSearchChange(
+                saved_search_id=result["id"],
+                user_id=result["user_id"],
+                query=result["query"],
+                detected_at=detected_at,
+                changes=json.dumps(result["changes"], ensure_ascii=False)
+            ))
+    db.commit()
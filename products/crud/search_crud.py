@@ -1,7 +1,10 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
 from products.models import SearchHistory
+from app.utils.pagination import paginate
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 def create_search_record(db: Session, user_id: int, query: str, results_count: int):
     """Создание записи о поиске"""
@@ -15,13 +18,18 @@ def create_search_record(db: Session, user_id: int, query: str, results_count: i
     db.refresh(search_record)
     return search_record
 
-def get_user_search_history(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    """Получение истории поиска пользователя"""
-    return db.query(SearchHistory).filter(
-        SearchHistory.user_id == user_id
-    ).order_by(
-        SearchHistory.search_timestamp.desc()
-    ).offset(skip).limit(limit).all()
+def user_search_history_statement(user_id: int, skip: int = 0, limit: int = 100,
+                                  cursor: Optional[Tuple] = None) -> Select:
+    """Страница истории поиска пользователя (новые записи первыми)"""
+    statement = select(SearchHistory).where(SearchHistory.user_id == user_id)
+    return paginate(
+        statement, (SearchHistory.search_timestamp, SearchHistory.id), skip, limit, cursor, descending=True
+    )
+
+def get_user_search_history(db: Session, user_id: int, skip: int = 0, limit: int = 100,
+                            cursor: Optional[Tuple] = None):
+    """Получение истории поиска пользователя (новые записи первыми)"""
+    return db.scalars(user_search_history_statement(user_id, skip, limit, cursor)).all()
 
 def get_search_statistics(db: Session, user_id: Optional[int] = None):
     """Получение статистики поиска"""
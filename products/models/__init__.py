@@ -1,4 +1,11 @@
 from .product_models import Product, Order, OrderStatus
 from .search_models import SearchHistory
+from .saved_search_models import SavedSearch, SavedSearchChange
+from .order_event_models import OrderEvent
+from .archive_models import ArchivedOrder, ArchivedProduct, ArchivedSearchHistory
+from .order_stats_models import OrderStatsHourly, OrderLatencyHourly
+from .executor_stats_models import ExecutorProductivity
 
-__all__ = ["Product", "Order", "OrderStatus", "SearchHistory"]
+__all__ = ["Product", "Order", "OrderStatus", "SearchHistory", "SavedSearch", "SavedSearchChange", "OrderEvent",
+           "ArchivedOrder", "ArchivedProduct", "ArchivedSearchHistory",
+           "OrderStatsHourly", "OrderLatencyHourly", "ExecutorProductivity"]
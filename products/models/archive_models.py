@@ -0,0 +1,68 @@
+from sqlalchemy import Column, Integer, String, Enum, DateTime, Text, Boolean, Index
+from sqlalchemy.orm import relationship
+from database import Base
+from products.models.product_models import OrderStatus
+
+# Архивные таблицы повторяют колонки рабочих таблиц и добавляют время архивации.
+# Первичный ключ включает archived_at, а внешних ключей нет: так таблицы можно
+# разбить на помесячные секции (RANGE по archived_at) и удалять старые секции целиком.
+
+class ArchivedOrder(Base):
+    __tablename__ = "orders_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    archived_at = Column(DateTime(timezone=True), primary_key=True)
+    customer_id = Column(Integer, nullable=False)
+    status = Column(Enum(OrderStatus), nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+    external_ref = Column(String(100), nullable=True)
+    assignee_id = Column(Integer, nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    total_products = Column(Integer, nullable=False, default=0)
+    purchased_products = Column(Integer, nullable=False, default=0)
+
+    products = relationship(
+        "ArchivedProduct",
+        primaryjoin="ArchivedOrder.id == foreign(ArchivedProduct.order_id)",
+        order_by="ArchivedProduct.id",
+        lazy="selectin",
+        viewonly=True
+    )
+
+    __table_args__ = (
+        Index("ix_orders_archive_customer_id_created_at", "customer_id", "created_at"),
+    )
+
+class ArchivedProduct(Base):
+    __tablename__ = "products_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    archived_at = Column(DateTime(timezone=True), primary_key=True)
+    name = Column(String(200), nullable=False)
+    quantity = Column(Integer, nullable=False, default=1)
+    notes = Column(Text, nullable=True)
+    is_purchased = Column(Boolean, default=False)
+    purchased_at = Column(DateTime(timezone=True), nullable=True)
+    purchased_by = Column(Integer, nullable=True)
+    order_id = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_products_archive_order_id", "order_id"),
+    )
+
+class ArchivedSearchHistory(Base):
+    __tablename__ = "search_history_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    archived_at = Column(DateTime(timezone=True), primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    query = Column(String(255), nullable=False)
+    results_count = Column(Integer, default=0)
+    search_timestamp = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_search_history_archive_user_id_search_timestamp", "user_id", "search_timestamp"),
+    )
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, Float, DateTime
+from database import Base
+
+class ExecutorProductivity(Base):
+    """
+    Сводка продуктивности исполнителей за последние window_days дней
+
+    Пересчитывается фоновой задачей целиком; запросы администраторов читают
+    только эту таблицу, а не products.
+    """
+    __tablename__ = "executor_productivity"
+
+    window_days = Column(Integer, primary_key=True, autoincrement=False)
+    executor_id = Column(Integer, primary_key=True, autoincrement=False)
+    items_purchased = Column(Integer, nullable=False, default=0)
+    orders_completed = Column(Integer, nullable=False, default=0)
+    # Медиана времени между соседними покупками исполнителя (секунды), None - меньше двух покупок
+    median_purchase_interval = Column(Float, nullable=True)
+    refreshed_at = Column(DateTime, nullable=False)
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from sqlalchemy.sql import func
+from database import Base
+
+class OrderEvent(Base):
+    """
+    Событие заказа (outbox)
+    
+    Записывается в той же транзакции, что и изменение заказа. Каждый воркер
+    читает новые события из таблицы и раздает их своим подписчикам.
+    """
+    __tablename__ = "order_events"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    order_id = Column(Integer, nullable=False)
+    customer_id = Column(Integer, nullable=False)
+    event_type = Column(String(50), nullable=False)
+    payload = Column(Text, nullable=False)  # JSON с данными события
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index("ix_order_events_customer_id_id", "customer_id", "id"),
+        Index("ix_order_events_created_at", "created_at"),
+    )
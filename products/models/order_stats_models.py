@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from database import Base
+
+# Счетчики пополняются при смене статуса заказа в той же транзакции.
+# Строка часа разбита на shard: одновременные переходы обновляют разные строки
+# и не ждут блокировку одной "горячей" строки; при чтении shard суммируются.
+
+class OrderStatsHourly(Base):
+    """Количество переходов заказов по часам"""
+    __tablename__ = "order_stats_hourly"
+
+    bucket = Column(DateTime, primary_key=True)  # Начало часа (UTC)
+    shard = Column(Integer, primary_key=True, autoincrement=False)
+    created = Column(Integer, nullable=False, default=0, server_default="0")
+    started = Column(Integer, nullable=False, default=0, server_default="0")
+    completed = Column(Integer, nullable=False, default=0, server_default="0")
+    cancelled = Column(Integer, nullable=False, default=0, server_default="0")
+
+class OrderLatencyHourly(Base):
+    """
+    Гистограммы длительностей по часам
+
+    metric - time_to_start или time_to_complete (от создания заказа),
+    bin - номер логарифмического интервала длительности (см. order_stats_crud).
+    """
+    __tablename__ = "order_latency_hourly"
+
+    bucket = Column(DateTime, primary_key=True)
+    metric = Column(String(20), primary_key=True)
+    bin = Column(Integer, primary_key=True, autoincrement=False)
+    shard = Column(Integer, primary_key=True, autoincrement=False)
+    count = Column(Integer, nullable=False, default=0, server_default="0")
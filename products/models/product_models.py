@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Enum, DateTime, Text, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Enum, DateTime, Text, Boolean, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from database import Base
@@ -25,6 +25,15 @@ class Product(Base):
     # Связи
     order = relationship("Order", back_populates="products")
     purchaser = relationship("User", foreign_keys=[purchased_by])
+    
+    __table_args__ = (
+        Index("ix_products_order_id_is_purchased", "order_id", "is_purchased"),
+        Index("ix_products_purchased_by", "purchased_by"),
+        # Пересчет сводки исполнителей находит покупки за период по индексу
+        Index("ix_products_purchased_at_purchased_by", "purchased_at", "purchased_by"),
+        # FULLTEXT индекс ft_products_name_notes (name, notes) для поиска заказов
+        # создается миграцией 0006 только на MySQL
+    )
 
 class Order(Base):
     __tablename__ = "orders"
@@ -33,9 +42,30 @@ class Order(Base):
     customer_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     status = Column(Enum(OrderStatus), nullable=False, default=OrderStatus.PENDING)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Заполняется при создании, чтобы лента изменений видела новые заказы
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Первое взятие заказа в работу (время до начала исполнения)
+    started_at = Column(DateTime(timezone=True), nullable=True)
     completed_at = Column(DateTime(timezone=True), nullable=True)
+    # Идентификатор заказа в системе клиента (массовая загрузка, повторная отправка)
+    external_ref = Column(String(100), nullable=True)
+    # Исполнитель, взявший заказ, и срок аренды: по истечении заказ возвращается в очередь
+    assignee_id = Column(Integer, nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    # Счетчики продуктов обновляются в той же транзакции, что и продукты
+    total_products = Column(Integer, nullable=False, default=0, server_default="0")
+    purchased_products = Column(Integer, nullable=False, default=0, server_default="0")
     
     # Связи
     customer = relationship("User", back_populates="orders")
-    products = relationship("Product", back_populates="order", cascade="all, delete-orphan")
+    # Продукты загружаются вместе с заказом: с AsyncSession ленивая загрузка недоступна
+    products = relationship("Product", back_populates="order", cascade="all, delete-orphan", lazy="selectin")
+    
+    __table_args__ = (
+        Index("ix_orders_status_created_at", "status", "created_at"),
+        Index("ix_orders_customer_id_created_at", "customer_id", "created_at"),
+        Index("ix_orders_updated_at_id", "updated_at", "id"),
+        Index("uq_orders_customer_id_external_ref", "customer_id", "external_ref", unique=True),
+        Index("ix_orders_status_lease_expires_at", "status", "lease_expires_at"),
+        Index("ix_orders_assignee_id", "assignee_id"),
+    )
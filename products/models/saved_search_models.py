@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from database import Base
+
+class SavedSearch(Base):
+    """Модель сохраненного поиска пользователя"""
+    __tablename__ = "saved_searches"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    query = Column(String(255), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_refreshed_at = Column(DateTime(timezone=True), nullable=True)
+    refresh_token = Column(String(32), nullable=True)  # Метка воркера, захватившего обновление
+    refresh_claimed_at = Column(DateTime(timezone=True), nullable=True)
+    snapshot = Column(Text, nullable=True)  # JSON {id товара: {name, price}} последнего результата
+    
+    __table_args__ = (
+        UniqueConstraint("user_id", "query", name="uq_saved_searches_user_id_query"),
+        Index("ix_saved_searches_last_refreshed_at", "last_refreshed_at"),
+        Index("ix_saved_searches_refresh_token", "refresh_token"),
+    )
+
+class SavedSearchChange(Base):
+    """Изменения результатов сохраненного поиска между обновлениями"""
+    __tablename__ = "saved_search_changes"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    saved_search_id = Column(Integer, ForeignKey("saved_searches.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    query = Column(String(255), nullable=False)
+    detected_at = Column(DateTime(timezone=True), nullable=False)
+    changes = Column(Text, nullable=False)  # JSON {added, removed, price_changed}
+    
+    __table_args__ = (
+        Index("ix_saved_search_changes_user_id_detected_at", "user_id", "detected_at"),
+    )
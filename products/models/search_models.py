@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from database import Base
@@ -15,6 +15,10 @@ class SearchHistory(Base):
     
     # Связи
     user = relationship("User", back_populates="search_history")
+    
+    __table_args__ = (
+        Index("ix_search_history_user_id_search_timestamp", "user_id", "search_timestamp"),
+    )
 
 # Добавляем связь в модель User (auth/models/user_models.py)
 # user_models.py уже содержит orders = relationship("Order", back_populates="customer")
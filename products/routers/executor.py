@@ -1,28 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from database import get_db
+import asyncio
+import time
+from datetime import datetime
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple
+from config import settings
+from database import get_async_db
 from auth.models import User as UserModel, UserRole
 from products.models import OrderStatus
 from products.schemas import (
     Order as OrderSchema, 
     OrderSummary,
     ProductPurchase,
+    BulkProductPurchase,
     OrderStatusUpdate
 )
-from auth.utils import get_current_active_user
-from products.crud import (
+from auth.utils import get_current_active_user, get_read_db
+from app.utils import run_until_disconnected
+from app.utils.pagination import decode_cursor, encode_cursor, set_next_cursor
+from products.services.order_events import SSE_HEADERS, order_event_bus, order_event_stream
+from products.crud.async_crud import (
     get_all_orders, 
     get_order, 
-    get_orders_by_status,
+    get_order_summaries_by_status,
+    get_active_order_summaries,
+    get_order_changes_position,
+    get_changed_order_summaries,
     update_product_purchase_status,
-    update_order_status,
+    update_products_purchase_bulk,
+    get_orders_by_ids,
+    complete_order_if_purchased,
     get_order_summary,
-    check_order_completion
+    claim_orders,
+    claim_order,
+    renew_order_lease,
+    release_order
 )
 
 router = APIRouter(prefix="/executor", tags=["executor"])
 
+# Позиция в ленте изменений заказов для следующего опроса
+CHANGES_CURSOR_HEADER = "X-Changes-Since"
+
 def require_executor(current_user: UserModel = Depends(get_current_active_user)):
     """Проверка, что пользователь является исполнителем"""
     if current_user.role not in [UserRole.EXECUTOR, UserRole.ADMIN]:
@@ -32,38 +52,140 @@ def require_executor(current_user: UserModel = Depends(get_current_active_user))
         )
     return current_user
 
+def require_assignee(order, current_user: UserModel):
+    """Проверка, что заказ не в работе у другого исполнителя с действующей арендой"""
+    if current_user.role == UserRole.ADMIN or order.status != OrderStatus.IN_PROGRESS:
+        return
+    if order.assignee_id is None or order.assignee_id == current_user.id:
+        return
+    if order.lease_expires_at is not None and order.lease_expires_at.replace(tzinfo=None) > datetime.utcnow():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Заказ в работе у другого исполнителя"
+        )
+
 @router.get("/orders", response_model=List[OrderSummary])
 async def get_available_orders(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: UserModel = Depends(require_executor),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Получение списка доступных заказов (только для исполнителей)
+    
+    - **cursor**: Курсор из заголовка X-Next-Cursor предыдущей страницы
+    
+    В заголовке X-Changes-Since возвращается позиция для GET /executor/orders/changes.
     """
+    # Позиция берется до чтения ленты: изменения между запросами не потеряются
+    position = await get_order_changes_position(db, settings.ORDER_EVENTS_GAP_TIMEOUT)
+    response.headers[CHANGES_CURSOR_HEADER] = encode_cursor(position)
+    
     # Исполнители видят заказы со статусом PENDING и IN_PROGRESS
-    orders = get_orders_by_status(db, OrderStatus.PENDING, skip, limit)
-    orders.extend(get_orders_by_status(db, OrderStatus.IN_PROGRESS, skip, limit))
+    order_summaries = await get_active_order_summaries(db, skip, limit, cursor=decode_cursor(cursor))
+    set_next_cursor(response, order_summaries, limit, lambda summary: (summary["created_at"], summary["id"]))
+    return order_summaries
+
+async def _wait_for_changes(db: AsyncSession, position: int, limit: int, wait: float) -> Tuple[list, int]:
+    """Опрашивает БД, пока не появятся изменения или не истечет время ожидания"""
+    deadline = time.monotonic() + wait
+    while True:
+        changes, new_position = await get_changed_order_summaries(
+            db, position, limit, settings.ORDER_EVENTS_GAP_TIMEOUT
+        )
+        remaining = deadline - time.monotonic()
+        if changes or new_position != position or remaining <= 0:
+            return changes, new_position
+        # Завершаем транзакцию: соединение возвращается в пул на время ожидания,
+        # а следующий опрос видит свежие данные, а не снимок первого запроса
+        await db.rollback()
+        await asyncio.sleep(min(settings.EXECUTOR_FEED_POLL_INTERVAL, remaining))
+
+@router.get("/orders/changes", response_model=List[OrderSummary])
+async def get_order_changes(
+    request: Request,
+    response: Response,
+    since: str,
+    wait: float = 0,
+    limit: int = 100,
+    current_user: UserModel = Depends(require_executor),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Заказы, измененные после позиции since (только для исполнителей)
     
-    order_summaries = []
-    for order in orders:
-        summary = get_order_summary(db, order.id)
-        if summary:
-            order_summaries.append(summary)
+    - **since**: Значение заголовка X-Changes-Since из ленты или предыдущего опроса
+    - **wait**: Сколько секунд ждать изменений, если их пока нет (long-poll)
     
-    return order_summaries
+    Возвращаются заказы в любом статусе: завершенные и отмененные нужно убрать из ленты.
+    """
+    position = decode_cursor(since)
+    if len(position) != 1 or not isinstance(position[0], int):
+        raise HTTPException(status_code=400, detail="Некорректная позиция ленты изменений")
+    wait = min(max(wait, 0), settings.EXECUTOR_FEED_MAX_WAIT)
+    changes, position = await run_until_disconnected(
+        request, _wait_for_changes(db, position[0], limit, wait), route="executor_order_changes"
+    )
+    
+    response.headers[CHANGES_CURSOR_HEADER] = encode_cursor(position)
+    return changes
+
+@router.get("/orders/events")
+async def stream_order_events(
+    order_id: Optional[List[int]] = Query(None),
+    last_event_id: Optional[int] = Header(None),
+    current_user: UserModel = Depends(require_executor),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Поток событий заказов в формате SSE (только для исполнителей)
+    
+    - **order_id**: Подписка только на эти заказы (можно указать несколько раз);
+      по умолчанию - события всех заказов
+    
+    При переподключении заголовок Last-Event-ID позволяет дочитать пропущенное.
+    """
+    # Сессия нужна только для авторизации: не держим соединение на все время потока
+    await db.close()
+    return StreamingResponse(
+        order_event_stream(order_event_bus, order_ids=order_id, last_event_id=last_event_id),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+@router.post("/orders/claim", response_model=List[OrderSchema])
+async def claim_next_orders(
+    limit: int = Query(1, ge=1),
+    current_user: UserModel = Depends(require_executor),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Взять в работу следующие ожидающие заказы (только для исполнителей)
+    
+    Заказы из начала очереди переходят в статус in_progress и закрепляются
+    за исполнителем на ORDER_LEASE_SECONDS секунд. Заказы, которые в этот
+    момент берет другой исполнитель, пропускаются. Аренду продлевает
+    PUT /executor/orders/{order_id}/lease; по ее истечении заказ
+    возвращается в очередь.
+    
+    - **limit**: Сколько заказов взять (не больше ORDER_CLAIM_MAX)
+    """
+    limit = min(limit, settings.ORDER_CLAIM_MAX)
+    return await claim_orders(db, current_user.id, limit, settings.ORDER_LEASE_SECONDS)
 
 @router.get("/orders/{order_id}", response_model=OrderSchema)
 async def get_order_details(
     order_id: int,
     current_user: UserModel = Depends(require_executor),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получение деталей заказа (только для исполнителей)
     """
-    order = get_order(db, order_id)
+    order = await get_order(db, order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Заказ не найден")
     
@@ -79,18 +201,15 @@ async def get_order_details(
 async def get_order_summary_executor(
     order_id: int,
     current_user: UserModel = Depends(require_executor),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получение сводки по заказу (только для исполнителей)
     """
-    order = get_order(db, order_id)
-    if not order:
-        raise HTTPException(status_code=404, detail="Заказ не найден")
-    
-    summary = get_order_summary(db, order_id)
+    # Одна строка таблицы заказов: продукты не загружаются
+    summary = await get_order_summary(db, order_id)
     if not summary:
-        raise HTTPException(status_code=404, detail="Сводка не найдена")
+        raise HTTPException(status_code=404, detail="Заказ не найден")
     
     return summary
 
@@ -98,68 +217,146 @@ async def get_order_summary_executor(
 async def start_order_execution(
     order_id: int,
     current_user: UserModel = Depends(require_executor),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Начать исполнение заказа (только для исполнителей)
     """
-    order = get_order(db, order_id)
-    if not order:
-        raise HTTPException(status_code=404, detail="Заказ не найден")
-    
-    if order.status != OrderStatus.PENDING:
-        raise HTTPException(
-            status_code=400, 
-            detail="Можно начать только ожидающий заказ"
-        )
+    # Условный захват: из одновременных попыток заказ получает только одна
+    updated_order = await claim_order(db, order_id, current_user.id, settings.ORDER_LEASE_SECONDS)
+    if updated_order:
+        return updated_order
     
-    updated_order = update_order_status(db, order_id, OrderStatus.IN_PROGRESS)
-    return updated_order
+    # Захват не выполнен: заказа нет или он уже не ожидает исполнителя
+    if not await get_order_summary(db, order_id):
+        raise HTTPException(status_code=404, detail="Заказ не найден")
+    raise HTTPException(
+        status_code=400, 
+        detail="Можно начать только ожидающий заказ"
+    )
+
+@router.put("/orders/{order_id}/lease", response_model=OrderSchema)
+async def renew_order_lease_executor(
+    order_id: int,
+    current_user: UserModel = Depends(require_executor),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Продлить аренду заказа на ORDER_LEASE_SECONDS секунд (только исполнитель заказа)
+    """
+    order = await renew_order_lease(db, order_id, current_user.id, settings.ORDER_LEASE_SECONDS)
+    if not order:
+        raise HTTPException(status_code=409, detail="Заказ не в работе у текущего исполнителя")
+    return order
+
+@router.put("/orders/{order_id}/release", response_model=OrderSchema)
+async def release_order_executor(
+    order_id: int,
+    current_user: UserModel = Depends(require_executor),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Вернуть заказ в очередь (только исполнитель заказа)
+    """
+    order = await release_order(db, order_id, current_user.id)
+    if not order:
+        raise HTTPException(status_code=409, detail="Заказ не в работе у текущего исполнителя")
+    return order
 
 @router.put("/products/{product_id}/purchase", response_model=OrderSchema)
 async def mark_product_purchased(
     product_id: int,
     purchase_data: ProductPurchase,
     current_user: UserModel = Depends(require_executor),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Отметить продукт как купленный (только для исполнителей)
     """
-    from products.crud import get_product
+    from products.crud.async_crud import get_product
     
-    product = get_product(db, product_id)
+    product = await get_product(db, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Продукт не найден")
     
     # Проверяем, что заказ активен
-    order = get_order(db, product.order_id)
+    order = await get_order(db, product.order_id)
     if not order or order.status not in [OrderStatus.PENDING, OrderStatus.IN_PROGRESS]:
         raise HTTPException(
             status_code=400, 
             detail="Можно работать только с активными заказами"
         )
+    require_assignee(order, current_user)
     
     # Обновляем статус продукта
-    updated_product = update_product_purchase_status(db, product_id, purchase_data, current_user.id)
+    updated_product = await update_product_purchase_status(db, product_id, purchase_data, current_user.id)
     
-    # Проверяем, можно ли завершить заказ
-    if check_order_completion(db, product.order_id):
-        update_order_status(db, product.order_id, OrderStatus.COMPLETED)
+    # Заказ завершается, если куплены все продукты (условие проверяется в UPDATE)
+    completed_order = await complete_order_if_purchased(db, product.order_id)
     
     # Возвращаем обновленный заказ
-    return get_order(db, product.order_id)
+    return completed_order or await get_order(db, product.order_id)
+
+@router.put("/products/purchase", response_model=List[OrderSchema])
+async def mark_products_purchased_bulk(
+    purchase_data: BulkProductPurchase,
+    current_user: UserModel = Depends(require_executor),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Массовая отметка покупки продуктов (только для исполнителей)
+    
+    Все изменения применяются одной транзакцией: если хотя бы один продукт
+    не найден, относится к неактивному заказу или к заказу в работе у другого
+    исполнителя, ничего не меняется. Полностью купленные заказы завершаются. Возвращаются затронутые заказы.
+    """
+    if not purchase_data.items:
+        raise HTTPException(status_code=400, detail="Список продуктов пуст")
+    if len(purchase_data.items) > settings.BULK_PURCHASE_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Не больше {settings.BULK_PURCHASE_MAX_ITEMS} продуктов за один запрос"
+        )
+    
+    items = {item.product_id: item.is_purchased for item in purchase_data.items}
+    result = await update_products_purchase_bulk(
+        db, items, current_user.id, check_leases=current_user.role != UserRole.ADMIN
+    )
+    if result["missing"]:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Продукты не найдены: {', '.join(map(str, result['missing']))}"
+        )
+    if result["inactive"]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Можно работать только с активными заказами (продукты: {', '.join(map(str, result['inactive']))})"
+        )
+    if result["leased"]:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Заказ в работе у другого исполнителя (продукты: {', '.join(map(str, result['leased']))})"
+        )
+    
+    return await get_orders_by_ids(db, result["order_ids"])
 
 @router.put("/orders/{order_id}/complete", response_model=OrderSchema)
 async def complete_order(
     order_id: int,
     current_user: UserModel = Depends(require_executor),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Завершить заказ (только для исполнителей, если все продукты куплены)
     """
-    order = get_order(db, order_id)
+    # Статус, исполнитель и покупка всех продуктов проверяются в одном условном UPDATE
+    executor_id = None if current_user.role == UserRole.ADMIN else current_user.id
+    updated_order = await complete_order_if_purchased(db, order_id, executor_id)
+    if updated_order:
+        return updated_order
+    
+    # Заказ не завершен: определяем причину
+    order = await get_order(db, order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Заказ не найден")
     
@@ -168,34 +365,28 @@ async def complete_order(
             status_code=400, 
             detail="Можно завершить только активный заказ"
         )
+    require_assignee(order, current_user)
     
-    # Проверяем, что все продукты куплены
-    if not check_order_completion(db, order_id):
-        raise HTTPException(
-            status_code=400, 
-            detail="Нельзя завершить заказ, пока не все продукты куплены"
-        )
-    
-    updated_order = update_order_status(db, order_id, OrderStatus.COMPLETED)
-    return updated_order
+    raise HTTPException(
+        status_code=400, 
+        detail="Нельзя завершить заказ, пока не все продукты куплены"
+    )
 
 @router.get("/orders/status/{status}", response_model=List[OrderSummary])
 async def get_orders_by_status_executor(
     status: OrderStatus,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: UserModel = Depends(require_executor),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получение заказов по статусу (только для исполнителей)
-    """
-    orders = get_orders_by_status(db, status, skip, limit)
-    
-    order_summaries = []
-    for order in orders:
-        summary = get_order_summary(db, order.id)
-        if summary:
-            order_summaries.append(summary)
     
+    - **cursor**: Курсор из заголовка X-Next-Cursor предыдущей страницы
+    """
+    order_summaries = await get_order_summaries_by_status(db, status, skip, limit, cursor=decode_cursor(cursor))
+    set_next_cursor(response, order_summaries, limit, lambda summary: (summary["created_at"], summary["id"]))
     return order_summaries
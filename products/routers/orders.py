@@ -1,22 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from database import get_db
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from config import settings
+from database import get_async_db
 from auth.models import User as UserModel, UserRole
-from products.models import OrderStatus
 from products.schemas import (
     OrderCreate, 
     Order as OrderSchema, 
     OrderSummary,
-    OrderStatusUpdate
+    OrderStatusUpdate,
+    ArchivedOrder as ArchivedOrderSchema,
+    BulkOrderCreate,
+    BulkOrderResult
 )
-from auth.utils import get_current_active_user
-from products.crud import (
+from auth.utils import get_current_active_user, get_read_db
+from app.utils import run_until_disconnected
+from app.utils.pagination import decode_cursor, set_next_cursor
+from products.services.order_events import SSE_HEADERS, order_event_bus, order_event_stream
+from products.services.bulk_orders import ingest_orders, iter_lines, parse_csv, parse_ndjson
+from products.crud.async_crud import (
     create_order, 
-    get_user_orders, 
+    get_user_order_summaries, 
     get_order, 
-    update_order_status,
-    get_order_summary
+    cancel_customer_order,
+    get_order_summary,
+    get_archived_orders,
+    get_archived_order
 )
 
 router = APIRouter(prefix="/orders", tags=["orders"])
@@ -34,7 +44,7 @@ def require_customer(current_user: UserModel = Depends(get_current_active_user))
 async def create_new_order(
     order: OrderCreate,
     current_user: UserModel = Depends(require_customer),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Создание нового заказа (только для заказчиков)
@@ -45,39 +55,165 @@ async def create_new_order(
             detail="Заказ должен содержать хотя бы один продукт"
         )
     
-    db_order = create_order(db, order, current_user.id)
+    db_order = await create_order(db, order, current_user.id)
     return db_order
 
+@router.post("/bulk", response_model=BulkOrderResult)
+async def create_orders_bulk_endpoint(
+    bulk: BulkOrderCreate,
+    request: Request,
+    current_user: UserModel = Depends(require_customer),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Массовое создание заказов (только для заказчиков)
+    
+    Заказы сохраняются пачками, каждая пачка - одна транзакция. Номера строк
+    в ответе считаются с 1. Повторная отправка заказа с тем же external_ref
+    не создает его заново. Если клиент отключится, загрузка останавливается
+    после уже сохраненных пачек: их повторная отправка не создаст дублей.
+    """
+    if len(bulk.orders) > settings.BULK_ORDERS_MAX_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Не больше {settings.BULK_ORDERS_MAX_ROWS} заказов за один запрос"
+        )
+    
+    async def rows():
+        for row, item in enumerate(bulk.orders, start=1):
+            yield row, item
+    
+    return await run_until_disconnected(
+        request, ingest_orders(db, current_user.id, rows()), route="orders_bulk"
+    )
+
+@router.post("/bulk/upload", response_model=BulkOrderResult)
+async def upload_orders(
+    request: Request,
+    current_user: UserModel = Depends(require_customer),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Массовая загрузка заказов файлом (только для заказчиков)
+    
+    Тело запроса читается потоково:
+    - **application/x-ndjson**: заказ {"external_ref": ..., "products": [...]} в каждой строке
+    - **text/csv**: заголовок external_ref,name,quantity,notes; строки с одинаковым
+      external_ref подряд - продукты одного заказа
+    
+    run_until_disconnected здесь не используется: проверка отключения читает
+    сообщения запроса и забирала бы части тела у потокового разбора. Отключение
+    клиента во время загрузки и так прерывает чтение тела (ClientDisconnect).
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type == "text/csv":
+        parser = parse_csv
+    elif content_type in ("application/x-ndjson", "application/jsonl"):
+        parser = parse_ndjson
+    else:
+        raise HTTPException(
+            status_code=415,
+            detail="Поддерживаются text/csv и application/x-ndjson"
+        )
+    
+    return await ingest_orders(db, current_user.id, parser(iter_lines(request.stream())))
+
 @router.get("/", response_model=List[OrderSummary])
 async def get_my_orders(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: UserModel = Depends(require_customer),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Получение списка заказов текущего пользователя (только для заказчиков)
+    
+    - **cursor**: Курсор из заголовка X-Next-Cursor предыдущей страницы;
+      без курсора работает пагинация skip/limit
+    """
+    order_summaries = await get_user_order_summaries(
+        db, current_user.id, skip=skip, limit=limit, cursor=decode_cursor(cursor)
+    )
+    set_next_cursor(response, order_summaries, limit, lambda summary: (summary["created_at"], summary["id"]))
+    return order_summaries
+
+@router.get("/events")
+async def stream_my_order_events(
+    last_event_id: Optional[int] = Header(None),
+    current_user: UserModel = Depends(require_customer),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Поток событий по своим заказам в формате SSE (только для заказчиков)
+    
+    События: order_created, status_changed, product_purchase_changed.
+    При переподключении заголовок Last-Event-ID позволяет дочитать пропущенное.
+    """
+    customer_id = current_user.id
+    # Сессия нужна только для авторизации: не держим соединение на все время потока
+    await db.close()
+    return StreamingResponse(
+        order_event_stream(order_event_bus, customer_id=customer_id, last_event_id=last_event_id),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+@router.get("/archive", response_model=List[ArchivedOrderSchema])
+async def get_my_archived_orders(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    current_user: UserModel = Depends(require_customer),
+    db: AsyncSession = Depends(get_read_db)
+):
     """
-    orders = get_user_orders(db, current_user.id, skip=skip, limit=limit)
-    order_summaries = []
+    Архивные заказы текущего пользователя (только для заказчиков)
     
-    for order in orders:
-        summary = get_order_summary(db, order.id)
-        if summary:
-            order_summaries.append(summary)
+    Завершенные и отмененные заказы старше ARCHIVE_ORDERS_AFTER_DAYS дней
+    переносятся в архив и в основных списках не показываются.
     
-    return order_summaries
+    - **cursor**: Курсор из заголовка X-Next-Cursor предыдущей страницы
+    """
+    orders = await get_archived_orders(
+        db, current_user.id, skip=skip, limit=limit, cursor=decode_cursor(cursor)
+    )
+    set_next_cursor(response, orders, limit, lambda order: (order.created_at, order.id))
+    return orders
+
+@router.get("/archive/{order_id}", response_model=ArchivedOrderSchema)
+async def get_my_archived_order(
+    order_id: int,
+    current_user: UserModel = Depends(require_customer),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Архивный заказ (только для заказчиков, только свои заказы)
+    """
+    order = await get_archived_order(db, order_id)
+    if not order:
+        raise HTTPException(status_code=404, detail="Заказ не найден в архиве")
+    
+    if order.customer_id != current_user.id:
+        raise HTTPException(
+            status_code=403, 
+            detail="Доступ только к своим заказам"
+        )
+    
+    return order
 
 @router.get("/{order_id}", response_model=OrderSchema)
 async def get_my_order(
     order_id: int,
     current_user: UserModel = Depends(require_customer),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получение конкретного заказа (только для заказчиков, только свои заказы)
     """
-    order = get_order(db, order_id)
+    order = await get_order(db, order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Заказ не найден")
     
@@ -93,51 +229,50 @@ async def get_my_order(
 async def get_order_summary_endpoint(
     order_id: int,
     current_user: UserModel = Depends(require_customer),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Получение сводки по заказу (только для заказчиков, только свои заказы)
     """
-    order = get_order(db, order_id)
-    if not order:
+    # Одна строка таблицы заказов: продукты не загружаются
+    summary = await get_order_summary(db, order_id)
+    if not summary:
         raise HTTPException(status_code=404, detail="Заказ не найден")
     
-    if order.customer_id != current_user.id:
+    if summary["customer_id"] != current_user.id:
         raise HTTPException(
             status_code=403, 
             detail="Доступ только к своим заказам"
         )
     
-    summary = get_order_summary(db, order_id)
-    if not summary:
-        raise HTTPException(status_code=404, detail="Сводка не найдена")
-    
     return summary
 
 @router.put("/{order_id}/cancel", response_model=OrderSchema)
 async def cancel_order(
     order_id: int,
     current_user: UserModel = Depends(require_customer),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Отмена заказа (только для заказчиков, только свои заказы)
     """
-    order = get_order(db, order_id)
+    # Владелец и статус проверяются в одном условном UPDATE
+    updated_order = await cancel_customer_order(db, order_id, current_user.id)
+    if updated_order:
+        return updated_order
+    
+    # Заказ не отменен: определяем причину
+    order = await get_order_summary(db, order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Заказ не найден")
     
-    if order.customer_id != current_user.id:
+    if order["customer_id"] != current_user.id:
         raise HTTPException(
             status_code=403, 
             detail="Доступ только к своим заказам"
         )
     
-    if order.status in [OrderStatus.COMPLETED, OrderStatus.CANCELLED]:
-        raise HTTPException(
-            status_code=400, 
-            detail="Нельзя отменить завершенный или отмененный заказ"
-        )
-    
-    updated_order = update_order_status(db, order_id, OrderStatus.CANCELLED)
-    return updated_order
+    raise HTTPException(
+        status_code=400, 
+        detail="Нельзя отменить завершенный или отмененный заказ"
+    )
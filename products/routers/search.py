@@ -1,8 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException
-from auth.models import User as UserModel
-from auth.utils import get_current_active_user
-from products.schemas import ProductSearchRequest, ProductSearchResponse, PaginationInfo
-from products.services import MaxiRetailSearchService
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from database import get_async_db
+from auth.models import User as UserModel, UserRole
+from auth.utils import get_current_active_user, get_read_db
+from app.utils import ClientDisconnected, run_until_disconnected
+from app.utils.pagination import decode_cursor, set_next_cursor
+from products.schemas import (
+    ProductSearchRequest, ProductSearchResponse, PaginationInfo,
+    SavedSearchCreate, SavedSearch as SavedSearchSchema, SavedSearchChange as SavedSearchChangeSchema,
+    OrderSearchHit
+)
+from products.services import search_products_shared, highlight, search_terms
+from products.crud.async_crud import (
+    create_saved_search,
+    get_saved_search_by_query,
+    count_user_saved_searches,
+    get_user_saved_searches,
+    delete_saved_search,
+    get_saved_search_changes,
+    search_orders
+)
+from config import settings
 from datetime import datetime
 
 router = APIRouter(prefix="/search", tags=["search"])
@@ -10,6 +29,7 @@ router = APIRouter(prefix="/search", tags=["search"])
 @router.post("/products", response_model=ProductSearchResponse)
 async def search_products(
     search_request: ProductSearchRequest,
+    request: Request,
     current_user: UserModel = Depends(get_current_active_user)
 ):
     """
@@ -19,12 +39,18 @@ async def search_products(
     - **page**: Номер страницы (по умолчанию 1)
     """
     try:
-        # Поиск товаров через сервис с пагинацией
-        async with MaxiRetailSearchService() as search_service:
-            products, pagination_info = await search_service.search_products(
+        # Поиск товаров через сервис с пагинацией.
+        # Если клиент отключится, запрос к сайту и парсинг будут отменены
+        products, pagination_info = await run_until_disconnected(
+            request,
+            search_products_shared(
                 search_request.query,
                 search_request.page,
-            )
+                user_key=current_user.id,
+                user_class=current_user.role.value
+            ),
+            route="search_products"
+        )
         
         # Создаем ответ с информацией о пагинации
         response = ProductSearchResponse(
@@ -41,8 +67,129 @@ async def search_products(
         
         return response
         
+    except (ClientDisconnected, HTTPException):
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Ошибка при поиске товаров: {str(e)}"
         )
+
+@router.post("/saved", response_model=SavedSearchSchema, status_code=status.HTTP_201_CREATED)
+async def save_search(
+    saved_search: SavedSearchCreate,
+    current_user: UserModel = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Сохранение поискового запроса
+
+    Сохраненные поиски обновляются в фоне, изменения результатов
+    доступны через GET /search/saved/changes
+    """
+    query = saved_search.query.strip()
+    if await get_saved_search_by_query(db, current_user.id, query):
+        raise HTTPException(status_code=400, detail="Такой поиск уже сохранен")
+
+    if await count_user_saved_searches(db, current_user.id) >= settings.SAVED_SEARCH_MAX_PER_USER:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Можно сохранить не больше {settings.SAVED_SEARCH_MAX_PER_USER} поисков"
+        )
+
+    return await create_saved_search(db, current_user.id, query)
+
+@router.get("/saved", response_model=List[SavedSearchSchema])
+async def get_my_saved_searches(
+    current_user: UserModel = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Получение сохраненных поисков текущего пользователя
+    """
+    return await get_user_saved_searches(db, current_user.id)
+
+@router.get("/saved/changes", response_model=List[SavedSearchChangeSchema])
+async def get_my_saved_search_changes(
+    response: Response,
+    since: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    current_user: UserModel = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Изменения результатов сохраненных поисков
+
+    - **since**: Вернуть изменения, обнаруженные после этого момента
+    - **limit**: Максимальное количество изменений
+    - **cursor**: Курсор из заголовка X-Next-Cursor предыдущей страницы
+    """
+    changes = await get_saved_search_changes(
+        db, current_user.id, since=since, limit=limit, cursor=decode_cursor(cursor)
+    )
+    set_next_cursor(response, changes, limit, lambda change: (change["detected_at"], change["id"]))
+    return changes
+
+@router.delete("/saved/{saved_search_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def remove_saved_search(
+    saved_search_id: int,
+    current_user: UserModel = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Удаление сохраненного поиска
+    """
+    if not await delete_saved_search(db, saved_search_id, current_user.id):
+        raise HTTPException(status_code=404, detail="Сохраненный поиск не найден")
+
+@router.get("/orders", response_model=List[OrderSearchHit])
+async def search_orders_endpoint(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: UserModel = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Поиск заказов по названиям и заметкам продуктов
+    
+    Заказчик ищет среди своих заказов, исполнитель - среди ожидающих и
+    исполняемых, администратор - среди всех. Заказ находится, если в нем
+    есть продукт, содержащий все слова запроса. Новые заказы идут первыми;
+    найденные слова в name_highlighted и notes_highlighted выделены <mark>.
+    
+    - **q**: Поисковый запрос
+    - **cursor**: Курсор из заголовка X-Next-Cursor предыдущей страницы
+    """
+    terms = search_terms(q)
+    if not terms:
+        raise HTTPException(status_code=400, detail="Запрос не содержит слов для поиска")
+    
+    hits = await search_orders(
+        db, terms,
+        customer_id=current_user.id if current_user.role == UserRole.CUSTOMER else None,
+        active_only=current_user.role == UserRole.EXECUTOR,
+        limit=limit,
+        cursor=decode_cursor(cursor)
+    )
+    set_next_cursor(response, hits, limit, lambda hit: (hit["id"],))
+    return [
+        {
+            **hit,
+            "matches": [
+                {
+                    "id": product.id,
+                    "name": product.name,
+                    "quantity": product.quantity,
+                    "notes": product.notes,
+                    "is_purchased": bool(product.is_purchased),
+                    "name_highlighted": highlight(product.name, terms),
+                    "notes_highlighted": highlight(product.notes, terms)
+                }
+                for product in hit["products"]
+            ]
+        }
+        for hit in hits
+    ]
@@ -1,13 +1,23 @@
 from .product_schemas import (
     ProductBase, ProductCreate, ProductUpdate, Product, ProductPurchase,
-    OrderBase, OrderCreate, OrderUpdate, Order, OrderSummary, OrderStatusUpdate
+    ProductPurchaseItem, BulkProductPurchase,
+    OrderBase, OrderCreate, OrderUpdate, Order, OrderSummary, OrderStatusUpdate, ArchivedOrder,
+    ProductSearchMatch, OrderSearchHit,
+    BulkOrderItem, BulkOrderCreate, BulkOrderCreated, BulkOrderError, BulkOrderResult
 )
 from .search_schemas import (
     ProductSearchRequest, ExternalProduct, ProductSearchResponse, PaginationInfo
 )
+from .saved_search_schemas import (
+    SavedSearchCreate, SavedSearch, SavedProduct, PriceChange, SavedSearchChange
+)
 
 __all__ = [
     "ProductBase", "ProductCreate", "ProductUpdate", "Product", "ProductPurchase",
-    "OrderBase", "OrderCreate", "OrderUpdate", "Order", "OrderSummary", "OrderStatusUpdate",
-    "ProductSearchRequest", "ExternalProduct", "ProductSearchResponse", "PaginationInfo"
+    "ProductPurchaseItem", "BulkProductPurchase",
+    "OrderBase", "OrderCreate", "OrderUpdate", "Order", "OrderSummary", "OrderStatusUpdate", "ArchivedOrder",
+    "ProductSearchMatch", "OrderSearchHit",
+    "BulkOrderItem", "BulkOrderCreate", "BulkOrderCreated", "BulkOrderError", "BulkOrderResult",
+    "ProductSearchRequest", "ExternalProduct", "ProductSearchResponse", "PaginationInfo",
+    "SavedSearchCreate", "SavedSearch", "SavedProduct", "PriceChange", "SavedSearchChange"
 ]
@@ -31,12 +31,40 @@ class ProductPurchase(BaseModel):
     is_purchased: bool
     notes: Optional[str] = None
 
+class ProductPurchaseItem(BaseModel):
+    product_id: int
+    is_purchased: bool = True
+
+class BulkProductPurchase(BaseModel):
+    items: List[ProductPurchaseItem]
+
 class OrderBase(BaseModel):
     pass
 
 class OrderCreate(BaseModel):
     products: List[ProductCreate]
 
+class BulkOrderItem(OrderCreate):
+    external_ref: Optional[str] = None  # Идентификатор заказа в системе клиента
+
+class BulkOrderCreate(BaseModel):
+    orders: List[BulkOrderItem]
+
+class BulkOrderCreated(BaseModel):
+    row: int
+    order_id: int
+    external_ref: str
+    duplicate: bool = False  # Заказ с таким external_ref уже был создан раньше
+
+class BulkOrderError(BaseModel):
+    row: int
+    external_ref: Optional[str] = None
+    detail: str
+
+class BulkOrderResult(BaseModel):
+    created: List[BulkOrderCreated]
+    errors: List[BulkOrderError]
+
 class OrderUpdate(BaseModel):
     status: Optional[OrderStatus] = None
 
@@ -46,17 +74,24 @@ class Order(OrderBase):
     status: OrderStatus
     created_at: datetime
     updated_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
+    assignee_id: Optional[int] = None
+    lease_expires_at: Optional[datetime] = None
     products: List[Product]
 
     class Config:
         from_attributes = True
 
+class ArchivedOrder(Order):
+    archived_at: datetime
+
 class OrderSummary(BaseModel):
     id: int
     customer_id: int
     status: OrderStatus
     created_at: datetime
+    updated_at: Optional[datetime] = None
     total_products: int
     purchased_products: int
     is_completable: bool
@@ -64,5 +99,17 @@ class OrderSummary(BaseModel):
     class Config:
         from_attributes = True
 
+class ProductSearchMatch(BaseModel):
+    id: int
+    name: str
+    quantity: int
+    notes: Optional[str] = None
+    is_purchased: bool
+    name_highlighted: str  # Найденные слова в <mark>, текст экранирован как HTML
+    notes_highlighted: Optional[str] = None
+
+class OrderSearchHit(OrderSummary):
+    matches: List[ProductSearchMatch]
+
 class OrderStatusUpdate(BaseModel):
     status: OrderStatus
@@ -0,0 +1,40 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List, Union
+from datetime import datetime
+
+class SavedSearchCreate(BaseModel):
+    """Запрос на сохранение поиска"""
+    query: str = Field(..., min_length=1, max_length=255, description="Поисковый запрос")
+
+class SavedSearch(BaseModel):
+    """Сохраненный поиск"""
+    id: int
+    query: str
+    created_at: datetime
+    last_refreshed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class SavedProduct(BaseModel):
+    """Товар в изменениях сохраненного поиска"""
+    id: Union[str, int]
+    name: str
+    price: Optional[float] = None
+
+class PriceChange(BaseModel):
+    """Изменение цены товара"""
+    id: Union[str, int]
+    name: str
+    old_price: Optional[float] = None
+    new_price: Optional[float] = None
+
+class SavedSearchChange(BaseModel):
+    """Изменения результатов сохраненного поиска"""
+    id: int
+    saved_search_id: int
+    query: str
+    detected_at: datetime
+    added: List[SavedProduct] = []
+    removed: List[SavedProduct] = []
+    price_changed: List[PriceChange] = []
@@ -1,5 +1,24 @@
 # Products services package
 
-from .search_service import MaxiRetailSearchService, MaxiRetailSearchServiceSync
+from .search_service import (
+    MaxiRetailSearchService, MaxiRetailSearchServiceSync, search_products_shared
+)
+from .single_flight import SingleFlight
+from .fair_scheduler import FairShareScheduler
+from .saved_search_refresher import (
+    build_snapshot, diff_snapshots, refresh_saved_searches_batch, run_saved_search_refresh_loop
+)
+from .bulk_orders import ingest_orders, iter_lines, parse_csv, parse_ndjson
+from .order_events import (
+    OrderEventBus, order_event_bus, order_event_stream, run_order_event_relay
+)
+from .order_search import highlight, search_terms
 
-__all__ = ["MaxiRetailSearchService", "MaxiRetailSearchServiceSync"]
+__all__ = [
+    "MaxiRetailSearchService", "MaxiRetailSearchServiceSync", "search_products_shared",
+    "SingleFlight", "FairShareScheduler",
+    "build_snapshot", "diff_snapshots", "refresh_saved_searches_batch", "run_saved_search_refresh_loop",
+    "ingest_orders", "iter_lines", "parse_csv", "parse_ndjson",
+    "OrderEventBus", "order_event_bus", "order_event_stream", "run_order_event_relay",
+    "highlight", "search_terms"
+]
@@ -0,0 +1,73 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict
+from config import settings
+from database import AsyncSessionLocal
+from metrics import registry
+from products.crud.async_crud import (
+    archive_orders_batch, archive_search_history_batch, maintain_archive_partitions
+)
+
+archived_rows = registry.counter(
+    "archived_rows_total",
+    "Строки, перенесенные в архивные таблицы"
+)
+
+async def _archive_in_batches(archive_batch, before: datetime) -> int:
+    """
+    Переносит строки пачками по ARCHIVE_BATCH_SIZE с паузой между пачками
+
+    Каждая пачка - отдельная короткая транзакция в своей сессии: блокировки
+    не держатся долго, а пауза оставляет БД запас для рабочих запросов.
+    """
+    total = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            moved = await archive_batch(db, before, settings.ARCHIVE_BATCH_SIZE)
+        total += moved
+        if moved < settings.ARCHIVE_BATCH_SIZE:
+            return total
+        await asyncio.sleep(settings.ARCHIVE_BATCH_PAUSE)
+
+async def run_archive_pass() -> Dict:
+    """
+    Один проход архивации
+
+    Returns:
+        Количество перенесенных заказов и записей истории поиска
+        и изменения секций архивных таблиц
+    """
+    now = datetime.utcnow()
+    orders = await _archive_in_batches(
+        archive_orders_batch, now - timedelta(days=settings.ARCHIVE_ORDERS_AFTER_DAYS)
+    )
+    archived_rows.inc(orders, table="orders")
+    search_history = await _archive_in_batches(
+        archive_search_history_batch, now - timedelta(days=settings.ARCHIVE_SEARCH_HISTORY_AFTER_DAYS)
+    )
+    archived_rows.inc(search_history, table="search_history")
+
+    partitions = {}
+    if settings.ARCHIVE_PARTITIONING:
+        drop_before = None
+        if settings.ARCHIVE_RETENTION_DAYS > 0:
+            drop_before = (now - timedelta(days=settings.ARCHIVE_RETENTION_DAYS)).date()
+        async with AsyncSessionLocal() as db:
+            partitions = await maintain_archive_partitions(
+                db, now.date(), settings.ARCHIVE_PARTITIONS_AHEAD, drop_before
+            )
+    return {"orders": orders, "search_history": search_history, "partitions": partitions}
+
+async def run_archive_loop(interval: float) -> None:
+    """Периодическая архивация завершенных заказов и старой истории поиска"""
+    while True:
+        try:
+            result = await run_archive_pass()
+            if result["orders"] or result["search_history"] or result["partitions"]:
+                print(
+                    f"Архивация: заказов {result['orders']}, "
+                    f"записей истории поиска {result['search_history']}"
+                )
+        except Exception as e:
+            print(f"Ошибка архивации: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,148 @@
+import codecs
+import csv
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from metrics import registry
+from products.crud.async_crud import create_orders_bulk
+from products.schemas import BulkOrderItem, ProductCreate
+
+bulk_orders_created = registry.counter(
+    "bulk_orders_created_total",
+    "Заказы, созданные массовой загрузкой"
+)
+bulk_orders_rejected = registry.counter(
+    "bulk_orders_rejected_total",
+    "Строки массовой загрузки заказов, отклоненные с ошибкой"
+)
+
+# Колонки CSV: строки с одинаковым external_ref подряд - продукты одного заказа
+CSV_COLUMNS = ("external_ref", "name", "quantity", "notes")
+
+# Строка загрузки: (номер строки, заказ или текст ошибки разбора)
+ParsedRow = Tuple[int, Union[BulkOrderItem, str]]
+
+async def iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    """Построчное чтение тела запроса (UTF-8) без загрузки его в память целиком"""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer = ""
+    line_number = 0
+    async for chunk in stream:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            line_number += 1
+            yield line_number, line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield line_number + 1, buffer.rstrip("\r")
+
+def _validation_detail(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" if item["loc"] else item["msg"]
+        for item in error.errors()
+    )
+
+async def parse_ndjson(lines: AsyncIterator[Tuple[int, str]]) -> AsyncIterator[ParsedRow]:
+    """NDJSON: по заказу {"external_ref": ..., "products": [...]} в каждой строке"""
+    async for line_number, line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield line_number, BulkOrderItem.model_validate_json(line)
+        except ValidationError as e:
+            yield line_number, _validation_detail(e)
+
+def _csv_product(values: List[str]) -> ProductCreate:
+    _, name, quantity, notes = (values + [""] * len(CSV_COLUMNS))[:len(CSV_COLUMNS)]
+    return ProductCreate(name=name, quantity=quantity or 1, notes=notes or None)
+
+async def parse_csv(lines: AsyncIterator[Tuple[int, str]]) -> AsyncIterator[ParsedRow]:
+    """
+    CSV с заголовком external_ref,name,quantity,notes
+
+    Каждая строка - продукт; строки с одинаковым external_ref подряд
+    собираются в один заказ, номер строки заказа - номер первой строки.
+    """
+    header_checked = False
+    current: Optional[Tuple[int, str, List[ProductCreate]]] = None
+    async for line_number, line in lines:
+        if not line.strip():
+            continue
+        values = next(csv.reader([line]))
+        if not header_checked:
+            header_checked = True
+            if tuple(value.strip().lower() for value in values) != CSV_COLUMNS:
+                yield line_number, f"Ожидается заголовок CSV: {','.join(CSV_COLUMNS)}"
+                return
+            continue
+
+        ref = values[0].strip()
+        if not ref:
+            yield line_number, "Не указан external_ref"
+            continue
+        try:
+            product = _csv_product(values)
+        except ValidationError as e:
+            yield line_number, _validation_detail(e)
+            continue
+
+        if current is not None and current[1] == ref:
+            current[2].append(product)
+            continue
+        if current is not None:
+            yield current[0], BulkOrderItem(external_ref=current[1], products=current[2])
+        current = (line_number, ref, [product])
+
+    if current is not None:
+        yield current[0], BulkOrderItem(external_ref=current[1], products=current[2])
+
+async def ingest_orders(db: AsyncSession, customer_id: int, rows: AsyncIterator[ParsedRow]) -> Dict:
+    """
+    Создает заказы пачками по BULK_ORDERS_BATCH_SIZE, каждая пачка - одна транзакция
+
+    Ошибка сохранения пачки не прерывает загрузку: строки пачки попадают в ошибки.
+
+    Returns:
+        Словарь created/errors для BulkOrderResult
+    """
+    created: List[Dict] = []
+    errors: List[Dict] = []
+    batch: List[Tuple[int, BulkOrderItem]] = []
+
+    async def flush() -> None:
+        try:
+            batch_created, batch_errors = await create_orders_bulk(db, customer_id, batch)
+        except SQLAlchemyError as e:
+            await db.rollback()
+            print(f"Ошибка сохранения пачки заказов: {e}")
+            batch_created = []
+            batch_errors = [
+                {"row": row, "external_ref": item.external_ref, "detail": "Ошибка сохранения пачки заказов"}
+                for row, item in batch
+            ]
+        created.extend(batch_created)
+        errors.extend(batch_errors)
+        batch.clear()
+
+    count = 0
+    async for row, item in rows:
+        count += 1
+        if count > settings.BULK_ORDERS_MAX_ROWS:
+            errors.append({"row": row, "detail": f"Превышен лимит {settings.BULK_ORDERS_MAX_ROWS} заказов, загрузка остановлена"})
+            break
+        if isinstance(item, str):
+            errors.append({"row": row, "detail": item})
+            continue
+        batch.append((row, item))
+        if len(batch) >= settings.BULK_ORDERS_BATCH_SIZE:
+            await flush()
+    if batch:
+        await flush()
+
+    bulk_orders_created.inc(sum(1 for result in created if not result["duplicate"]))
+    bulk_orders_rejected.inc(len(errors))
+    errors.sort(key=lambda error: error["row"])
+    return {"created": created, "errors": errors}
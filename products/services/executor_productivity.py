@@ -0,0 +1,91 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, List, Sequence
+import numpy as np
+from config import settings
+from database import AsyncSessionLocal
+from products.crud.async_crud import get_purchases_since, replace_executor_productivity
+
+def _group_medians(groups: np.ndarray, values: np.ndarray) -> Dict[int, float]:
+    """Медиана values для каждой группы (одна сортировка на все группы)"""
+    if not len(values):
+        return {}
+    order = np.lexsort((values, groups))
+    groups, values = groups[order], values[order]
+    keys, starts, counts = np.unique(groups, return_index=True, return_counts=True)
+    medians = (values[starts + (counts - 1) // 2] + values[starts + counts // 2]) / 2
+    return dict(zip(keys.tolist(), medians.tolist()))
+
+def summarize_purchases(purchases, now: datetime, windows: Sequence[int]) -> List[Dict]:
+    """
+    Сводка продуктивности по окнам из строк get_purchases_since
+
+    Для каждого окна и исполнителя: купленные продукты, завершенные заказы,
+    в которых он покупал (заказ с несколькими исполнителями засчитывается
+    каждому), и медиана времени между соседними покупками в секундах.
+    """
+    if not purchases:
+        return []
+    executors = np.array([row.purchased_by for row in purchases], dtype=np.int64)
+    order_ids = np.array([row.order_id for row in purchases], dtype=np.int64)
+    times = np.array([row.purchased_at.replace(tzinfo=None) for row in purchases], dtype="datetime64[us]")
+    completed = np.array(
+        [row.completed_at.replace(tzinfo=None) if row.completed_at else None for row in purchases],
+        dtype="datetime64[us]"
+    )
+
+    summary = []
+    for window_days in windows:
+        since = np.datetime64(now - timedelta(days=window_days), "us")
+        in_window = times >= since
+        window_executors, window_times = executors[in_window], times[in_window]
+
+        items = dict(zip(*(part.tolist() for part in np.unique(window_executors, return_counts=True))))
+
+        # Интервалы между соседними покупками одного исполнителя
+        order = np.lexsort((window_times, window_executors))
+        sorted_executors, sorted_times = window_executors[order], window_times[order]
+        same = sorted_executors[1:] == sorted_executors[:-1]
+        intervals = (np.diff(sorted_times)[same] / np.timedelta64(1, "s")).astype(float)
+        medians = _group_medians(sorted_executors[1:][same], intervals)
+
+        # Заказы, завершенные в окне (покупки в них могли быть и раньше)
+        done = ~np.isnat(completed) & (completed >= since)
+        pairs = np.unique(np.stack([executors[done], order_ids[done]], axis=1), axis=0)
+        orders = dict(zip(*(part.tolist() for part in np.unique(pairs[:, 0], return_counts=True))))
+
+        for executor_id in sorted(set(items) | set(orders)):
+            summary.append({
+                "window_days": window_days,
+                "executor_id": executor_id,
+                "items_purchased": items.get(executor_id, 0),
+                "orders_completed": orders.get(executor_id, 0),
+                "median_purchase_interval": medians.get(executor_id)
+            })
+    return summary
+
+async def refresh_executor_productivity() -> int:
+    """
+    Пересчитывает сводку за все окна EXECUTOR_STATS_WINDOWS
+
+    Покупки читаются один раз за самое длинное окно.
+
+    Returns:
+        Количество строк сводки
+    """
+    now = datetime.utcnow()
+    windows = settings.EXECUTOR_STATS_WINDOWS
+    async with AsyncSessionLocal() as db:
+        purchases = await get_purchases_since(db, now - timedelta(days=max(windows)))
+        # Расчет по всем покупкам окна - CPU-работа: выполняем вне event loop
+        summary = await asyncio.to_thread(summarize_purchases, purchases, now, windows)
+        return await replace_executor_productivity(db, summary, now)
+
+async def run_productivity_refresh_loop(interval: float) -> None:
+    """Периодический пересчет сводки продуктивности исполнителей"""
+    while True:
+        try:
+            await refresh_executor_productivity()
+        except Exception as e:
+            print(f"Ошибка пересчета продуктивности исполнителей: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,195 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Hashable
+from fastapi import HTTPException
+from config import settings
+from metrics import registry
+
+queue_wait = registry.histogram(
+    "search_scheduler_wait_seconds",
+    "Время ожидания доступа к внешнему сервису поиска по классам пользователей"
+)
+queued_requests = registry.gauge(
+    "search_scheduler_queued",
+    "Запросы в очереди к внешнему сервису поиска по классам пользователей"
+)
+rejected_requests = registry.counter(
+    "search_scheduler_rejected_total",
+    "Запросы, отклоненные из-за переполнения очереди пользователя"
+)
+
+def parse_weights(raw: str) -> Dict[str, float]:
+    """
+    Разбирает веса классов пользователей из строки вида "executor:3,customer:1"
+
+    Args:
+        raw: Строка с весами
+
+    Returns:
+        Словарь класс -> вес
+
+    Raises:
+        ValueError: Вес не является положительным числом
+    """
+    weights = {}
+    for item in raw.split(","):
+        if not item.strip():
+            continue
+        name, _, weight = item.partition(":")
+        weights[name.strip()] = float(weight)
+    _check_weights(weights)
+    return weights
+
+def _check_weights(weights: Dict[str, float]) -> None:
+    # С нулевым или отрицательным весом квант пользователя никогда не
+    # накапливается, и _dispatch крутится в бесконечном цикле
+    for name, weight in weights.items():
+        if not weight > 0:
+            raise ValueError(f"Вес класса {name} должен быть положительным: {weight}")
+
+class _Waiter:
+    """Запрос, ожидающий доступа к сервису"""
+
+    def __init__(self, user_class: str):
+        self.user_class = user_class
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.perf_counter()
+
+class FairShareScheduler:
+    """
+    Справедливое распределение доступа к внешнему сервису между пользователями
+
+    Одновременно выполняется не больше capacity запросов. Ожидающие запросы
+    складываются в очереди по пользователям, очереди обслуживаются по
+    алгоритму deficit round-robin: за проход пользователь получает квант,
+    равный весу его класса, и каждый обслуженный запрос тратит единицу.
+    Поэтому один пользователь с сотнями запросов не вытесняет остальных,
+    а классы с большим весом (исполнители) получают пропорционально больше.
+    """
+
+    def __init__(self, capacity: int, weights: Dict[str, float],
+                 default_weight: float = 1.0, max_queue_per_user: int = 20):
+        _check_weights({**weights, "по умолчанию": default_weight})
+        self.capacity = capacity
+        self.weights = weights
+        self.default_weight = default_weight
+        self.max_queue_per_user = max_queue_per_user
+        self._in_use = 0
+        self._queues: Dict[Hashable, Deque[_Waiter]] = {}
+        self._deficit: Dict[Hashable, float] = {}
+        self._active: Deque[Hashable] = deque()
+
+    @property
+    def in_use(self) -> int:
+        """Количество выполняющихся запросов"""
+        return self._in_use
+
+    def queued(self, user_key: Hashable) -> int:
+        """Количество ожидающих запросов пользователя"""
+        return len(self._queues.get(user_key, ()))
+
+    @asynccontextmanager
+    async def slot(self, user_key: Hashable, user_class: str) -> AsyncIterator[None]:
+        """
+        Занимает место для запроса к сервису на время блока
+
+        Args:
+            user_key: Идентификатор пользователя (ключ очереди)
+            user_class: Класс пользователя, определяет вес
+        """
+        await self._acquire(user_key, user_class)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, user_key: Hashable, user_class: str) -> None:
+        if self._in_use < self.capacity and not self._active:
+            self._in_use += 1
+            queue_wait.observe(0.0, user_class=user_class)
+            return
+
+        queue = self._queues.get(user_key)
+        if queue is not None and len(queue) >= self.max_queue_per_user:
+            rejected_requests.inc(user_class=user_class)
+            raise HTTPException(
+                status_code=429,
+                detail="Слишком много одновременных поисковых запросов"
+            )
+
+        waiter = _Waiter(user_class)
+        if queue is None:
+            queue = self._queues[user_key] = deque()
+            self._deficit[user_key] = 0.0
+            self._active.append(user_key)
+        queue.append(waiter)
+        queued_requests.inc(user_class=user_class)
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Место уже выдано, но запрос отменен: возвращаем его
+                self._release()
+            else:
+                self._remove(user_key, waiter)
+            raise
+
+    def _remove(self, user_key: Hashable, waiter: _Waiter) -> None:
+        """Убирает отмененный запрос из очереди пользователя"""
+        queue = self._queues.get(user_key)
+        if queue is None or waiter not in queue:
+            return
+        queue.remove(waiter)
+        queued_requests.dec(user_class=waiter.user_class)
+        if not queue:
+            self._drop_user(user_key)
+
+    def _drop_user(self, user_key: Hashable) -> None:
+        del self._queues[user_key]
+        del self._deficit[user_key]
+        self._active.remove(user_key)
+
+    def _release(self) -> None:
+        self._in_use -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Выдает свободные места ожидающим запросам по deficit round-robin"""
+        while self._in_use < self.capacity and self._active:
+            user_key = self._active[0]
+            queue = self._queues[user_key]
+
+            if self._deficit[user_key] < 1:
+                self._deficit[user_key] += self.weights.get(queue[0].user_class, self.default_weight)
+                if self._deficit[user_key] < 1:
+                    # Вес меньше единицы: квант копится несколько проходов
+                    self._active.rotate(-1)
+                    continue
+
+            waiter = queue.popleft()
+            if waiter.future.done():
+                # Запрос отменен, но еще не успел убрать себя из очереди
+                queued_requests.dec(user_class=waiter.user_class)
+                if not queue:
+                    self._drop_user(user_key)
+                continue
+
+            self._deficit[user_key] -= 1
+            self._in_use += 1
+            queued_requests.dec(user_class=waiter.user_class)
+            queue_wait.observe(time.perf_counter() - waiter.enqueued_at, user_class=waiter.user_class)
+            waiter.future.set_result(None)
+
+            if not queue:
+                self._drop_user(user_key)
+            elif self._deficit[user_key] < 1:
+                self._active.rotate(-1)
+
+upstream_scheduler = FairShareScheduler(
+    capacity=settings.SEARCH_UPSTREAM_CONCURRENCY,
+    weights=parse_weights(settings.SEARCH_FAIR_WEIGHTS),
+    max_queue_per_user=settings.SEARCH_FAIR_MAX_QUEUE_PER_USER
+)
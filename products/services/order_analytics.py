@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from products.crud.async_crud import get_order_stats, get_order_latency_histograms
+from products.crud.order_stats_crud import (
+    TRANSITIONS, TIME_TO_START, TIME_TO_COMPLETE, LATENCY_BIN_BASE, LATENCY_BINS
+)
+
+# Длительность интервала ответа
+GRANULARITIES = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+METRICS = (TIME_TO_START, TIME_TO_COMPLETE)
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    """Начало интервала, в который попадает moment"""
+    moment = moment.replace(minute=0, second=0, microsecond=0, tzinfo=None)
+    if granularity == "day":
+        moment = moment.replace(hour=0)
+    return moment
+
+def bucket_count(start: datetime, end: datetime, granularity: str) -> int:
+    """Количество интервалов в [start, end)"""
+    step = GRANULARITIES[granularity]
+    return max(-(-(end - bucket_start(start, granularity)) // step), 0)
+
+def _bucket_index(buckets: Sequence[datetime], origin: datetime, step: timedelta) -> np.ndarray:
+    moments = np.array(buckets, dtype="datetime64[s]")
+    return ((moments - np.datetime64(origin, "s")) // np.timedelta64(step)).astype(np.int64)
+
+def histogram_percentiles(histograms: np.ndarray, percentiles: Sequence[float]) -> np.ndarray:
+    """
+    Перцентили длительностей по гистограммам
+
+    Args:
+        histograms: Массив (интервалы, LATENCY_BINS) с количеством заказов в bin
+        percentiles: Перцентили от 0 до 100
+
+    Returns:
+        Массив (интервалы, перцентили) в секундах: середина bin (в логарифмической
+        шкале), в котором накопленное количество достигает перцентиля; NaN для
+        интервалов без заказов
+    """
+    cumulative = np.cumsum(histograms, axis=-1)
+    totals = cumulative[:, -1]
+    targets = np.maximum(np.ceil(totals[:, None] * np.asarray(percentiles, dtype=float) / 100.0), 1)
+    bins = (cumulative[:, None, :] < targets[:, :, None]).sum(axis=-1)
+    values = LATENCY_BIN_BASE ** (np.minimum(bins, LATENCY_BINS - 1) + 0.5)
+    return np.where(totals[:, None] > 0, values, np.nan)
+
+def _percentile_dicts(values: np.ndarray, labels: List[str]) -> List[Dict[str, Optional[float]]]:
+    return [
+        {label: None if np.isnan(value) else round(float(value), 1) for label, value in zip(labels, row)}
+        for row in values
+    ]
+
+def percentile_label(percentile: float) -> str:
+    return f"p{percentile:g}"
+
+def build_order_analytics(stats_rows, latency_rows, start: datetime, end: datetime,
+                          granularity: str, percentiles: Sequence[float]) -> Dict:
+    """
+    Счетчики переходов и перцентили длительностей по интервалам
+
+    Почасовые строки сводятся в массивы (интервал x переход и
+    метрика x интервал x bin) через np.add.at, перцентили всех интервалов
+    считаются одной векторной операцией.
+
+    Args:
+        stats_rows: Строки get_order_stats
+        latency_rows: Строки get_order_latency_histograms
+    """
+    step = GRANULARITIES[granularity]
+    origin = bucket_start(start, granularity)
+    count = bucket_count(start, end, granularity)
+    labels = [percentile_label(percentile) for percentile in percentiles]
+
+    counters = np.zeros((count, len(TRANSITIONS)), dtype=np.int64)
+    if stats_rows:
+        index = _bucket_index([row.bucket for row in stats_rows], origin, step)
+        values = np.array([[getattr(row, name) or 0 for name in TRANSITIONS] for row in stats_rows], dtype=np.int64)
+        inside = (index >= 0) & (index < count)
+        np.add.at(counters, index[inside], values[inside])
+
+    histograms = np.zeros((len(METRICS), count, LATENCY_BINS), dtype=np.int64)
+    if latency_rows:
+        index = _bucket_index([row.bucket for row in latency_rows], origin, step)
+        metric_index = np.array([METRICS.index(row.metric) if row.metric in METRICS else -1 for row in latency_rows])
+        bins = np.clip(np.array([row.bin for row in latency_rows]), 0, LATENCY_BINS - 1)
+        values = np.array([row.count for row in latency_rows], dtype=np.int64)
+        inside = (index >= 0) & (index < count) & (metric_index >= 0)
+        np.add.at(histograms, (metric_index[inside], index[inside], bins[inside]), values[inside])
+
+    by_bucket = {
+        metric: _percentile_dicts(histogram_percentiles(histograms[position], percentiles), labels)
+        for position, metric in enumerate(METRICS)
+    }
+    overall = {
+        metric: _percentile_dicts(histogram_percentiles(histograms[position].sum(axis=0)[None, :], percentiles), labels)[0]
+        for position, metric in enumerate(METRICS)
+    }
+
+    buckets = [
+        {
+            "start": origin + step * position,
+            **dict(zip(TRANSITIONS, map(int, counters[position]))),
+            **{metric: by_bucket[metric][position] for metric in METRICS}
+        }
+        for position in range(count)
+    ]
+    return {
+        "start": origin,
+        "end": end,
+        "granularity": granularity,
+        "percentiles": list(percentiles),
+        "totals": {
+            "start": origin,
+            **dict(zip(TRANSITIONS, map(int, counters.sum(axis=0)))),
+            **overall
+        },
+        "buckets": buckets
+    }
+
+async def get_order_analytics(db: AsyncSession, start: datetime, end: datetime,
+                              granularity: str, percentiles: Sequence[float]) -> Dict:
+    """Аналитика заказов за [start, end) из почасовых счетчиков (таблица orders не читается)"""
+    origin = bucket_start(start, granularity)
+    stats_rows = await get_order_stats(db, origin, end)
+    latency_rows = await get_order_latency_histograms(db, origin, end)
+    return build_order_analytics(stats_rows, latency_rows, start, end, granularity, percentiles)
@@ -0,0 +1,218 @@
+import asyncio
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Set
+from config import settings
+from database import AsyncSessionLocal
+from metrics import registry
+from products.crud.async_crud import (
+    get_last_order_event_id, get_order_events_after, delete_order_events_before
+)
+
+published_events = registry.counter(
+    "order_events_published_total",
+    "События заказов, разосланные подписчикам процесса"
+)
+dropped_subscribers = registry.counter(
+    "order_events_dropped_subscribers_total",
+    "Подписчики, отключенные из-за переполнения очереди событий"
+)
+
+# Заголовки SSE ответа: без кэширования и буферизации в прокси
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+# Интервал очистки старых событий
+CLEANUP_INTERVAL = 3600
+# Больший разрыв нумерации не отслеживается (скачок auto_increment после рестарта БД)
+MAX_TRACKED_GAP = 1000
+
+class Subscription:
+    """Подписка на события заказов: очередь событий одного клиента"""
+
+    def __init__(self, queue_size: int, customer_id: Optional[int] = None,
+                 order_ids: Optional[List[int]] = None):
+        self.customer_id = customer_id
+        self.order_ids = set(order_ids) if order_ids else None
+        self.queue: "asyncio.Queue[Optional[Dict]]" = asyncio.Queue(queue_size)
+        self.closed = False
+
+    def matches(self, event: Dict) -> bool:
+        if self.customer_id is not None and event["customer_id"] != self.customer_id:
+            return False
+        return self.order_ids is None or event["order_id"] in self.order_ids
+
+    def close(self) -> None:
+        """Закрывает подписку: поток событий завершится, клиент переподключится"""
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+class OrderEventBus:
+    """
+    Раздача событий заказов подписчикам внутри процесса
+
+    Заказчик подписывается на свои заказы, исполнитель - на все заказы
+    или на выбранные. Медленный подписчик, у которого переполнилась
+    очередь, отключается и при переподключении дочитывает пропущенное
+    по Last-Event-ID из таблицы событий.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscriptions: Set[Subscription] = set()
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    @contextmanager
+    def subscribe(self, customer_id: Optional[int] = None,
+                  order_ids: Optional[List[int]] = None) -> Iterator[Subscription]:
+        subscription = Subscription(self.queue_size, customer_id, order_ids)
+        self._subscriptions.add(subscription)
+        try:
+            yield subscription
+        finally:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event: Dict) -> int:
+        """
+        Отправляет событие подходящим подписчикам
+
+        Returns:
+            Количество подписчиков, получивших событие
+        """
+        delivered = 0
+        for subscription in list(self._subscriptions):
+            if subscription.closed or not subscription.matches(event):
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+                delivered += 1
+            except asyncio.QueueFull:
+                dropped_subscribers.inc()
+                subscription.close()
+        return delivered
+
+def format_sse(event: Dict) -> str:
+    """Событие в формате text/event-stream"""
+    data = json.dumps(
+        {key: value for key, value in event.items() if key != "customer_id"},
+        ensure_ascii=False, default=str
+    )
+    return f"id: {event['id']}\nevent: {event['event_type']}\ndata: {data}\n\n"
+
+class _GapTracker:
+    """
+    Пропуски в нумерации событий
+
+    Id выдается при вставке, а видно событие становится после commit, поэтому
+    событие с меньшим id может появиться позже события с большим. Пропущенные
+    id перечитываются, пока не появятся или не истечет ORDER_EVENTS_GAP_TIMEOUT
+    (пропуск мог остаться от отмененной транзакции).
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self._gaps: Dict[int, float] = {}
+
+    def ids(self) -> List[int]:
+        now = time.monotonic()
+        self._gaps = {event_id: seen for event_id, seen in self._gaps.items() if now - seen < self.timeout}
+        return list(self._gaps)
+
+    def update(self, last_id: int, events: List[Dict]) -> int:
+        """Учитывает прочитанные события и возвращает новый последний id"""
+        now = time.monotonic()
+        for event in events:
+            event_id = event["id"]
+            if event_id in self._gaps:
+                del self._gaps[event_id]
+                continue
+            if event_id - last_id - 1 <= MAX_TRACKED_GAP:
+                for missing in range(last_id + 1, event_id):
+                    self._gaps.setdefault(missing, now)
+            last_id = max(last_id, event_id)
+        return last_id
+
+async def run_order_event_relay(bus: OrderEventBus, interval: float) -> None:
+    """
+    Читает новые события из таблицы order_events и раздает их подписчикам процесса
+
+    Один опрос БД на воркер вместо опроса эндпоинтов каждым клиентом.
+    Опрос идет и без подписчиков: иначе события между началом опроса и
+    дочитыванием по Last-Event-ID у первого подписчика могли бы потеряться.
+    """
+    last_id: Optional[int] = None
+    gaps = _GapTracker(settings.ORDER_EVENTS_GAP_TIMEOUT)
+    cleaned_at = 0.0
+    while True:
+        events: List[Dict] = []
+        try:
+            async with AsyncSessionLocal() as db:
+                if time.monotonic() - cleaned_at >= CLEANUP_INTERVAL:
+                    cleaned_at = time.monotonic()
+                    before = datetime.utcnow() - timedelta(seconds=settings.ORDER_EVENTS_RETENTION)
+                    await delete_order_events_before(db, before)
+                if last_id is None:
+                    last_id = await get_last_order_event_id(db)
+                else:
+                    events = await get_order_events_after(
+                        db, last_id, settings.ORDER_EVENTS_BATCH_SIZE, extra_ids=gaps.ids()
+                    )
+            if events:
+                last_id = gaps.update(last_id, events)
+                for event in events:
+                    bus.publish(event)
+                published_events.inc(len(events))
+        except Exception as e:
+            print(f"Ошибка раздачи событий заказов: {e}")
+        if len(events) < settings.ORDER_EVENTS_BATCH_SIZE:
+            await asyncio.sleep(interval)
+
+async def order_event_stream(bus: OrderEventBus, customer_id: Optional[int] = None,
+                             order_ids: Optional[List[int]] = None,
+                             last_event_id: Optional[int] = None) -> AsyncIterator[str]:
+    """
+    Поток событий для SSE ответа
+
+    Подписка оформляется до чтения пропущенных событий, поэтому между
+    дочитыванием и живыми событиями ничего не теряется; повторы отсекаются по id.
+    Пропущенное дочитывается пачками по ORDER_EVENTS_BATCH_SIZE до неполной пачки.
+    """
+    with bus.subscribe(customer_id, order_ids) as subscription:
+        replayed: Set[int] = set()
+        after_id = last_event_id
+        while after_id is not None:
+            # Сессия на пачку: соединение не держится, пока клиент читает события
+            async with AsyncSessionLocal() as db:
+                missed = await get_order_events_after(
+                    db, after_id, settings.ORDER_EVENTS_BATCH_SIZE,
+                    customer_id=customer_id, order_ids=order_ids
+                )
+            for event in missed:
+                replayed.add(event["id"])
+                yield format_sse(event)
+            after_id = missed[-1]["id"] if len(missed) >= settings.ORDER_EVENTS_BATCH_SIZE else None
+
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), settings.ORDER_EVENTS_HEARTBEAT)
+            except asyncio.TimeoutError:
+                # Комментарий SSE не дает прокси закрыть простаивающее соединение
+                yield ": ping\n\n"
+                continue
+            if event is None:
+                break
+            if event["id"] in replayed:
+                continue
+            yield format_sse(event)
+
+order_event_bus = OrderEventBus(queue_size=settings.ORDER_EVENTS_QUEUE_SIZE)
+
+registry.gauge(
+    "order_events_subscribers", "Подписчики на события заказов в процессе",
+    callback=lambda: {(): float(len(order_event_bus))}
+)
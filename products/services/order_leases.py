@@ -0,0 +1,32 @@
+import asyncio
+from database import AsyncSessionLocal
+from metrics import registry
+from products.crud.async_crud import release_expired_leases
+
+# Заказы, возвращаемые в очередь за один проход
+RELEASE_BATCH_SIZE = 500
+
+released_leases = registry.counter(
+    "order_leases_released_total",
+    "Заказы, возвращенные в очередь по истечении аренды"
+)
+
+async def run_lease_release_loop(interval: float) -> None:
+    """
+    Периодически возвращает в очередь заказы с истекшей арендой
+
+    Задача запускается в каждом воркере; заказы выбираются с блокировкой,
+    поэтому один заказ не возвращается дважды.
+    """
+    while True:
+        released = 0
+        try:
+            async with AsyncSessionLocal() as db:
+                released = await release_expired_leases(db, RELEASE_BATCH_SIZE)
+            if released:
+                released_leases.inc(released)
+                print(f"Заказы с истекшей арендой возвращены в очередь: {released}")
+        except Exception as e:
+            print(f"Ошибка возврата заказов с истекшей арендой: {e}")
+        if released < RELEASE_BATCH_SIZE:
+            await asyncio.sleep(interval)
@@ -0,0 +1,36 @@
+import html
+import re
+from typing import List, Optional
+
+# Не больше стольких слов запроса учитывается при поиске
+MAX_TERMS = 8
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+def search_terms(query: str) -> List[str]:
+    """Слова поискового запроса в нижнем регистре без повторов"""
+    terms: List[str] = []
+    for word in _WORD.findall(query.lower()):
+        if word not in terms:
+            terms.append(word)
+    return terms[:MAX_TERMS]
+
+def highlight(text: Optional[str], terms: List[str]) -> Optional[str]:
+    """
+    Текст с найденными словами в <mark>
+
+    Текст экранируется как HTML, поэтому результат можно вставлять в разметку.
+    """
+    if text is None:
+        return None
+    if not terms:
+        return html.escape(text)
+    pattern = re.compile("|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True)), re.IGNORECASE)
+    parts = []
+    position = 0
+    for match in pattern.finditer(text):
+        parts.append(html.escape(text[position:match.start()]))
+        parts.append(f"<mark>{html.escape(match.group())}</mark>")
+        position = match.end()
+    parts.append(html.escape(text[position:]))
+    return "".join(parts)
@@ -0,0 +1,148 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional, TypeVar
+from fastapi import HTTPException
+from config import settings
+from metrics import registry
+
+T = TypeVar("T")
+
+parse_queue_depth = registry.gauge(
+    "search_parser_queue_depth",
+    "Задачи парсинга в пуле (выполняются и ждут очереди)"
+)
+parse_duration = registry.histogram(
+    "search_parser_duration_seconds",
+    "Время парсинга страницы выдачи, включая ожидание в очереди пула"
+)
+parse_timeouts = registry.counter(
+    "search_parser_timeouts_total",
+    "Задачи парсинга, не уложившиеся в таймаут"
+)
+parse_rejected = registry.counter(
+    "search_parser_rejected_total",
+    "Задачи парсинга, отклоненные из-за переполнения очереди"
+)
+
+class ParserPool:
+    """
+    Ограниченный пул для CPU-нагруженного парсинга вне event loop
+
+    В пуле одновременно находится не больше max_workers + max_queue задач,
+    остальные отклоняются сразу с HTTP 503. Каждая задача ограничена
+    таймаутом. Задача, уже начавшая выполняться в процессе, не может быть
+    прервана, поэтому она продолжает занимать место в очереди до завершения.
+    """
+
+    def __init__(self, kind: str, max_workers: int, max_queue: int, timeout: float):
+        if kind not in ("process", "thread"):
+            raise ValueError(f"Неизвестный тип пула парсинга: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor: Optional[Executor] = None
+        self._in_pool = 0
+
+    @property
+    def depth(self) -> int:
+        """Количество задач в пуле"""
+        return self._in_pool
+
+    def _get_executor(self) -> Executor:
+        """Создает пул при первом обращении"""
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="search-parser"
+                )
+        return self._executor
+
+    def _discard_executor(self, executor: Executor) -> None:
+        """Останавливает сломанный пул; следующая задача создаст новый"""
+        if self._executor is executor:
+            self._executor = None
+        executor.shutdown(wait=False)
+
+    def _release(self, _future) -> None:
+        self._in_pool -= 1
+        parse_queue_depth.set(self._in_pool, kind=self.kind)
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        """
+        Выполняет функцию в пуле
+
+        Args:
+            func: Функция уровня модуля (должна сериализоваться для процессов)
+            *args: Аргументы функции
+
+        Returns:
+            Результат функции
+        """
+        if self._in_pool >= self.max_workers + self.max_queue:
+            parse_rejected.inc(kind=self.kind)
+            raise HTTPException(
+                status_code=503,
+                detail="Сервис поиска перегружен, повторите запрос позже"
+            )
+
+        started = time.perf_counter()
+        executor = self._get_executor()
+        try:
+            future = executor.submit(func, *args)
+        except BrokenProcessPool:
+            # Процесс пула упал: пересоздаем пул и пробуем еще раз
+            self._discard_executor(executor)
+            executor = self._get_executor()
+            future = executor.submit(func, *args)
+
+        # Место в очереди освобождается, только когда задача действительно завершилась
+        self._in_pool += 1
+        parse_queue_depth.set(self._in_pool, kind=self.kind)
+        loop = asyncio.get_running_loop()
+
+        def on_done(done_future):
+            try:
+                loop.call_soon_threadsafe(self._release, done_future)
+            except RuntimeError:
+                # Event loop уже закрыт при остановке приложения
+                pass
+
+        future.add_done_callback(on_done)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            parse_timeouts.inc(kind=self.kind)
+            raise HTTPException(
+                status_code=504,
+                detail="Превышено время разбора результатов поиска"
+            )
+        except BrokenProcessPool:
+            # Процесс пула упал во время выполнения задачи
+            self._discard_executor(executor)
+            raise HTTPException(
+                status_code=503,
+                detail="Сервис поиска временно недоступен, повторите запрос позже"
+            )
+        finally:
+            parse_duration.observe(time.perf_counter() - started, kind=self.kind)
+
+    def shutdown(self) -> None:
+        """Останавливает пул, не дожидаясь незапущенных задач"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+parser_pool = ParserPool(
+    kind=settings.SEARCH_PARSER_EXECUTOR,
+    max_workers=settings.SEARCH_PARSER_WORKERS,
+    max_queue=settings.SEARCH_PARSER_MAX_QUEUE,
+    timeout=settings.SEARCH_PARSER_TIMEOUT
+)
@@ -0,0 +1,138 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from config import settings
+from database import AsyncSessionLocal
+from metrics import registry
+from products.crud.async_crud import (
+    claim_due_saved_searches, release_saved_searches, save_refresh_results
+)
+from products.services.search_service import search_products_shared
+
+refreshed_searches = registry.counter(
+    "saved_search_refreshed_total",
+    "Обновленные сохраненные поиски"
+)
+refresh_fetches = registry.counter(
+    "saved_search_fetches_total",
+    "Поиски, выполненные для обновления (одинаковые запросы объединяются)"
+)
+refresh_changes = registry.counter(
+    "saved_search_changes_total",
+    "Обнаруженные изменения результатов сохраненных поисков"
+)
+refresh_errors = registry.counter(
+    "saved_search_refresh_errors_total",
+    "Ошибки поиска при обновлении сохраненных поисков"
+)
+
+# Фоновое обновление идет в отдельной очереди планировщика со своим весом
+REFRESH_USER_KEY = "saved-searches"
+REFRESH_USER_CLASS = "background"
+
+def build_snapshot(products: List[Dict]) -> Dict[str, Dict]:
+    """
+    Снимок результата поиска: id товара -> название и цена
+
+    Товары без id идентифицируются по названию.
+    """
+    snapshot = {}
+    for product in products:
+        product_id = product.get("id")
+        key = str(product_id if product_id is not None else product["name"])
+        snapshot[key] = {"name": product["name"], "price": product.get("price")}
+    return snapshot
+
+def diff_snapshots(previous: Optional[Dict[str, Dict]], current: Dict[str, Dict]) -> Optional[Dict]:
+    """
+    Сравнение двух снимков по id товара и цене
+
+    Returns:
+        Словарь с добавленными, удаленными и подорожавшими/подешевевшими
+        товарами или None, если изменений нет (или сравнивать не с чем)
+    """
+    if previous is None:
+        return None
+
+    added = [{"id": key, **item} for key, item in current.items() if key not in previous]
+    removed = [{"id": key, **item} for key, item in previous.items() if key not in current]
+    price_changed = [
+        {
+            "id": key,
+            "name": item["name"],
+            "old_price": previous[key]["price"],
+            "new_price": item["price"]
+        }
+        for key, item in current.items()
+        if key in previous and previous[key]["price"] != item["price"]
+    ]
+
+    if not (added or removed or price_changed):
+        return None
+    return {"added": added, "removed": removed, "price_changed": price_changed}
+
+async def refresh_saved_searches_batch() -> int:
+    """
+    Обновляет одну пачку сохраненных поисков
+
+    Одинаковые запросы разных пользователей выполняются одним поиском
+    через общий кэш и объединение запросов.
+
+    Returns:
+        Количество обновленных поисков (неудачные не учитываются, чтобы
+        цикл обновления не захватывал их повторно сразу же)
+    """
+    token = uuid.uuid4().hex
+    refreshed_before = datetime.utcnow() - timedelta(seconds=settings.SAVED_SEARCH_REFRESH_PERIOD)
+    async with AsyncSessionLocal() as db:
+        claimed = await claim_due_saved_searches(db, refreshed_before, token, settings.SAVED_SEARCH_BATCH_SIZE)
+    if not claimed:
+        return 0
+
+    semaphore = asyncio.Semaphore(settings.SAVED_SEARCH_CONCURRENCY)
+
+    async def fetch(query: str) -> Tuple[str, Optional[Dict[str, Dict]]]:
+        async with semaphore:
+            try:
+                products, _ = await search_products_shared(
+                    query, 1, user_key=REFRESH_USER_KEY, user_class=REFRESH_USER_CLASS
+                )
+                refresh_fetches.inc()
+                return query, build_snapshot(products)
+            except Exception as e:
+                refresh_errors.inc()
+                print(f"Ошибка при обновлении сохраненного поиска '{query}': {e}")
+                return query, None
+
+    snapshots = dict(await asyncio.gather(*(fetch(query) for query in {item["query"] for item in claimed})))
+
+    results = []
+    failed = []
+    for item in claimed:
+        snapshot = snapshots.get(item["query"])
+        if snapshot is None:
+            # Поиск не удался: снимаем захват, запись обновится при следующей проверке
+            failed.append(item["id"])
+            continue
+        changes = diff_snapshots(item["snapshot"], snapshot)
+        if changes:
+            refresh_changes.inc()
+        results.append({**item, "snapshot": snapshot, "changes": changes})
+
+    async with AsyncSessionLocal() as db:
+        if results:
+            await save_refresh_results(db, results)
+        await release_saved_searches(db, failed, token)
+    refreshed_searches.inc(len(results))
+    return len(results)
+
+async def run_saved_search_refresh_loop(interval: float) -> None:
+    """Периодически обновляет все сохраненные поиски, которым пора обновиться"""
+    while True:
+        try:
+            while await refresh_saved_searches_batch() >= settings.SAVED_SEARCH_BATCH_SIZE:
+                pass
+        except Exception as e:
+            print(f"Ошибка фонового обновления сохраненных поисков: {e}")
+        await asyncio.sleep(interval)
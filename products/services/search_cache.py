@@ -0,0 +1,207 @@
+import asyncio
+import json
+import os
+import struct
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from config import settings
+from metrics import registry
+
+cache_hits = registry.counter("search_cache_hits_total", "Попадания в кэш результатов поиска")
+cache_misses = registry.counter("search_cache_misses_total", "Промахи кэша результатов поиска")
+cache_loaded = registry.counter(
+    "search_cache_loaded_entries_total",
+    "Записи, восстановленные из снимка кэша при запуске"
+)
+
+# Формат снимка: заголовок, затем записи подряд.
+# Запись: время истечения (unix), длина ключа, длина значения, ключ, значение.
+# Ключ - JSON, значение - JSON, сжатый zlib.
+SNAPSHOT_MAGIC = b"SRCHCACHE1"
+RECORD_HEADER = struct.Struct("<dII")
+
+class _Entry:
+    """Запись кэша: значение хранится разобранным или сжатым до первого обращения"""
+
+    __slots__ = ("expires_at", "value", "raw")
+
+    def __init__(self, expires_at: float, value: Any = None, raw: Optional[bytes] = None):
+        self.expires_at = expires_at
+        self.value = value
+        self.raw = raw
+
+    def get_value(self) -> Any:
+        if self.value is None:
+            products, pagination = json.loads(zlib.decompress(self.raw))
+            self.value = (products, pagination)
+        return self.value
+
+    def get_raw(self) -> bytes:
+        if self.raw is None:
+            self.raw = zlib.compress(json.dumps(self.value, ensure_ascii=False).encode("utf-8"))
+        return self.raw
+
+def _encode_key(key: Hashable) -> bytes:
+    return json.dumps(key, ensure_ascii=False).encode("utf-8")
+
+def _decode_key(raw: bytes) -> Hashable:
+    return tuple(json.loads(raw))
+
+class SearchCache:
+    """
+    Кэш результатов поиска в памяти процесса с TTL и вытеснением LRU
+
+    Содержимое можно сохранить в компактный бинарный снимок и восстановить
+    при следующем запуске: время истечения записей сохраняется, поэтому
+    после рестарта записи живут ровно столько, сколько им оставалось.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Tuple[List[Dict], Dict]]:
+        """Возвращает значение или None, если записи нет или она истекла"""
+        entry = self._entries.get(key)
+        if entry is None:
+            cache_misses.inc()
+            return None
+        if entry.expires_at <= time.time():
+            del self._entries[key]
+            cache_misses.inc()
+            return None
+        self._entries.move_to_end(key)
+        cache_hits.inc()
+        return entry.get_value()
+
+    def set(self, key: Hashable, value: Tuple[List[Dict], Dict]) -> None:
+        """Сохраняет значение на время TTL"""
+        self._entries[key] = _Entry(time.time() + self.ttl, value=value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def merge(self, entries: Dict[Hashable, _Entry]) -> int:
+        """
+        Добавляет записи из снимка, не перезаписывая более свежие
+
+        Returns:
+            Количество добавленных записей
+        """
+        added = 0
+        now = time.time()
+        for key, entry in entries.items():
+            if key in self._entries or entry.expires_at <= now:
+                continue
+            if len(self._entries) >= self.max_entries:
+                break
+            self._entries[key] = entry
+            # Восстановленные записи считаем самыми старыми для LRU
+            self._entries.move_to_end(key, last=False)
+            added += 1
+        cache_loaded.inc(added)
+        return added
+
+    def items(self) -> List[Tuple[Hashable, _Entry]]:
+        """Копия живых записей для снимка"""
+        now = time.time()
+        return [(key, entry) for key, entry in self._entries.items() if entry.expires_at > now]
+
+def write_snapshot(items: List[Tuple[Hashable, _Entry]], path: str) -> int:
+    """
+    Записывает снимок кэша атомарно (через временный файл)
+
+    Returns:
+        Количество записанных записей
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as snapshot:
+        snapshot.write(SNAPSHOT_MAGIC)
+        for key, entry in items:
+            raw_key = _encode_key(key)
+            raw_value = entry.get_raw()
+            snapshot.write(RECORD_HEADER.pack(entry.expires_at, len(raw_key), len(raw_value)))
+            snapshot.write(raw_key)
+            snapshot.write(raw_value)
+    os.replace(tmp_path, path)
+    return len(items)
+
+def read_snapshot(path: str) -> Dict[Hashable, _Entry]:
+    """
+    Потоково читает снимок кэша
+
+    Истекшие записи пропускаются без чтения, значения не разбираются
+    до первого обращения к ним, поэтому загрузка сводится к чтению файла.
+    """
+    entries: Dict[Hashable, _Entry] = {}
+    if not os.path.exists(path):
+        return entries
+
+    now = time.time()
+    with open(path, "rb") as snapshot:
+        if snapshot.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            print(f"Снимок кэша поиска {path} имеет неизвестный формат, пропускаем")
+            return entries
+        while True:
+            header = snapshot.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                break
+            expires_at, key_len, value_len = RECORD_HEADER.unpack(header)
+            if expires_at <= now:
+                snapshot.seek(key_len + value_len, os.SEEK_CUR)
+                continue
+            raw_key = snapshot.read(key_len)
+            raw_value = snapshot.read(value_len)
+            if len(raw_value) < value_len:
+                # Обрезанный файл: оставляем то, что успели прочитать
+                break
+            entries[_decode_key(raw_key)] = _Entry(expires_at, raw=raw_value)
+    return entries
+
+async def load_snapshot(cache: SearchCache, path: str) -> None:
+    """Восстанавливает кэш из снимка, читая файл вне event loop"""
+    try:
+        entries = await asyncio.to_thread(read_snapshot, path)
+        added = cache.merge(entries)
+        print(f"Кэш поиска: восстановлено записей из снимка: {added}")
+    except Exception as e:
+        print(f"Ошибка при загрузке снимка кэша поиска: {e}")
+
+async def save_snapshot(cache: SearchCache, path: str) -> None:
+    """Сохраняет снимок кэша, сжимая и записывая его вне event loop"""
+    try:
+        await asyncio.to_thread(write_snapshot, cache.items(), path)
+    except Exception as e:
+        print(f"Ошибка при сохранении снимка кэша поиска: {e}")
+
+async def run_snapshot_loop(cache: SearchCache, path: str, interval: float,
+                            loaded: Optional[asyncio.Task] = None) -> None:
+    """
+    Периодически сохраняет снимок кэша
+
+    Args:
+        cache: Кэш поиска
+        path: Путь к файлу снимка
+        interval: Период сохранения в секундах
+        loaded: Задача восстановления кэша; пока она не завершена,
+            снимок не пишется, чтобы не затереть предыдущий
+    """
+    if loaded is not None:
+        await asyncio.shield(loaded)
+    while True:
+        await asyncio.sleep(interval)
+        await save_snapshot(cache, path)
+
+search_cache = SearchCache(
+    ttl=settings.SEARCH_CACHE_TTL,
+    max_entries=settings.SEARCH_CACHE_MAX_ENTRIES
+)
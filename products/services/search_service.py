@@ -1,11 +1,15 @@
 import aiohttp
 import asyncio
 from bs4 import BeautifulSoup
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Hashable, Optional, Tuple
 import json
 import re
 from fastapi import HTTPException
 import math
+from products.services.single_flight import SingleFlight
+from products.services.parser_pool import parser_pool
+from products.services.fair_scheduler import upstream_scheduler
+from products.services.search_cache import search_cache
 
 class MaxiRetailSearchService:
     """Сервис для поиска товаров на Maxi Retail"""
@@ -29,13 +33,21 @@ class MaxiRetailSearchService:
         if self.session:
             await self.session.close()
     
-    async def search_products(self, query: str, page: int = 1) -> Tuple[List[Dict], Dict]:
+    async def search_products(
+        self,
+        query: str,
+        page: int = 1,
+        user_key: Optional[Hashable] = None,
+        user_class: str = "anonymous"
+    ) -> Tuple[List[Dict], Dict]:
         """
         Поиск товаров по запросу с пагинацией
         
         Args:
             query: Поисковый запрос
             page: Номер страницы (начиная с 1)
+            user_key: Пользователь, в чью очередь ставится запрос к сайту
+            user_class: Класс пользователя для весов планировщика
             
         Returns:
             Кортеж (список товаров, информация о пагинации)
@@ -47,24 +59,27 @@ class MaxiRetailSearchService:
             # Формируем URL для поиска
             search_url = f"{self.BASE_URL}?q={query}"
             
-            # Делаем запрос к сайту
-            async with self.session.get(search_url) as response:
-                if response.status != 200:
-                    raise HTTPException(
-                        status_code=500, 
-                        detail=f"Ошибка при поиске товаров: HTTP {response.status}"
-                    )
-                
-                html_content = await response.text()
-                
-                # Парсим HTML
-                all_products, count = await self._parse_search_results(html_content, query)
-                
-                # Применяем пагинацию
-                pagination_info = self._create_pagination_info(len(all_products), count, page)
-                
-                return all_products, pagination_info
+            # Делаем запрос к сайту, дождавшись своей очереди в планировщике
+            async with upstream_scheduler.slot(user_key, user_class):
+                async with self.session.get(search_url) as response:
+                    if response.status != 200:
+                        raise HTTPException(
+                            status_code=500, 
+                            detail=f"Ошибка при поиске товаров: HTTP {response.status}"
+                        )
+                    
+                    html_content = await response.text()
+            
+            # Парсим HTML вне event loop, соединение с сайтом уже освобождено
+            all_products, count = await self._parse_search_results(html_content, query)
+            
+            # Применяем пагинацию
+            pagination_info = self._create_pagination_info(len(all_products), count, page)
+            
+            return all_products, pagination_info
                 
+        except HTTPException:
+            raise
         except aiohttp.ClientError as e:
             raise HTTPException(
                 status_code=500, 
@@ -99,18 +114,32 @@ class MaxiRetailSearchService:
             "has_prev": current_page > 1
         }
     
-    async def _parse_search_results(self, html_content: str, query: str) -> List[Dict]:
+    async def _parse_search_results(self, html_content: str, query: str) -> Tuple[List[Dict], int]:
         """
-        Парсинг результатов поиска из HTML
+        Парсинг результатов поиска из HTML в пуле парсинга, вне event loop
         
         Args:
             html_content: HTML содержимое страницы
             query: Исходный поисковый запрос
             
         Returns:
-            Список товаров
+            Кортеж (список товаров, общее количество найденных товаров)
+        """
+        return await parser_pool.run(parse_search_page, html_content, query)
+    
+    def _parse_search_results_sync(self, html_content: str, query: str) -> Tuple[List[Dict], int]:
+        """
+        Парсинг результатов поиска из HTML (CPU-нагруженная часть)
+        
+        Args:
+            html_content: HTML содержимое страницы
+            query: Исходный поисковый запрос
+            
+        Returns:
+            Кортеж (список товаров, общее количество найденных товаров)
         """
         products = []
+        count = 0
         
         try:
             # Парсим HTML с помощью BeautifulSoup
@@ -136,9 +165,9 @@ class MaxiRetailSearchService:
         except Exception as e:
             # Логируем ошибку, но возвращаем пустой список
             print(f"Ошибка при парсинге результатов поиска: {e}")
-            return []
+            return [], 0
     
-    def _extract_products_from_script(self, script_content: str) -> List[Dict]:
+    def _extract_products_from_script(self, script_content: str) -> Tuple[List[Dict], int]:
         """
         Извлечение данных о товарах из JavaScript кода
         
@@ -146,7 +175,7 @@ class MaxiRetailSearchService:
             script_content: Содержимое скрипта
             
         Returns:
-            Список товаров
+            Кортеж (список товаров, общее количество найденных товаров)
         """
         products = []
         
@@ -163,7 +192,7 @@ class MaxiRetailSearchService:
         except (json.JSONDecodeError, Exception) as e:
             print(f"Ошибка при извлечении товаров из скрипта: {e}")
         
-        return []
+        return [], 0
     
    
     def _is_valid_product(self, product: Dict) -> bool:
@@ -212,6 +241,53 @@ class MaxiRetailSearchService:
         
         return formatted
 
+def parse_search_page(html_content: str, query: str) -> Tuple[List[Dict], int]:
+    """
+    Разбор страницы выдачи в процессе пула парсинга
+    
+    Args:
+        html_content: HTML содержимое страницы
+        query: Исходный поисковый запрос
+        
+    Returns:
+        Кортеж (список товаров, общее количество найденных товаров)
+    """
+    return MaxiRetailSearchService()._parse_search_results_sync(html_content, query)
+
+# Одинаковые конкурентные запросы выполняются одной задачей
+search_flight = SingleFlight("search")
+
+async def search_products_shared(
+    query: str,
+    page: int = 1,
+    user_key: Optional[Hashable] = None,
+    user_class: str = "anonymous"
+) -> Tuple[List[Dict], Dict]:
+    """
+    Поиск товаров через кэш с объединением одинаковых конкурентных запросов
+
+    Args:
+        query: Поисковый запрос
+        page: Номер страницы (начиная с 1)
+        user_key: Пользователь, в чью очередь ставится запрос к сайту
+        user_class: Класс пользователя для весов планировщика
+
+    Returns:
+        Кортеж (список товаров, информация о пагинации)
+    """
+    key = (query, page)
+    cached = search_cache.get(key)
+    if cached is not None:
+        return cached
+
+    async def fetch():
+        async with MaxiRetailSearchService() as service:
+            result = await service.search_products(query, page, user_key, user_class)
+        search_cache.set(key, result)
+        return result
+
+    return await search_flight.do(key, fetch)
+
 # Синхронная версия для совместимости
 class MaxiRetailSearchServiceSync:
     """Синхронная версия сервиса поиска"""
@@ -0,0 +1,74 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+from metrics import registry
+
+T = TypeVar("T")
+
+shared_calls = registry.counter(
+    "singleflight_shared_total",
+    "Вызовы, присоединившиеся к уже выполняющейся общей задаче"
+)
+cancelled_calls = registry.counter(
+    "singleflight_cancelled_total",
+    "Общие задачи, отмененные после ухода последнего ожидающего"
+)
+
+class _Call:
+    """Выполняющаяся общая задача и число ее ожидающих"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    Объединение одинаковых конкурентных вызовов в одну общую задачу
+
+    Первый вызов с ключом запускает задачу, остальные ждут ее результат.
+    Задача работает, пока ее ждет хотя бы один вызывающий: когда отменяется
+    последний ожидающий, отменяется и сама задача.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def waiters(self, key: Hashable) -> int:
+        """Количество вызовов, ожидающих задачу с ключом"""
+        call = self._calls.get(key)
+        return call.waiters if call else 0
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        """
+        Выполняет работу или присоединяется к уже выполняющейся
+
+        Args:
+            key: Ключ, по которому вызовы считаются одинаковыми
+            factory: Функция, создающая корутину с работой
+
+        Returns:
+            Результат общей задачи
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(factory()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _task: self._forget(key, call))
+        else:
+            shared_calls.inc(flight=self.name)
+
+        call.waiters += 1
+        try:
+            # shield: отмена одного ожидающего не должна отменять общую задачу
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+                cancelled_calls.inc(flight=self.name)
+                self._forget(key, call)
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        """Удаляет завершенную задачу, если ключ еще указывает на нее"""
+        if self._calls.get(key) is call:
+            del self._calls[key]
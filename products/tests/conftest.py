@@ -0,0 +1,16 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from database import Base
+import auth.models  # noqa: F401 - таблица users для связей заказов
+import products.models  # noqa: F401
+
+@pytest.fixture
+def db():
+    """Сессия SQLite в памяти со всеми таблицами (для тестов CRUD функций)"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(autoflush=False, expire_on_commit=False, bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
@@ -0,0 +1,18 @@
+from datetime import date
+from products.crud.archive_crud import _partition_bound, month_partitions
+
+class TestArchivePartitions:
+    """Тесты помесячных секций архивных таблиц"""
+
+    def test_month_partitions_cross_year(self):
+        """Секции идут по месяцам, граница - первый день следующего месяца"""
+        assert month_partitions(date(2024, 11, 1), 3) == [
+            ("p202411", date(2024, 12, 1)),
+            ("p202412", date(2025, 1, 1)),
+            ("p202501", date(2025, 2, 1)),
+        ]
+
+    def test_partition_bound(self):
+        """Граница секции восстанавливается по ее имени"""
+        assert _partition_bound("p202412") == date(2025, 1, 1)
+        assert _partition_bound("p202402") == date(2024, 3, 1)
@@ -0,0 +1,62 @@
+import asyncio
+from products.schemas import BulkOrderItem
+from products.services.bulk_orders import iter_lines, parse_csv, parse_ndjson
+
+async def chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+def collect(parser, *parts: bytes):
+    async def scenario():
+        return [row async for row in parser(iter_lines(chunks(*parts)))]
+    return asyncio.run(scenario())
+
+class TestBulkOrderParsing:
+    """Тесты разбора файлов массовой загрузки заказов"""
+
+    def test_lines_split_across_chunks(self):
+        """Строки и многобайтовые символы могут разрываться между чанками"""
+        data = "первая\r\nвторая\nтретья".encode("utf-8")
+
+        async def scenario():
+            return [line async for line in iter_lines(chunks(data[:3], data[3:15], data[15:]))]
+
+        assert asyncio.run(scenario()) == [(1, "первая"), (2, "вторая"), (3, "третья")]
+
+    def test_ndjson_rows_and_errors(self):
+        """Ошибка в строке NDJSON не прерывает разбор остальных"""
+        rows = collect(
+            parse_ndjson,
+            b'{"external_ref": "A", "products": [{"name": "milk"}]}\n',
+            b'not json\n\n',
+            b'{"products": [{"name": "bread", "quantity": 2}]}'
+        )
+        assert [row for row, _ in rows] == [1, 2, 4]
+        assert isinstance(rows[0][1], BulkOrderItem) and rows[0][1].external_ref == "A"
+        assert isinstance(rows[1][1], str)
+        assert rows[2][1].products[0].quantity == 2
+
+    def test_csv_groups_products_by_external_ref(self):
+        """Строки CSV с одинаковым external_ref подряд - один заказ"""
+        rows = collect(
+            parse_csv,
+            "external_ref,name,quantity,notes\n"
+            "A,молоко,2,\n"
+            "A,\"сыр, твердый\",,к завтраку\n"
+            "B,хлеб,1,\n"
+            ",без заказа,1,\n".encode("utf-8")
+        )
+        rows.sort(key=lambda parsed: parsed[0])
+        assert [row for row, _ in rows] == [2, 4, 5]
+        first, second, error = (item for _, item in rows)
+        assert first.external_ref == "A"
+        assert [(product.name, product.quantity, product.notes) for product in first.products] == [
+            ("молоко", 2, None), ("сыр, твердый", 1, "к завтраку")
+        ]
+        assert second.external_ref == "B"
+        assert isinstance(error, str)
+
+    def test_csv_requires_header(self):
+        """Без заголовка файл не разбирается"""
+        rows = collect(parse_csv, b"A,milk,1,\n")
+        assert len(rows) == 1 and isinstance(rows[0][1], str)
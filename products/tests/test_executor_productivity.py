@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from products.services.executor_productivity import summarize_purchases
+
+NOW = datetime(2024, 3, 10, 12)
+
+def purchase(executor_id, minutes_ago, order_id, completed_minutes_ago=None):
+    return SimpleNamespace(
+        purchased_by=executor_id,
+        purchased_at=NOW - timedelta(minutes=minutes_ago),
+        order_id=order_id,
+        completed_at=NOW - timedelta(minutes=completed_minutes_ago) if completed_minutes_ago is not None else None
+    )
+
+def by_executor(summary, window_days):
+    return {row["executor_id"]: row for row in summary if row["window_days"] == window_days}
+
+class TestExecutorProductivity:
+    """Тесты сводки продуктивности исполнителей"""
+
+    def test_items_and_median_interval(self):
+        """Покупки считаются по окнам, медиана - по соседним покупкам исполнителя"""
+        purchases = [
+            purchase(1, 10, order_id=1),
+            purchase(1, 20, order_id=1),
+            purchase(1, 50, order_id=2),
+            purchase(2, 30, order_id=3),
+            purchase(1, 3 * 24 * 60, order_id=4),
+        ]
+        summary = summarize_purchases(purchases, NOW, [1, 7])
+
+        day = by_executor(summary, 1)
+        assert day[1]["items_purchased"] == 3
+        # Интервалы 30 и 10 минут
+        assert day[1]["median_purchase_interval"] == 20 * 60
+        assert day[2]["items_purchased"] == 1
+        assert day[2]["median_purchase_interval"] is None
+
+        week = by_executor(summary, 7)
+        assert week[1]["items_purchased"] == 4
+
+    def test_orders_completed(self):
+        """Завершенный в окне заказ засчитывается каждому исполнителю один раз"""
+        purchases = [
+            purchase(1, 100, order_id=1, completed_minutes_ago=5),
+            purchase(1, 90, order_id=1, completed_minutes_ago=5),
+            purchase(2, 80, order_id=1, completed_minutes_ago=5),
+            purchase(1, 2 * 24 * 60, order_id=2, completed_minutes_ago=2 * 24 * 60),
+            purchase(2, 60, order_id=3),
+        ]
+        summary = summarize_purchases(purchases, NOW, [1, 7])
+
+        assert {executor: row["orders_completed"] for executor, row in by_executor(summary, 1).items()} == {1: 1, 2: 1}
+        assert by_executor(summary, 7)[1]["orders_completed"] == 2
+
+    def test_empty(self):
+        assert summarize_purchases([], NOW, [1, 7, 30]) == []
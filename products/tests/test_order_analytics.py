@@ -0,0 +1,91 @@
+from datetime import datetime
+from types import SimpleNamespace
+import numpy as np
+from products.crud.order_stats_crud import (
+    latency_bin, get_order_latency_histograms, get_order_stats,
+    LATENCY_BIN_BASE, LATENCY_BINS, TIME_TO_START, TIME_TO_COMPLETE
+)
+from products.crud.product_crud import (
+    claim_order, claim_orders, create_order, release_order, update_order_status
+)
+from products.models import OrderStatus
+from products.schemas import OrderCreate, ProductCreate
+from products.services.order_analytics import (
+    build_order_analytics, bucket_count, histogram_percentiles
+)
+
+def stats_row(bucket, created=0, started=0, completed=0, cancelled=0):
+    return SimpleNamespace(bucket=bucket, created=created, started=started, completed=completed, cancelled=cancelled)
+
+def latency_row(bucket, metric, seconds, count):
+    return SimpleNamespace(bucket=bucket, metric=metric, bin=latency_bin(seconds), count=count)
+
+class TestOrderAnalytics:
+    """Тесты аналитики заказов по почасовым гистограммам"""
+
+    def test_latency_bin(self):
+        """Длительность попадает в интервал [BASE ** bin, BASE ** (bin + 1))"""
+        assert latency_bin(0) == 0
+        assert latency_bin(0.5) == 0
+        for seconds in (2, 60, 3600, 86400):
+            number = latency_bin(seconds)
+            assert LATENCY_BIN_BASE ** number <= seconds < LATENCY_BIN_BASE ** (number + 1)
+        assert latency_bin(10 ** 12) == LATENCY_BINS - 1
+
+    def test_histogram_percentiles(self):
+        """Перцентили с точностью до bin, пустые интервалы - NaN"""
+        histograms = np.zeros((2, LATENCY_BINS), dtype=np.int64)
+        for seconds, count in ((10, 50), (100, 40), (1000, 10)):
+            histograms[0, latency_bin(seconds)] += count
+
+        values = histogram_percentiles(histograms, [50, 90, 99])
+        for value, expected in zip(values[0], (10, 100, 1000)):
+            assert abs(value - expected) / expected < 0.15
+        assert np.isnan(values[1]).all()
+
+    def test_build_order_analytics_by_day(self):
+        """Часовые строки сводятся в дни, строки вне периода не учитываются"""
+        day = datetime(2024, 3, 1)
+        stats_rows = [
+            stats_row(datetime(2024, 3, 1, 9), created=3, started=2),
+            stats_row(datetime(2024, 3, 1, 15), created=1, completed=2),
+            stats_row(datetime(2024, 3, 2, 0), cancelled=1),
+            stats_row(datetime(2024, 3, 5, 0), created=100),
+        ]
+        latency_rows = [
+            latency_row(datetime(2024, 3, 1, 9), TIME_TO_START, 60, 2),
+            latency_row(datetime(2024, 3, 1, 15), TIME_TO_COMPLETE, 3600, 2),
+        ]
+        analytics = build_order_analytics(
+            stats_rows, latency_rows, day, datetime(2024, 3, 3), "day", [50]
+        )
+
+        assert [bucket["start"] for bucket in analytics["buckets"]] == [day, datetime(2024, 3, 2)]
+        first, second = analytics["buckets"]
+        assert (first["created"], first["started"], first["completed"]) == (4, 2, 2)
+        assert second["cancelled"] == 1
+        assert abs(first["time_to_start"]["p50"] - 60) / 60 < 0.15
+        assert second["time_to_complete"]["p50"] is None
+        assert analytics["totals"]["created"] == 4
+
+    def test_bucket_count(self):
+        """Неполный интервал считается целиком"""
+        assert bucket_count(datetime(2024, 3, 1, 10, 30), datetime(2024, 3, 1, 12, 15), "hour") == 3
+        assert bucket_count(datetime(2024, 3, 1), datetime(2024, 3, 31), "day") == 30
+
+class TestStartedTransitions:
+    """Начало исполнения учитывается один раз на заказ"""
+
+    def test_reclaim_is_not_counted_as_start(self, db):
+        """Повторный захват после возврата в очередь не увеличивает started и time_to_start"""
+        order = create_order(db, OrderCreate(products=[ProductCreate(name="Хлеб")]), 1)
+        claim_order(db, order.id, executor_id=10, lease_seconds=600)
+        release_order(db, order.id, executor_id=10)
+        claim_orders(db, executor_id=20, limit=5, lease_seconds=600)
+        update_order_status(db, order.id, OrderStatus.PENDING)
+        update_order_status(db, order.id, OrderStatus.IN_PROGRESS)
+
+        stats = get_order_stats(db, datetime(2000, 1, 1), datetime(2100, 1, 1))
+        assert sum(row.started for row in stats) == 1
+        latency = get_order_latency_histograms(db, datetime(2000, 1, 1), datetime(2100, 1, 1))
+        assert sum(row.count for row in latency if row.metric == TIME_TO_START) == 1
@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from products.crud.product_crud import (
+    create_order, get_changed_order_summaries, get_order_changes_position, update_order_status
+)
+from products.models import OrderEvent, OrderStatus
+from products.schemas import OrderCreate, ProductCreate
+
+def make_order(db):
+    return create_order(db, OrderCreate(products=[ProductCreate(name="Хлеб")]), 1)
+
+def add_event(db, event_id: int, order_id: int, age: float):
+    db.execute(insert(OrderEvent).values(
+        id=event_id, order_id=order_id, customer_id=1, event_type="status_changed", payload="{}",
+        created_at=datetime.utcnow() - timedelta(seconds=age)
+    ))
+    db.commit()
+
+class TestOrderChangesFeed:
+    """Лента изменений заказов по событиям order_events"""
+
+    def test_changes_in_same_second_are_not_lost(self, db):
+        """Все изменения после позиции возвращаются, повторно измененный заказ - один раз"""
+        first, second = make_order(db), make_order(db)
+        changes, position = get_changed_order_summaries(db, 0)
+        assert [summary["id"] for summary in changes] == [first.id, second.id]
+
+        update_order_status(db, second.id, OrderStatus.IN_PROGRESS)
+        update_order_status(db, first.id, OrderStatus.CANCELLED)
+        update_order_status(db, second.id, OrderStatus.COMPLETED)
+        changes, new_position = get_changed_order_summaries(db, position)
+        assert [(summary["id"], summary["status"]) for summary in changes] == [
+            (first.id, OrderStatus.CANCELLED), (second.id, OrderStatus.COMPLETED)
+        ]
+        assert new_position == position + 3
+        assert get_changed_order_summaries(db, new_position) == ([], new_position)
+
+    def test_position_stops_before_recent_gap(self, db):
+        """Пропуск в id (незакоммиченная транзакция) не пропускается, пока он свежий"""
+        order = make_order(db)
+        _, position = get_changed_order_summaries(db, 0)
+        add_event(db, position + 2, order.id, age=0)
+
+        changes, new_position = get_changed_order_summaries(db, position, gap_timeout=5)
+        assert (changes, new_position) == ([], position)
+
+        changes, new_position = get_changed_order_summaries(db, position, gap_timeout=0)
+        assert [summary["id"] for summary in changes] == [order.id]
+        assert new_position == position + 2
+
+    def test_start_position_skips_only_settled_events(self, db):
+        order = make_order(db)
+        add_event(db, 10, order.id, age=60)
+        add_event(db, 11, order.id, age=0)
+        assert get_order_changes_position(db, gap_timeout=5) == 10
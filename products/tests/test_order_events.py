@@ -0,0 +1,98 @@
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+from products.services.order_events import OrderEventBus, _GapTracker, format_sse, order_event_stream
+
+def make_event(event_id: int, order_id: int = 1, customer_id: int = 10):
+    return {
+        "id": event_id,
+        "order_id": order_id,
+        "customer_id": customer_id,
+        "event_type": "status_changed",
+        "status": "in_progress"
+    }
+
+class TestOrderEventBus:
+    """Тесты раздачи событий заказов внутри процесса"""
+
+    def test_subscribers_receive_matching_events(self):
+        """Заказчик получает только свои заказы, исполнитель - выбранные"""
+        async def scenario():
+            bus = OrderEventBus(queue_size=10)
+            with bus.subscribe(customer_id=10) as customer, bus.subscribe(order_ids=[2]) as executor:
+                bus.publish(make_event(1, order_id=1, customer_id=10))
+                bus.publish(make_event(2, order_id=2, customer_id=20))
+                return (
+                    [customer.queue.get_nowait()["id"] for _ in range(customer.queue.qsize())],
+                    [executor.queue.get_nowait()["id"] for _ in range(executor.queue.qsize())],
+                    len(bus)
+                )
+
+        customer_events, executor_events, subscribers = asyncio.run(scenario())
+        assert customer_events == [1]
+        assert executor_events == [2]
+        assert subscribers == 2
+
+    def test_slow_subscriber_is_closed(self):
+        """Переполнение очереди закрывает подписку вместо роста памяти"""
+        async def scenario():
+            bus = OrderEventBus(queue_size=2)
+            with bus.subscribe() as subscription:
+                for event_id in range(1, 4):
+                    bus.publish(make_event(event_id))
+                return subscription.closed, await subscription.queue.get()
+
+        closed, last = asyncio.run(scenario())
+        assert closed
+        assert last is None
+
+    def test_unsubscribe(self):
+        """После выхода из подписки события не доставляются"""
+        async def scenario():
+            bus = OrderEventBus(queue_size=10)
+            with bus.subscribe():
+                pass
+            return bus.publish(make_event(1)), len(bus)
+
+        assert asyncio.run(scenario()) == (0, 0)
+
+    def test_format_sse(self):
+        """Событие SSE содержит id и тип, id заказчика не раскрывается"""
+        message = format_sse(make_event(7))
+        assert message.startswith("id: 7\nevent: status_changed\ndata: ")
+        assert message.endswith("\n\n")
+        assert "customer_id" not in message
+
+    def test_gap_tracker(self):
+        """Пропущенные id перечитываются, пока не появятся"""
+        gaps = _GapTracker(timeout=60)
+        last_id = gaps.update(5, [make_event(6), make_event(9)])
+        assert last_id == 9
+        assert sorted(gaps.ids()) == [7, 8]
+
+        last_id = gaps.update(last_id, [make_event(8)])
+        assert last_id == 9
+        assert gaps.ids() == [7]
+
+    def test_replay_pages_until_caught_up(self):
+        """Пропущенное дольше одной пачки дочитывается полностью"""
+        stored = [make_event(event_id) for event_id in range(1, 8)]
+
+        async def events_after(db, after_id, limit, **filters):
+            return [event for event in stored if event["id"] > after_id][:limit]
+
+        @asynccontextmanager
+        async def session():
+            yield None
+
+        async def scenario():
+            bus = OrderEventBus(queue_size=10)
+            stream = order_event_stream(bus, customer_id=10, last_event_id=1)
+            messages = [await stream.__anext__() for _ in range(6)]
+            await stream.aclose()
+            return [message.split("\n")[0] for message in messages]
+
+        with patch("products.services.order_events.get_order_events_after", events_after), \
+                patch("products.services.order_events.AsyncSessionLocal", session), \
+                patch("products.services.order_events.settings.ORDER_EVENTS_BATCH_SIZE", 3):
+            assert asyncio.run(scenario()) == [f"id: {event_id}" for event_id in range(2, 8)]
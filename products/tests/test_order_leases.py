@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+from products.crud.product_crud import claim_order, create_order, update_products_purchase_bulk
+from products.models import OrderStatus
+from products.schemas import OrderCreate, ProductCreate
+
+def make_order(db, customer_id: int = 1, products: int = 2):
+    return create_order(db, OrderCreate(products=[ProductCreate(name=f"Продукт {i}") for i in range(products)]), customer_id)
+
+class TestBulkPurchaseLeases:
+    """Массовая отметка покупки учитывает аренду заказов"""
+
+    def test_leased_by_other_executor_is_rejected(self, db):
+        """Продукты заказа другого исполнителя отклоняются всей пачкой"""
+        own = make_order(db)
+        leased = make_order(db)
+        claim_order(db, leased.id, executor_id=10, lease_seconds=600)
+        items = {product.id: True for order in (own, leased) for product in order.products}
+
+        result = update_products_purchase_bulk(db, items, executor_id=20)
+
+        assert result["leased"] == sorted(product.id for product in leased.products)
+        db.expire_all()
+        assert not any(product.is_purchased for product in own.products)
+        assert leased.status == OrderStatus.IN_PROGRESS
+
+    def test_own_and_expired_leases_are_allowed(self, db):
+        """Свой заказ и заказ с истекшей арендой можно отмечать"""
+        order = make_order(db)
+        claim_order(db, order.id, executor_id=10, lease_seconds=600)
+        items = {product.id: True for product in order.products}
+        assert update_products_purchase_bulk(db, items, executor_id=10)["leased"] == []
+
+        other = make_order(db)
+        claim_order(db, other.id, executor_id=10, lease_seconds=600)
+        other.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db.commit()
+        items = {product.id: True for product in other.products}
+        assert update_products_purchase_bulk(db, items, executor_id=20)["leased"] == []
+
+    def test_admin_ignores_leases(self, db):
+        order = make_order(db)
+        claim_order(db, order.id, executor_id=10, lease_seconds=600)
+        items = {product.id: True for product in order.products}
+        assert update_products_purchase_bulk(db, items, executor_id=1, check_leases=False)["leased"] == []
@@ -0,0 +1,17 @@
+from products.services.order_search import MAX_TERMS, highlight, search_terms
+
+class TestOrderSearch:
+    """Тесты разбора запроса и подсветки поиска заказов"""
+
+    def test_search_terms(self):
+        """Слова в нижнем регистре, без знаков и повторов"""
+        assert search_terms("Корм, для СОБАК! корм") == ["корм", "для", "собак"]
+        assert search_terms("+-*()") == []
+        assert len(search_terms(" ".join(f"w{i}" for i in range(20)))) == MAX_TERMS
+
+    def test_highlight(self):
+        """Совпадения без учета регистра в <mark>, остальной текст экранирован"""
+        assert highlight("Корм для собак", ["корм"]) == "<mark>Корм</mark> для собак"
+        assert highlight("<b>корм</b>", ["корм"]) == "&lt;b&gt;<mark>корм</mark>&lt;/b&gt;"
+        assert highlight("кормушка", ["кор", "корм"]) == "<mark>корм</mark>ушка"
+        assert highlight(None, ["корм"]) is None
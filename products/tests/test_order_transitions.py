@@ -0,0 +1,95 @@
+from products.crud.product_crud import (
+    ACTIVE_STATUSES, ORDER_TRANSITIONS, cancel_customer_order, claim_order, complete_order_if_purchased,
+    create_order, get_order, release_order, transition_order_status, transition_sources,
+    update_order_status, update_products_purchase_bulk
+)
+from products.models import OrderStatus
+from products.schemas import OrderCreate, ProductCreate
+
+class TestOrderTransitions:
+    """Тесты таблицы переходов статусов заказа"""
+
+    def test_every_status_has_transitions(self):
+        assert set(ORDER_TRANSITIONS) == set(OrderStatus)
+
+    def test_final_statuses(self):
+        """Завершенный и отмененный заказы не меняются"""
+        for status in (OrderStatus.COMPLETED, OrderStatus.CANCELLED):
+            assert ORDER_TRANSITIONS[status] == ()
+            assert status not in transition_sources(OrderStatus.PENDING)
+
+    def test_transition_sources(self):
+        """Начать можно только ожидающий заказ, завершить и отменить - активный"""
+        assert transition_sources(OrderStatus.IN_PROGRESS) == (OrderStatus.PENDING,)
+        assert transition_sources(OrderStatus.PENDING) == (OrderStatus.IN_PROGRESS,)
+        assert set(transition_sources(OrderStatus.COMPLETED)) == set(ACTIVE_STATUSES)
+        assert set(transition_sources(OrderStatus.CANCELLED)) == set(ACTIVE_STATUSES)
+
+    def test_no_self_transitions(self):
+        """Повторная установка того же статуса не считается переходом"""
+        for status, targets in ORDER_TRANSITIONS.items():
+            assert status not in targets
+
+def make_order(db, customer_id: int = 1, products: int = 1):
+    return create_order(db, OrderCreate(products=[ProductCreate(name=f"Продукт {i}") for i in range(products)]), customer_id)
+
+def purchase_all(db, order):
+    update_products_purchase_bulk(db, {product.id: True for product in order.products}, executor_id=10)
+
+class TestTransitionOrderStatus:
+    """Условный UPDATE статуса заказа на SQLite"""
+
+    def test_competing_transition_loses(self, db):
+        """Из двух одинаковых переходов выполняется только первый"""
+        order = make_order(db)
+        assert claim_order(db, order.id, executor_id=10, lease_seconds=600) is not None
+        assert claim_order(db, order.id, executor_id=20, lease_seconds=600) is None
+        assert get_order(db, order.id).assignee_id == 10
+
+    def test_disallowed_source_status(self, db):
+        """Завершенный заказ нельзя отменить или вернуть в работу"""
+        order = make_order(db)
+        assert update_order_status(db, order.id, OrderStatus.COMPLETED).status == OrderStatus.COMPLETED
+        assert update_order_status(db, order.id, OrderStatus.CANCELLED) is None
+        assert update_order_status(db, order.id, OrderStatus.IN_PROGRESS) is None
+        assert transition_order_status(db, 999, OrderStatus.CANCELLED) is None
+
+    def test_cancel_checks_customer(self, db):
+        order = make_order(db, customer_id=1)
+        assert cancel_customer_order(db, order.id, customer_id=2) is None
+        assert cancel_customer_order(db, order.id, customer_id=1).status == OrderStatus.CANCELLED
+
+    def test_complete_checks_purchases_and_lease(self, db):
+        """Завершить можно только полностью купленный заказ, не взятый другим исполнителем"""
+        order = make_order(db, products=2)
+        claim_order(db, order.id, executor_id=10, lease_seconds=600)
+        assert complete_order_if_purchased(db, order.id, executor_id=10) is None
+
+        purchase_all(db, order)
+        db.expire_all()
+        order = get_order(db, order.id)
+        # Массовая покупка уже завершила заказ: аренда снята
+        assert order.status == OrderStatus.COMPLETED
+        assert order.lease_expires_at is None
+
+        other = make_order(db)
+        claim_order(db, other.id, executor_id=10, lease_seconds=600)
+        other.purchased_products = other.total_products
+        db.commit()
+        assert complete_order_if_purchased(db, other.id, executor_id=20) is None
+        completed = complete_order_if_purchased(db, other.id, executor_id=10)
+        assert completed.status == OrderStatus.COMPLETED
+        assert completed.lease_expires_at is None
+
+    def test_return_to_queue_clears_lease(self, db):
+        """Заказ, возвращенный в очередь, не выглядит взятым в работу"""
+        order = make_order(db)
+        claim_order(db, order.id, executor_id=10, lease_seconds=600)
+        requeued = update_order_status(db, order.id, OrderStatus.PENDING)
+        assert (requeued.assignee_id, requeued.lease_expires_at) == (None, None)
+
+        claim_order(db, order.id, executor_id=10, lease_seconds=600)
+        released = release_order(db, order.id, executor_id=10)
+        assert (released.status, released.assignee_id, released.lease_expires_at) == (
+            OrderStatus.PENDING, None, None
+        )
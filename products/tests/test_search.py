@@ -1,9 +1,21 @@
+import asyncio
 import pytest
 from unittest.mock import AsyncMock, patch
-from products.services.search_service import MaxiRetailSearchService
+from fastapi import HTTPException
+from products.services.search_service import MaxiRetailSearchService, parse_search_page
+from products.services.parser_pool import ParserPool
+from products.services.fair_scheduler import FairShareScheduler, parse_weights
+from products.services.search_cache import SearchCache, read_snapshot, write_snapshot
+from products.services.single_flight import SingleFlight
+from products.services.saved_search_refresher import build_snapshot, diff_snapshots
+from app.utils import ClientDisconnected, run_until_disconnected, decode_cursor, encode_cursor
 from products.schemas.search_schemas import ProductSearchRequest, ProductSearchResponse
 from products.routers.search import router
-from datetime import datetime
+from products.crud.saved_search_crud import (
+    claim_due_saved_searches, create_saved_search, delete_saved_search, get_saved_search_changes,
+    release_saved_searches, save_refresh_results
+)
+from datetime import datetime, timedelta
 
 class TestSearchService:
     """Тесты для сервиса поиска"""
@@ -46,6 +58,285 @@ class TestSearchService:
         assert pagination["current_page"] == 3
         assert pagination["total_pages"] == 5
 
+    def test_parse_search_page(self):
+        """Тест разбора страницы выдачи"""
+        html = (
+            "<html><body><script>window.ProductList = {"
+            '"products": [{"id": 1, "name": "Хлеб", "price": 45.5}, {"id": 2, "name": ""}],'
+            '"count": 37}</script></body></html>'
+        )
+        products, count = parse_search_page(html, "хлеб")
+        assert count == 37
+        assert len(products) == 1
+        assert products[0]["name"] == "Хлеб"
+        assert products[0]["search_query"] == "хлеб"
+    
+    def test_parse_search_page_without_data(self):
+        """Страница без данных о товарах дает пустой результат"""
+        assert parse_search_page("<html></html>", "хлеб") == ([], 0)
+
+class TestParserPool:
+    """Тесты для пула парсинга"""
+    
+    def test_run_in_thread_pool(self):
+        """Функция выполняется в пуле и возвращает результат"""
+        pool = ParserPool(kind="thread", max_workers=1, max_queue=1, timeout=1)
+        try:
+            assert asyncio.run(pool.run(sum, [1, 2, 3])) == 6
+        finally:
+            pool.shutdown()
+    
+    def test_queue_overflow_rejected(self):
+        """Задачи сверх лимита очереди отклоняются с 503"""
+        import threading
+        release = threading.Event()
+        pool = ParserPool(kind="thread", max_workers=1, max_queue=0, timeout=1)
+        
+        async def scenario():
+            first = asyncio.create_task(pool.run(release.wait))
+            await asyncio.sleep(0.01)
+            try:
+                with pytest.raises(HTTPException) as exc_info:
+                    await pool.run(sum, [1])
+                return exc_info.value.status_code
+            finally:
+                release.set()
+                await first
+        
+        try:
+            assert asyncio.run(scenario()) == 503
+        finally:
+            pool.shutdown()
+    
+    def test_timeout(self):
+        """Задача, не уложившаяся в таймаут, завершается ошибкой 504"""
+        import time
+        pool = ParserPool(kind="thread", max_workers=1, max_queue=1, timeout=0.01)
+        try:
+            with pytest.raises(HTTPException) as exc_info:
+                asyncio.run(pool.run(time.sleep, 0.2))
+            assert exc_info.value.status_code == 504
+        finally:
+            pool.shutdown()
+    
+    def test_broken_process_pool(self):
+        """Падение процесса пула дает 503, пул пересоздается"""
+        import os
+        pool = ParserPool(kind="process", max_workers=1, max_queue=1, timeout=10)
+        try:
+            with pytest.raises(HTTPException) as exc_info:
+                asyncio.run(pool.run(os._exit, 1))
+            assert exc_info.value.status_code == 503
+            assert pool._executor is None
+            assert asyncio.run(pool.run(sum, [1, 2, 3])) == 6
+        finally:
+            pool.shutdown()
+
+class TestFairShareScheduler:
+    """Тесты для справедливого планировщика запросов к сайту"""
+    
+    @staticmethod
+    async def _serve_order(scheduler, requests):
+        """Запускает запросы при занятом месте и возвращает порядок обслуживания"""
+        served = []
+        gate = asyncio.Event()
+        
+        async def hold():
+            async with scheduler.slot("holder", "customer"):
+                await gate.wait()
+        
+        async def request(user_key, user_class):
+            async with scheduler.slot(user_key, user_class):
+                served.append(user_key)
+                await asyncio.sleep(0)
+        
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        tasks = []
+        for user_key, user_class in requests:
+            tasks.append(asyncio.create_task(request(user_key, user_class)))
+            await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(holder, *tasks)
+        return served
+    
+    def test_parse_weights(self):
+        """Тест разбора весов классов"""
+        assert parse_weights("executor:3, customer:1,") == {"executor": 3.0, "customer": 1.0}
+    
+    def test_non_positive_weights_rejected(self):
+        """Нулевой или отрицательный вес не принимается"""
+        for raw in ("executor:3,customer:0", "customer:-1", "customer:nan"):
+            with pytest.raises(ValueError):
+                parse_weights(raw)
+        with pytest.raises(ValueError):
+            FairShareScheduler(capacity=1, weights={"customer": 0})
+        with pytest.raises(ValueError):
+            FairShareScheduler(capacity=1, weights={}, default_weight=0)
+    
+    def test_heavy_user_does_not_starve_others(self):
+        """Пользователь с множеством запросов не задерживает остальных"""
+        scheduler = FairShareScheduler(capacity=1, weights={"customer": 1})
+        requests = [("heavy", "customer")] * 10 + [("light", "customer")]
+        served = asyncio.run(self._serve_order(scheduler, requests))
+        assert served.index("light") <= 2
+    
+    def test_weighted_share(self):
+        """Класс с большим весом обслуживается пропорционально чаще"""
+        scheduler = FairShareScheduler(capacity=1, weights={"executor": 3, "customer": 1})
+        requests = [("customer", "customer")] * 8 + [("executor", "executor")] * 8
+        served = asyncio.run(self._serve_order(scheduler, requests))
+        assert served[:8].count("executor") == 6
+    
+    def test_cancelled_waiter_leaves_queue(self):
+        """Отмененный запрос убирается из очереди"""
+        async def scenario():
+            scheduler = FairShareScheduler(capacity=1, weights={})
+            async with scheduler.slot("a", "customer"):
+                waiter = asyncio.create_task(scheduler._acquire("b", "customer"))
+                await asyncio.sleep(0)
+                assert scheduler.queued("b") == 1
+                waiter.cancel()
+                await asyncio.gather(waiter, return_exceptions=True)
+                assert scheduler.queued("b") == 0
+            return scheduler.in_use
+        
+        assert asyncio.run(scenario()) == 0
+
+class TestSearchCache:
+    """Тесты для кэша результатов поиска"""
+    
+    VALUE = ([{"id": 1, "name": "Хлеб", "price": 45.5}], {"current_page": 1, "total_pages": 1})
+    
+    def test_get_set_and_expiry(self):
+        """Запись доступна до истечения TTL"""
+        cache = SearchCache(ttl=60, max_entries=10)
+        cache.set(("хлеб", 1), self.VALUE)
+        assert cache.get(("хлеб", 1)) == self.VALUE
+        assert cache.get(("молоко", 1)) is None
+        
+        cache._entries[("хлеб", 1)].expires_at = 0
+        assert cache.get(("хлеб", 1)) is None
+    
+    def test_lru_eviction(self):
+        """При переполнении вытесняется давно не использованная запись"""
+        cache = SearchCache(ttl=60, max_entries=2)
+        cache.set(("a", 1), self.VALUE)
+        cache.set(("b", 1), self.VALUE)
+        cache.get(("a", 1))
+        cache.set(("c", 1), self.VALUE)
+        assert cache.get(("b", 1)) is None
+        assert cache.get(("a", 1)) == self.VALUE
+    
+    def test_snapshot_roundtrip_preserves_ttl(self, tmp_path):
+        """Снимок восстанавливает живые записи с исходным временем истечения"""
+        path = str(tmp_path / "cache.bin")
+        cache = SearchCache(ttl=60, max_entries=10)
+        cache.set(("хлеб", 1), self.VALUE)
+        cache.set(("молоко", 2), self.VALUE)
+        cache._entries[("молоко", 2)].expires_at = 1
+        expires_at = cache._entries[("хлеб", 1)].expires_at
+        
+        assert write_snapshot(cache.items(), path) == 1
+        
+        restored = SearchCache(ttl=60, max_entries=10)
+        assert restored.merge(read_snapshot(path)) == 1
+        assert restored._entries[("хлеб", 1)].expires_at == expires_at
+        assert restored.get(("хлеб", 1)) == self.VALUE
+        assert restored.get(("молоко", 2)) is None
+    
+    def test_missing_snapshot(self, tmp_path):
+        """Отсутствующий снимок дает пустой кэш"""
+        assert read_snapshot(str(tmp_path / "missing.bin")) == {}
+
+class TestSavedSearchDiff:
+    """Тесты для сравнения результатов сохраненных поисков"""
+    
+    PREVIOUS = build_snapshot([
+        {"id": 1, "name": "Хлеб", "price": 45.5},
+        {"id": 2, "name": "Молоко", "price": 89.0},
+        {"name": "Сыр", "price": 300.0}
+    ])
+    
+    def test_first_refresh_is_baseline(self):
+        """Первое обновление только запоминает снимок"""
+        assert diff_snapshots(None, self.PREVIOUS) is None
+    
+    def test_no_changes(self):
+        """Одинаковые результаты не дают изменений"""
+        assert diff_snapshots(self.PREVIOUS, dict(self.PREVIOUS)) is None
+    
+    def test_added_removed_and_price_changed(self):
+        """Изменения определяются по id товара и цене"""
+        current = build_snapshot([
+            {"id": 1, "name": "Хлеб", "price": 49.9},
+            {"id": 3, "name": "Кефир", "price": 75.0},
+            {"name": "Сыр", "price": 300.0}
+        ])
+        changes = diff_snapshots(self.PREVIOUS, current)
+        
+        assert changes["added"] == [{"id": "3", "name": "Кефир", "price": 75.0}]
+        assert changes["removed"] == [{"id": "2", "name": "Молоко", "price": 89.0}]
+        assert changes["price_changed"] == [
+            {"id": "1", "name": "Хлеб", "old_price": 45.5, "new_price": 49.9}
+        ]
+
+class TestSavedSearchRefreshClaims:
+    """Тесты захвата сохраненных поисков на обновление"""
+    
+    def test_failed_refresh_keeps_search_due(self, db):
+        """Неудачное обновление снимает захват и не сдвигает last_refreshed_at"""
+        saved_search = create_saved_search(db, 1, "хлеб")
+        due = datetime.utcnow() - timedelta(hours=1)
+        
+        claimed = claim_due_saved_searches(db, due, "first", 10)
+        assert [item["id"] for item in claimed] == [saved_search.id]
+        assert claim_due_saved_searches(db, due, "second", 10) == []
+        
+        release_saved_searches(db, [saved_search.id], "first")
+        db.refresh(saved_search)
+        assert saved_search.refresh_token is None
+        assert saved_search.last_refreshed_at is None
+        assert len(claim_due_saved_searches(db, due, "second", 10)) == 1
+    
+    def test_successful_refresh_advances_timestamp(self, db):
+        """Успешное обновление сдвигает last_refreshed_at и снимает захват"""
+        saved_search = create_saved_search(db, 1, "молоко")
+        claimed = claim_due_saved_searches(db, datetime.utcnow() - timedelta(hours=1), "token", 10)
+        save_refresh_results(db, [{**claimed[0], "snapshot": {}, "changes": None}])
+        
+        db.refresh(saved_search)
+        assert saved_search.refresh_token is None
+        assert saved_search.last_refreshed_at is not None
+        assert claim_due_saved_searches(db, datetime.utcnow() - timedelta(hours=1), "other", 10) == []
+    
+    def test_deleted_during_refresh_gets_no_changes(self, db):
+        """Поиск, удаленный во время обновления, не получает изменений"""
+        saved_search = create_saved_search(db, 1, "кефир")
+        claimed = claim_due_saved_searches(db, datetime.utcnow() - timedelta(hours=1), "token", 10)
+        delete_saved_search(db, saved_search.id, 1)
+        save_refresh_results(db, [{**claimed[0], "snapshot": {}, "changes": {"added": [], "removed": [], "price_changed": []}}])
+        assert get_saved_search_changes(db, 1) == []
+    
+    def test_changes_pages_do_not_split_batch(self, db):
+        """Страницы по курсору не теряют изменения одного обновления с одинаковым detected_at"""
+        searches = [create_saved_search(db, 1, f"товар {number}") for number in range(5)]
+        changes = {"added": [{"id": "1", "name": "Хлеб", "price": 45.5}], "removed": [], "price_changed": []}
+        save_refresh_results(db, [
+            {"id": search.id, "user_id": 1, "query": search.query, "snapshot": {}, "changes": changes}
+            for search in searches
+        ])
+        
+        seen = []
+        cursor = None
+        while True:
+            page = get_saved_search_changes(db, 1, limit=2, cursor=cursor)
+            seen.extend(change["saved_search_id"] for change in page)
+            if len(page) < 2:
+                break
+            cursor = (page[-1]["detected_at"], page[-1]["id"])
+        assert sorted(seen) == [search.id for search in searches]
+
 class TestSearchSchemas:
     """Тесты для схем поиска"""
     
@@ -91,3 +382,126 @@ class TestSearchRouter:
         # Проверяем, что есть хотя бы один POST маршрут
         post_routes = [route for route in router.routes if hasattr(route, 'methods') and 'POST' in route.methods]
         assert len(post_routes) > 0
+
+class TestSingleFlight:
+    """Тесты для объединения одинаковых запросов"""
+    
+    def test_concurrent_calls_share_task(self):
+        """Одинаковые конкурентные вызовы выполняют работу один раз"""
+        calls = 0
+        
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "result"
+        
+        async def scenario():
+            flight = SingleFlight("test")
+            return await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+        
+        assert asyncio.run(scenario()) == ["result"] * 5
+        assert calls == 1
+    
+    def test_shared_task_survives_partial_cancel(self):
+        """Отмена одного ожидающего не отменяет работу для остальных"""
+        async def scenario():
+            flight = SingleFlight("test")
+            started = asyncio.Event()
+            
+            async def work():
+                started.set()
+                await asyncio.sleep(0.05)
+                return "result"
+            
+            first = asyncio.create_task(flight.do("key", work))
+            second = asyncio.create_task(flight.do("key", work))
+            await started.wait()
+            first.cancel()
+            return await second
+        
+        assert asyncio.run(scenario()) == "result"
+    
+    def test_shared_task_cancelled_with_last_waiter(self):
+        """Работа отменяется, когда уходит последний ожидающий"""
+        async def scenario():
+            flight = SingleFlight("test")
+            work_cancelled = asyncio.Event()
+            
+            async def work():
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    work_cancelled.set()
+                    raise
+            
+            waiters = [asyncio.create_task(flight.do("key", work)) for _ in range(2)]
+            await asyncio.sleep(0)
+            for waiter in waiters:
+                waiter.cancel()
+            await asyncio.gather(*waiters, return_exceptions=True)
+            await asyncio.wait_for(work_cancelled.wait(), 1)
+            return flight.waiters("key")
+        
+        assert asyncio.run(scenario()) == 0
+
+class TestDisconnectCancellation:
+    """Тесты отмены работы при отключении клиента"""
+    
+    class FakeRequest:
+        def __init__(self, disconnect_after: int):
+            self.checks = 0
+            self.disconnect_after = disconnect_after
+        
+        async def is_disconnected(self):
+            self.checks += 1
+            return self.checks >= self.disconnect_after
+    
+    def test_work_cancelled_on_disconnect(self):
+        """Работа отменяется, если клиент отключился"""
+        async def scenario():
+            cancelled = asyncio.Event()
+            
+            async def work():
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    cancelled.set()
+                    raise
+            
+            with pytest.raises(ClientDisconnected):
+                await run_until_disconnected(self.FakeRequest(2), work(), "test", poll_interval=0.01)
+            return cancelled.is_set()
+        
+        assert asyncio.run(scenario())
+    
+    def test_result_returned_while_connected(self):
+        """Результат возвращается, пока клиент подключен"""
+        async def work():
+            await asyncio.sleep(0.02)
+            return 42
+        
+        request = self.FakeRequest(1000)
+        assert asyncio.run(run_until_disconnected(request, work(), "test", poll_interval=0.005)) == 42
+
+
+class TestCursorPagination:
+    """Тесты курсоров keyset-пагинации"""
+    
+    def test_cursor_roundtrip(self):
+        """Курсор сохраняет дату и id последней записи"""
+        created_at = datetime(2024, 5, 1, 12, 30, 15)
+        cursor = encode_cursor(created_at, 42)
+        assert "=" not in cursor
+        assert decode_cursor(cursor) == (created_at, 42)
+    
+    def test_empty_cursor(self):
+        """Без курсора используется пагинация skip/limit"""
+        assert decode_cursor(None) is None
+        assert decode_cursor("") is None
+    
+    def test_invalid_cursor(self):
+        """Некорректный курсор дает ошибку 400"""
+        with pytest.raises(HTTPException) as error:
+            decode_cursor("не-курсор")
+        assert error.value.status_code == 400